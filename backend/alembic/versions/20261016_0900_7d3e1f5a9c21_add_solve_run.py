@@ -0,0 +1,59 @@
+"""Add SolveRun telemetry table
+
+Revision ID: 7d3e1f5a9c21
+Revises: 5c2a2f9f273c
+Create Date: 2026-10-16 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d3e1f5a9c21'
+down_revision: Union[str, None] = '5c2a2f9f273c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+
+    if 'solverun' not in inspector.get_table_names():
+        op.create_table('solverun',
+        sa.Column('id', sa.Uuid(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('start_date', sa.Date(), nullable=False),
+        sa.Column('end_date', sa.Date(), nullable=False),
+        sa.Column('mode', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('status', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('employees', sa.Integer(), nullable=False),
+        sa.Column('days', sa.Integer(), nullable=False),
+        sa.Column('assignments', sa.Integer(), nullable=False),
+        sa.Column('load_ms', sa.Float(), nullable=True),
+        sa.Column('precheck_ms', sa.Float(), nullable=True),
+        sa.Column('build_ms', sa.Float(), nullable=True),
+        sa.Column('solve_ms', sa.Float(), nullable=True),
+        sa.Column('extract_ms', sa.Float(), nullable=True),
+        sa.Column('persist_ms', sa.Float(), nullable=True),
+        sa.Column('total_ms', sa.Float(), nullable=False),
+        sa.Column('wall_time', sa.Float(), nullable=True),
+        sa.Column('num_branches', sa.Integer(), nullable=True),
+        sa.Column('num_conflicts', sa.Integer(), nullable=True),
+        sa.Column('objective', sa.Float(), nullable=True),
+        sa.Column('best_bound', sa.Float(), nullable=True),
+        sa.Column('gap', sa.Float(), nullable=True),
+        sa.Column('num_variables', sa.Integer(), nullable=True),
+        sa.Column('num_constraints', sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_solverun_created_at'), 'solverun', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_solverun_created_at'), table_name='solverun')
+    op.drop_table('solverun')
@@ -0,0 +1,40 @@
+"""Add search profile, worker count and deterministic time to SolveRun
+
+Revision ID: 9b4c2e7d1f03
+Revises: 7d3e1f5a9c21
+Create Date: 2026-10-16 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b4c2e7d1f03'
+down_revision: Union[str, None] = '7d3e1f5a9c21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    columns = {c['name'] for c in inspector.get_columns('solverun')}
+
+    with op.batch_alter_table('solverun', schema=None) as batch_op:
+        if 'profile' not in columns:
+            batch_op.add_column(sa.Column('profile', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+        if 'num_workers' not in columns:
+            batch_op.add_column(sa.Column('num_workers', sa.Integer(), nullable=True))
+        if 'deterministic_time' not in columns:
+            batch_op.add_column(sa.Column('deterministic_time', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('solverun', schema=None) as batch_op:
+        batch_op.drop_column('deterministic_time')
+        batch_op.drop_column('num_workers')
+        batch_op.drop_column('profile')
@@ -0,0 +1,48 @@
+"""Add ScheduleChange log for the delta-sync schedule feed
+
+Revision ID: c3e8a1d4b692
+Revises: 9b4c2e7d1f03
+Create Date: 2026-10-16 15:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e8a1d4b692'
+down_revision: Union[str, None] = '9b4c2e7d1f03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+
+    if 'schedulechange' not in inspector.get_table_names():
+        op.create_table('schedulechange',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('schedule_id', sa.Uuid(), nullable=False),
+        sa.Column('user_id', sa.Uuid(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('op', sa.Enum('INSERT', 'UPDATE', 'DELETE', name='schedulechangeop'), nullable=False),
+        sa.Column('changed_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sqlite_autoincrement=True
+        )
+        op.create_index(op.f('ix_schedulechange_schedule_id'), 'schedulechange', ['schedule_id'], unique=False)
+        op.create_index(op.f('ix_schedulechange_user_id'), 'schedulechange', ['user_id'], unique=False)
+        op.create_index(op.f('ix_schedulechange_date'), 'schedulechange', ['date'], unique=False)
+        op.create_index(op.f('ix_schedulechange_changed_at'), 'schedulechange', ['changed_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_schedulechange_changed_at'), table_name='schedulechange')
+    op.drop_index(op.f('ix_schedulechange_date'), table_name='schedulechange')
+    op.drop_index(op.f('ix_schedulechange_user_id'), table_name='schedulechange')
+    op.drop_index(op.f('ix_schedulechange_schedule_id'), table_name='schedulechange')
+    op.drop_table('schedulechange')
+    sa.Enum(name='schedulechangeop').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,121 @@
+"""Add HoursRollup of planned and worked hours per user and month
+
+Revision ID: d5f2b7a9e014
+Revises: c3e8a1d4b692
+Create Date: 2026-10-16 18:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5f2b7a9e014'
+down_revision: Union[str, None] = 'c3e8a1d4b692'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _minutes(start, end) -> int:
+    # Same rule as app.services.shift_geometry.minute_span: an end at or before the start is overnight
+    span = (end.hour * 60 + end.minute) - (start.hour * 60 + start.minute)
+    return span if span > 0 else span + 24 * 60
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+
+    if 'hoursrollup' in inspector.get_table_names():
+        return
+    op.create_table('hoursrollup',
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('planned_hours', sa.Float(), nullable=False),
+    sa.Column('planned_shifts', sa.Integer(), nullable=False),
+    sa.Column('published_hours', sa.Float(), nullable=False),
+    sa.Column('published_shifts', sa.Integer(), nullable=False),
+    sa.Column('worked_hours', sa.Float(), nullable=False),
+    sa.Column('worked_shifts', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'month')
+    )
+    op.create_index(op.f('ix_hoursrollup_month'), 'hoursrollup', ['month'], unique=False)
+
+    # Aggregate the existing rows so the hours views do not start from zero
+    shift_definition = sa.table(
+        'shiftdefinition',
+        sa.column('id', sa.Integer()),
+        sa.column('start_time', sa.Time()),
+        sa.column('end_time', sa.Time()),
+    )
+    schedule = sa.table(
+        'schedule',
+        sa.column('user_id', sa.Uuid()),
+        sa.column('date', sa.Date()),
+        sa.column('shift_def_id', sa.Integer()),
+        sa.column('is_published', sa.Boolean()),
+    )
+    attendance = sa.table(
+        'attendance',
+        sa.column('user_id', sa.Uuid()),
+        sa.column('date', sa.Date()),
+        sa.column('check_in', sa.Time()),
+        sa.column('check_out', sa.Time()),
+        sa.column('status', sa.String()),
+    )
+    hours = {
+        s_id: _minutes(start, end) / 60
+        for s_id, start, end in conn.execute(sa.select(
+            shift_definition.c.id, shift_definition.c.start_time, shift_definition.c.end_time
+        )).all()
+    }
+    totals = {}
+
+    def total(user_id, day):
+        key = (user_id, day.replace(day=1))
+        if key not in totals:
+            totals[key] = {
+                'user_id': key[0], 'month': key[1], 'planned_hours': 0.0, 'planned_shifts': 0,
+                'published_hours': 0.0, 'published_shifts': 0, 'worked_hours': 0.0, 'worked_shifts': 0,
+            }
+        return totals[key]
+
+    for user_id, day, shift_id, is_published in conn.execute(sa.select(
+        schedule.c.user_id, schedule.c.date, schedule.c.shift_def_id, schedule.c.is_published
+    )).all():
+        if shift_id not in hours:
+            continue
+        row = total(user_id, day)
+        row['planned_hours'] += hours[shift_id]
+        row['planned_shifts'] += 1
+        if is_published:
+            row['published_hours'] += hours[shift_id]
+            row['published_shifts'] += 1
+    for user_id, day, check_in, check_out in conn.execute(sa.select(
+        attendance.c.user_id, attendance.c.date, attendance.c.check_in, attendance.c.check_out
+    ).where(attendance.c.status == 'CONFIRMED')).all():
+        row = total(user_id, day)
+        row['worked_hours'] += _minutes(check_in, check_out) / 60
+        row['worked_shifts'] += 1
+
+    if totals:
+        rollup_table = sa.table(
+            'hoursrollup',
+            sa.column('user_id', sa.Uuid()),
+            sa.column('month', sa.Date()),
+            sa.column('planned_hours', sa.Float()),
+            sa.column('planned_shifts', sa.Integer()),
+            sa.column('published_hours', sa.Float()),
+            sa.column('published_shifts', sa.Integer()),
+            sa.column('worked_hours', sa.Float()),
+            sa.column('worked_shifts', sa.Integer()),
+        )
+        op.bulk_insert(rollup_table, list(totals.values()))
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_hoursrollup_month'), table_name='hoursrollup')
+    op.drop_table('hoursrollup')
@@ -0,0 +1,58 @@
+"""Add unique (user_id, date, shift_def_id) constraint to Availability
+
+Revision ID: e7a4c1f3b825
+Revises: d5f2b7a9e014
+Create Date: 2026-10-16 20:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a4c1f3b825'
+down_revision: Union[str, None] = 'd5f2b7a9e014'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+
+    constraints = {c['name'] for c in inspector.get_unique_constraints('availability')}
+    if 'uq_availability_user_date_shift' in constraints:
+        return
+
+    # The old select-then-insert path could race; keep one row per cell before constraining
+    availability = sa.table(
+        'availability',
+        sa.column('id', sa.Uuid()),
+        sa.column('user_id', sa.Uuid()),
+        sa.column('date', sa.Date()),
+        sa.column('shift_def_id', sa.Integer()),
+    )
+    duplicated = conn.execute(
+        sa.select(availability.c.user_id, availability.c.date, availability.c.shift_def_id)
+        .group_by(availability.c.user_id, availability.c.date, availability.c.shift_def_id)
+        .having(sa.func.count() > 1)
+    ).all()
+    for user_id, day, shift_def_id in duplicated:
+        ids = conn.execute(
+            sa.select(availability.c.id).where(
+                availability.c.user_id == user_id,
+                availability.c.date == day,
+                availability.c.shift_def_id == shift_def_id,
+            )
+        ).scalars().all()
+        conn.execute(sa.delete(availability).where(availability.c.id.in_(ids[1:])))
+
+    with op.batch_alter_table('availability', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_availability_user_date_shift', ['user_id', 'date', 'shift_def_id'])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('availability', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_availability_user_date_shift', type_='unique')
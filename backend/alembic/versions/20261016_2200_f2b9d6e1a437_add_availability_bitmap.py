@@ -0,0 +1,86 @@
+"""Add AvailabilityBitmap, packed 2-bit availability per user and month
+
+Revision ID: f2b9d6e1a437
+Revises: e7a4c1f3b825
+Create Date: 2026-10-16 22:00:00
+
+"""
+from calendar import monthrange
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b9d6e1a437'
+down_revision: Union[str, None] = 'e7a4c1f3b825'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Same codes and layout as app.services.availability_bitmap
+_CODES = {'AVAILABLE': 1, 'UNAVAILABLE': 2, 'PREFERRED': 3}
+
+
+def _pack(codes: bytearray) -> bytes:
+    packed = bytearray(-(-len(codes) // 4))
+    for cell, code in enumerate(codes):
+        packed[cell // 4] |= code << (2 * (cell % 4))
+    return bytes(packed)
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+
+    if 'availabilitybitmap' in inspector.get_table_names():
+        return
+    op.create_table('availabilitybitmap',
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('shift_ids', sa.String(), nullable=False),
+    sa.Column('bits', sa.LargeBinary(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'month')
+    )
+    op.create_index(op.f('ix_availabilitybitmap_month'), 'availabilitybitmap', ['month'], unique=False)
+
+    # Pack the existing rows so readers switching to the bitmaps see the same data
+    availability = sa.table(
+        'availability',
+        sa.column('user_id', sa.Uuid()),
+        sa.column('date', sa.Date()),
+        sa.column('shift_def_id', sa.Integer()),
+        sa.column('status', sa.String()),
+    )
+    shift_ids = set(conn.execute(sa.text('SELECT id FROM shiftdefinition')).scalars().all())
+    cells = {}
+    for user_id, day, shift_id, status in conn.execute(sa.select(
+        availability.c.user_id, availability.c.date, availability.c.shift_def_id, availability.c.status
+    )).all():
+        cells.setdefault((user_id, day.replace(day=1)), []).append((day.day, shift_id, status))
+        shift_ids.add(shift_id)
+    shift_ids = sorted(shift_ids)
+    index = {s_id: i for i, s_id in enumerate(shift_ids)}
+    stored_ids = ','.join(str(s_id) for s_id in shift_ids)
+
+    bitmaps = []
+    for (user_id, month), month_cells in cells.items():
+        codes = bytearray(monthrange(month.year, month.month)[1] * len(shift_ids))
+        for day, shift_id, status in month_cells:
+            codes[(day - 1) * len(shift_ids) + index[shift_id]] = _CODES[status]
+        bitmaps.append({'user_id': user_id, 'month': month, 'shift_ids': stored_ids, 'bits': _pack(codes)})
+    if bitmaps:
+        bitmap_table = sa.table(
+            'availabilitybitmap',
+            sa.column('user_id', sa.Uuid()),
+            sa.column('month', sa.Date()),
+            sa.column('shift_ids', sa.String()),
+            sa.column('bits', sa.LargeBinary()),
+        )
+        op.bulk_insert(bitmap_table, bitmaps)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_availabilitybitmap_month'), table_name='availabilitybitmap')
+    op.drop_table('availabilitybitmap')
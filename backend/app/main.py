@@ -41,6 +41,8 @@ async def lifespan(app: FastAPI):
 
     logger.info("Application startup complete.")
     yield
+    from .services.solver_jobs import solver_jobs
+    solver_jobs.shutdown()
     from .database import engine
     engine.dispose()
     logger.info("Application shutdown.")
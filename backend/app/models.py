@@ -4,7 +4,7 @@ from typing import Optional, List
 from enum import Enum
 from pydantic import EmailStr, computed_field
 from sqlmodel import SQLModel, Field, Relationship, col
-from sqlalchemy import Column, Date, Integer
+from sqlalchemy import Column, Date, Integer, UniqueConstraint
 
 class RoleSystem(str, Enum):
     MANAGER = "MANAGER"
@@ -116,6 +116,9 @@ class ShiftDefinition(SQLModel, table=True):
     days: List["ShiftDefinitionDayLink"] = Relationship()
 
 class Availability(SQLModel, table=True):
+    # One status per user and shift instance; bulk submissions upsert against it
+    __table_args__ = (UniqueConstraint("user_id", "date", "shift_def_id", name="uq_availability_user_date_shift"),)
+
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     user_id: UUID = Field(foreign_key="user.id")
     date: date
@@ -124,6 +127,16 @@ class Availability(SQLModel, table=True):
 
     user: User = Relationship(back_populates="availabilities")
 
+class AvailabilityBitmap(SQLModel, table=True):
+    """
+    A user's Availability rows for one month packed 2 bits per (day, shift) cell,
+    kept current by their write paths (see services.availability_bitmap).
+    """
+    user_id: UUID = Field(foreign_key="user.id", primary_key=True)
+    month: date = Field(primary_key=True, index=True)  # First day of the month
+    shift_ids: str  # Comma-separated shift ids in cell order
+    bits: bytes
+
 class StaffingRequirement(SQLModel, table=True):
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     shift_def_id: int = Field(foreign_key="shiftdefinition.id")
@@ -194,6 +207,41 @@ class ShiftGiveaway(SQLModel, table=True):
 
     schedule: Schedule = Relationship()
 
+class ScheduleChangeOp(str, Enum):
+    INSERT = "INSERT"
+    UPDATE = "UPDATE"
+    DELETE = "DELETE"
+
+class ScheduleChange(SQLModel, table=True):
+    """
+    Append-only log of Schedule row changes; the id is the sync cursor of the delta
+    feed (see services.schedule_changes). No foreign keys, the rows outlive deletions.
+    """
+    # Never reuse ids of pruned rows on SQLite, or old cursors would point into new changes
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    schedule_id: UUID = Field(index=True)
+    # Owner of the row after the change (before it, for DELETE)
+    user_id: UUID = Field(index=True)
+    date: date_type = Field(index=True)
+    op: ScheduleChangeOp
+    changed_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+
+class HoursRollup(SQLModel, table=True):
+    """
+    Planned and worked hours per user and month, derived from Schedule and confirmed
+    Attendance rows and kept current by their write paths (see services.hours_rollup).
+    """
+    user_id: UUID = Field(foreign_key="user.id", primary_key=True)
+    month: date = Field(primary_key=True, index=True)  # First day of the month
+    planned_hours: float = Field(default=0.0)
+    planned_shifts: int = Field(default=0)
+    published_hours: float = Field(default=0.0)
+    published_shifts: int = Field(default=0)
+    worked_hours: float = Field(default=0.0)
+    worked_shifts: int = Field(default=0)
+
 class LeaveStatus(str, Enum):
     PENDING = "PENDING"
     APPROVED = "APPROVED"
@@ -232,6 +280,38 @@ class UserDevice(SQLModel, table=True):
     user: User = Relationship(back_populates="devices")
 
 
+class SolveRun(SQLModel, table=True):
+    """Telemetry of one schedule solve: phase timings and CP-SAT response statistics."""
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+    start_date: date
+    end_date: date
+    mode: str  # "full", "decomposed", "rolling", "repair", "heuristic" or "precheck" (no model needed)
+    profile: Optional[str] = None  # CP-SAT search profile, see services.solver_profiles
+    status: str
+    employees: int
+    days: int
+    assignments: int = 0
+    # Phase timings in milliseconds
+    load_ms: Optional[float] = None
+    precheck_ms: Optional[float] = None
+    build_ms: Optional[float] = None
+    solve_ms: Optional[float] = None
+    extract_ms: Optional[float] = None
+    persist_ms: Optional[float] = None
+    total_ms: float = 0.0
+    # CP-SAT response
+    wall_time: Optional[float] = None
+    num_branches: Optional[int] = None
+    num_conflicts: Optional[int] = None
+    objective: Optional[float] = None
+    best_bound: Optional[float] = None
+    gap: Optional[float] = None
+    num_variables: Optional[int] = None
+    num_constraints: Optional[int] = None
+    num_workers: Optional[int] = None
+    deterministic_time: Optional[float] = None
+
 # ── POS & Kitchen (v2 – Production Schema) ─────────────────────────────────────
 
 # ---------- Table / Floor Plan ----------
@@ -1,12 +1,13 @@
-from typing import List
+from typing import List, Optional
 from datetime import date
 from fastapi import APIRouter, Depends, BackgroundTasks
 from sqlmodel import Session
 from ..database import get_session
 from ..models import User, Availability
 from ..auth_utils import get_current_user
-from ..schemas import AvailabilityUpdate, EmployeeScheduleResponse, GoogleAuthRequest, ScheduleResponse
+from ..schemas import AvailabilityUpdate, EmployeeScheduleResponse, GoogleAuthRequest, ScheduleFeedResponse, ScheduleResponse
 from ..services.employee_service import EmployeeService
+from ..services.shift_geometry import load_shift_geometry
 
 router = APIRouter(prefix="/employee", tags=["employee"])
 
@@ -70,6 +71,21 @@ def get_schedules_all(
     """Get the full team schedule for the given date range"""
     return service.get_team_schedule(start_date, end_date)
 
+@router.get("/schedules/changes", response_model=ScheduleFeedResponse)
+def get_schedule_changes(
+    start_date: date,
+    end_date: date,
+    since: Optional[int] = None,
+    mine: bool = False,
+    current_user: User = Depends(get_current_user),
+    service: EmployeeService = Depends(get_employee_service)
+):
+    """
+    Delta sync of the published schedule: assignments inserted, updated or deleted since
+    the `cursor` returned by the previous call (`mine` limits it to the caller's shifts).
+    """
+    return service.get_schedule_changes(since, start_date, end_date, current_user.id if mine else None)
+
 @router.get("/schedule-summary")
 def get_schedule_summary(
     year: int,
@@ -80,51 +96,43 @@ def get_schedule_summary(
     current_user: User = Depends(get_current_user),
 ):
     """Return planned hours for the current week and month (published schedule only)."""
-    from datetime import datetime as dt, timedelta
+    from sqlalchemy import func
     from sqlmodel import select
-    from ..models import Schedule, ShiftDefinition
+    from ..models import Schedule
+    from ..services.hours_rollup import hours_for_month
+    from ..services.months import month_end
 
     month_start = date(year, month, 1)
-    # last day of month
-    if month == 12:
-        month_end = date(year + 1, 1, 1) - timedelta(days=1)
-    else:
-        month_end = date(year, month + 1, 1) - timedelta(days=1)
-
-    def _hours_for_range(start: date, end: date) -> float:
-        schedules = session.exec(
-            select(Schedule).where(
-                Schedule.user_id == current_user.id,
-                Schedule.date >= start,
-                Schedule.date <= end,
-                Schedule.is_published == True,
-            )
-        ).all()
-        total = 0.0
-        for s in schedules:
-            shift = session.get(ShiftDefinition, s.shift_def_id)
-            if shift:
-                start_dt = dt.combine(date.today(), shift.start_time)
-                end_dt = dt.combine(date.today(), shift.end_time)
-                if end_dt < start_dt:
-                    end_dt += timedelta(days=1)
-                total += (end_dt - start_dt).seconds / 3600
-        return round(total, 1)
-
-    # Find last scheduled date in the month
+    rollup = hours_for_month(session, month_start, [current_user.id]).get(current_user.id)
+
+    # Week hours: published shifts counted per shift in SQL, weighted by duration here
+    geometry = load_shift_geometry(session)
+    week_counts = session.exec(
+        select(Schedule.shift_def_id, func.count())
+        .where(
+            Schedule.user_id == current_user.id,
+            Schedule.date >= week_start,
+            Schedule.date <= week_end,
+            Schedule.is_published == True,
+        )
+        .group_by(Schedule.shift_def_id)
+    ).all()
+    week_hours = sum(geometry.duration_hours(s_id) * count for s_id, count in week_counts if s_id in geometry)
+
+    # Last scheduled date in the month
     last_scheduled = session.exec(
-        select(Schedule).where(
+        select(func.max(Schedule.date)).where(
             Schedule.user_id == current_user.id,
             Schedule.date >= month_start,
-            Schedule.date <= month_end,
+            Schedule.date <= month_end(month_start),
             Schedule.is_published == True,
-        ).order_by(Schedule.date.desc())  # type: ignore[arg-type]
-    ).first()
+        )
+    ).one()
 
     return {
-        "week_hours": _hours_for_range(week_start, week_end),
-        "month_hours": _hours_for_range(month_start, month_end),
-        "last_scheduled_date": last_scheduled.date.isoformat() if last_scheduled else None,
+        "week_hours": round(week_hours, 1),
+        "month_hours": round(rollup.published_hours, 1) if rollup else 0.0,
+        "last_scheduled_date": last_scheduled.isoformat() if last_scheduled else None,
         "month": month,
         "year": year,
     }
@@ -407,6 +415,8 @@ def get_open_giveaways_for_employee(
         )
     ).all()
 
+    geometry = load_shift_geometry(session)
+
     result = []
     for g in giveaways:
         schedule = g.schedule
@@ -431,24 +441,13 @@ def get_open_giveaways_for_employee(
 
         conflict_type = "none"  # none | overlap | same_day
         if shift:
-            g_start = shift.start_time
-            g_end = shift.end_time
             for ms in my_shifts_on_day:
-                my_shift = session.get(ShiftDefinition, ms.shift_def_id)
-                if not my_shift:
+                if ms.shift_def_id not in geometry:
                     continue
-                # Check overlap > 30 min
-                from datetime import datetime as dt
-                def to_minutes(t) -> int:
-                    return t.hour * 60 + t.minute
-                overlap_start = max(to_minutes(g_start), to_minutes(my_shift.start_time))
-                overlap_end = min(to_minutes(g_end), to_minutes(my_shift.end_time))
-                overlap = overlap_end - overlap_start
-                if overlap > 30:
+                if geometry.conflict(schedule.shift_def_id, ms.shift_def_id):
                     conflict_type = "overlap"
                     break
-                else:
-                    conflict_type = "same_day"
+                conflict_type = "same_day"
 
         # Availability hint
         avail = session.exec(
@@ -500,7 +499,7 @@ def claim_giveaway(
 
     shift = session.get(ShiftDefinition, schedule.shift_def_id)
 
-    # Hard-block: overlap > 30 min
+    # Hard-block: overlap > 30 min (or one shift inside the other)
     if shift:
         my_shifts_on_day = session.exec(
             select(Schedule).where(
@@ -509,15 +508,9 @@ def claim_giveaway(
                 Schedule.is_published == True,
             )
         ).all()
-        def to_minutes(t) -> int:
-            return t.hour * 60 + t.minute
+        geometry = load_shift_geometry(session)
         for ms in my_shifts_on_day:
-            my_shift = session.get(ShiftDefinition, ms.shift_def_id)
-            if not my_shift:
-                continue
-            overlap_start = max(to_minutes(shift.start_time), to_minutes(my_shift.start_time))
-            overlap_end = min(to_minutes(shift.end_time), to_minutes(my_shift.end_time))
-            if overlap_end - overlap_start > 30:
+            if geometry.conflict(schedule.shift_def_id, ms.shift_def_id):
                 raise HTTPException(
                     status_code=400,
                     detail="You already have a shift that overlaps with this one by more than 30 minutes"
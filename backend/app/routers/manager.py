@@ -205,27 +205,24 @@ def get_team_availability(
     _: User = Depends(get_manager_user)
 ):
     """Zwraca dostępność wszystkich pracowników w danym tygodniu"""
-    from ..models import Availability
-    availabilities = session.exec(
-        select(Availability)
-        .where(Availability.date >= week_start)
-        .where(Availability.date <= week_end)
-    ).all()
+    from ..services.availability_bitmap import load_availability_matrix
+    matrix = load_availability_matrix(session, week_start, week_end)
+    names = dict(session.exec(select(User.id, User.full_name).where(User.id.in_(matrix.user_ids))).all())
     
     # Group by user
     result = {}
-    for av in availabilities:
-        user_id = str(av.user_id)
-        if user_id not in result:
-            result[user_id] = {
-                "user_id": user_id,
-                "user_name": av.user.full_name,
+    for user_id, d, shift_def_id in matrix:
+        uid = str(user_id)
+        if uid not in result:
+            result[uid] = {
+                "user_id": uid,
+                "user_name": names.get(user_id, ""),
                 "entries": []
             }
-        result[user_id]["entries"].append({
-            "date": av.date.isoformat(),
-            "shift_def_id": av.shift_def_id,
-            "status": av.status.value
+        result[uid]["entries"].append({
+            "date": d.isoformat(),
+            "shift_def_id": shift_def_id,
+            "status": matrix[(user_id, d, shift_def_id)]
         })
     
     return list(result.values())
@@ -489,59 +486,36 @@ def get_employee_hours(
     _: User = Depends(get_manager_user)
 ):
     """Get monthly hours summary for all employees with availability info"""
-    from ..models import Schedule, Availability
+    from ..models import Availability
+    from ..services.hours_rollup import hours_for_month
     from calendar import monthrange
     
     # Calculate month date range
     first_day = date(year, month, 1)
     last_day = date(year, month, monthrange(year, month)[1])
     
-    # Get all schedules for the month
-    schedules = session.exec(
-        select(Schedule).where(
-            Schedule.date >= first_day,
-            Schedule.date <= last_day
-        )
-    ).all()
-    
-    # Get shift definitions for time calculations
-    all_shifts = session.exec(select(ShiftDefinition)).all()
-    shift_map = {s.id: s for s in all_shifts}
+    # Planned hours and shift counts, one rollup row per employee
+    rollup = hours_for_month(session, first_day)
     
     # Get all employees
     employees = session.exec(
         select(User).where(User.role_system == RoleSystem.EMPLOYEE)
     ).all()
     
-    # Get availability for the month (to know who submitted)
-    availabilities = session.exec(
-        select(Availability).where(
-            Availability.date >= first_day,
-            Availability.date <= last_day
-        )
-    ).all()
-    users_with_availability = {str(a.user_id) for a in availabilities}
+    # Who submitted availability for the month
+    users_with_availability = {
+        str(uid) for uid in session.exec(
+            select(Availability.user_id).where(
+                Availability.date >= first_day,
+                Availability.date <= last_day
+            ).distinct()
+        ).all()
+    }
     
-    # Calculate hours per employee
-    hours_by_user = {}
-    for schedule in schedules:
-        uid = str(schedule.user_id)
-        shift = shift_map.get(schedule.shift_def_id)
-        if not shift:
-            continue
-        
-        # Calculate shift duration in hours
-        start_dt = datetime.combine(date.today(), shift.start_time)
-        end_dt = datetime.combine(date.today(), shift.end_time)
-        if end_dt <= start_dt:
-            # Overnight shift
-            end_dt += timedelta(days=1)
-        duration_hours = (end_dt - start_dt).total_seconds() / 3600
-        
-        if uid not in hours_by_user:
-            hours_by_user[uid] = {"total_hours": 0.0, "shift_count": 0}
-        hours_by_user[uid]["total_hours"] += duration_hours
-        hours_by_user[uid]["shift_count"] += 1
+    hours_by_user = {
+        str(uid): {"total_hours": row.planned_hours, "shift_count": row.planned_shifts}
+        for uid, row in rollup.items()
+    }
     
     # Build result for all employees
     result = []
@@ -625,7 +599,13 @@ def approve_leave_request(
     service: ManagerService = Depends(get_manager_service),
     current_user: User = Depends(get_manager_user)
 ):
-    """Approve a PENDING request"""
+    """
+    Approve a PENDING request. After the response is sent, a background job marks the
+    employee UNAVAILABLE for every shift of the leave and deletes their assignments in
+    it, published ones included. Assignments with a giveaway (open or taken) are kept
+    for the manager to resolve. Removed published shifts and kept giveaway shifts are
+    logged as warnings by the job.
+    """
     service.process_leave_request(request_id, approved=True, manager_id=current_user.id, background_tasks=background_tasks)
     return {"status": "approved"}
 
@@ -1,32 +1,229 @@
+import asyncio
+import json
 from datetime import date
-from typing import List
-from fastapi import APIRouter, Depends, BackgroundTasks
-from sqlmodel import Session
+from typing import List, Optional
+from uuid import UUID
+from fastapi import APIRouter, Depends, BackgroundTasks, HTTPException, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session, select
 from ..database import get_session
-from ..models import User
+from ..models import User, SolveRun
 from ..routers.manager import get_manager_user
+from ..services.scheduler_service import SchedulerService, schedule_list_etag
 from ..services.solver import SolverService
-from ..services.scheduler_service import SchedulerService
+from ..services.solver_cache import input_fingerprint
+from ..services.solver_input import ChangeSet, SolverInputLoader
+from ..services.solver_precheck import capacity_shortages, nothing_fillable, slot_capacity
+from ..services.solver_jobs import SolverJobManager, SolverJobStatus, get_solver_job_manager
 from ..schemas import (
-    GenerateRequest, BatchSaveRequest, 
-    ScheduleResponse, ManualAssignment
+    GenerateRequest, RepairRequest, ScenarioRequest, BatchSaveRequest, 
+    ScheduleResponse, ManualAssignment, SolverJobResponse, PrecheckResponse, SolveRunResponse
 )
 
 router = APIRouter(prefix="/scheduler", tags=["scheduler"])
 
+SSE_KEEPALIVE_SECONDS = 15
+
 def get_scheduler_service(session: Session = Depends(get_session)) -> SchedulerService:
     return SchedulerService(session)
 
-@router.post("/generate")
+@router.post("/generate", response_model=SolverJobResponse, status_code=202)
 def generate_schedule(
+    req: GenerateRequest,
+    session: Session = Depends(get_session),
+    jobs: SolverJobManager = Depends(get_solver_job_manager),
+    current_user: User = Depends(get_manager_user)
+):
+    """
+    Queue a draft schedule generation. Poll /scheduler/jobs/{job_id} for progress.
+    If the same inputs were solved recently, the returned job is already finished (`cached`).
+    """
+    options = {
+        "warm_start": req.warm_start,
+        "deviation_penalty": req.deviation_penalty,
+        "decompose": req.decompose,
+        "rolling": req.rolling,
+        "heuristic_hint": req.heuristic_hint,
+        "profile": req.profile,
+    }
+    data = SolverInputLoader(session).load(req.start_date, req.end_date)
+    job = jobs.submit(
+        req.start_date,
+        req.end_date,
+        requested_by=current_user.id,
+        options=options,
+        cache_key=input_fingerprint(data, options),
+        snapshot=data,
+    )
+    return jobs.to_dict(job)
+
+@router.post("/draft")
+def draft_schedule(
+    req: GenerateRequest,
+    session: Session = Depends(get_session),
+    _: User = Depends(get_manager_user)
+):
+    """
+    Instant draft from the greedy/local-search heuristic, returned inline (same payload
+    as a solver job result, nothing is saved). Use /generate for an optimised schedule.
+    """
+    return SolverService(session).solve(req.start_date, req.end_date, save=False, engine="heuristic")
+
+@router.post("/precheck", response_model=PrecheckResponse)
+def precheck_schedule(
     req: GenerateRequest,
     session: Session = Depends(get_session),
     _: User = Depends(get_manager_user)
 ):
-    service = SolverService(session)
-    # Draft Mode: Do not save to DB immediately
-    result = service.solve(req.start_date, req.end_date, save=False)
-    return result
+    """
+    Count available qualified staff per required slot without running the solver and
+    explain which slots cannot be fully staffed.
+    """
+    data = SolverInputLoader(session).load(req.start_date, req.end_date)
+    capacity = slot_capacity(data)
+    return {
+        "required_slots": sum(1 for required in data.requirements.values() if required > 0),
+        "fillable": not nothing_fillable(data, capacity),
+        "shortages": capacity_shortages(data, capacity),
+    }
+
+@router.post("/repair", response_model=SolverJobResponse, status_code=202)
+def repair_schedule(
+    req: RepairRequest,
+    jobs: SolverJobManager = Depends(get_solver_job_manager),
+    current_user: User = Depends(get_manager_user)
+):
+    """
+    Queue a local re-optimisation of the saved schedule after a small change (e.g. one
+    employee's availability). Only the affected users/dates/shifts are re-solved; the
+    job result carries a `diff` against the saved schedule.
+    """
+    change_set = ChangeSet(
+        user_ids=frozenset(req.user_ids),
+        dates=frozenset(req.dates),
+        shift_ids=frozenset(req.shift_def_ids),
+    )
+    job = jobs.submit(
+        req.start_date,
+        req.end_date,
+        requested_by=current_user.id,
+        options={
+            "warm_start": req.warm_start,
+            "deviation_penalty": req.deviation_penalty,
+            "change_set": change_set,
+            "profile": req.profile,
+        },
+    )
+    return jobs.to_dict(job)
+
+@router.post("/scenarios", response_model=SolverJobResponse, status_code=202)
+def solve_scenarios(
+    req: ScenarioRequest,
+    session: Session = Depends(get_session),
+    jobs: SolverJobManager = Depends(get_solver_job_manager),
+    current_user: User = Depends(get_manager_user)
+):
+    """
+    Queue a what-if comparison: the range as it is plus each scenario overlay (requirement,
+    availability or headcount changes), solved concurrently from one loaded snapshot.
+    The job result lists fill rate, overtime and objective per scenario.
+    """
+    data = SolverInputLoader(session).load(req.start_date, req.end_date)
+    job = jobs.submit_scenarios(
+        data,
+        [scenario.model_dump() for scenario in req.scenarios],
+        requested_by=current_user.id,
+    )
+    return jobs.to_dict(job)
+
+@router.get("/jobs/{job_id}", response_model=SolverJobResponse)
+def get_solver_job(
+    job_id: UUID,
+    jobs: SolverJobManager = Depends(get_solver_job_manager),
+    _: User = Depends(get_manager_user)
+):
+    return jobs.to_dict(jobs.get(job_id))
+
+@router.get("/jobs/{job_id}/result")
+def get_solver_job_result(
+    job_id: UUID,
+    jobs: SolverJobManager = Depends(get_solver_job_manager),
+    _: User = Depends(get_manager_user)
+):
+    """Return the generated draft (same payload the solver produces) once the job has succeeded."""
+    job = jobs.get(job_id)
+    if job.status == SolverJobStatus.FAILED:
+        raise HTTPException(status_code=500, detail=f"Solver job failed: {job.error}")
+    if job.status != SolverJobStatus.SUCCEEDED:
+        raise HTTPException(status_code=409, detail=f"Solver job is {job.status.value}")
+    return job.result
+
+@router.delete("/jobs/{job_id}", response_model=SolverJobResponse)
+def cancel_solver_job(
+    job_id: UUID,
+    jobs: SolverJobManager = Depends(get_solver_job_manager),
+    _: User = Depends(get_manager_user)
+):
+    return jobs.to_dict(jobs.cancel(job_id))
+
+@router.post("/jobs/{job_id}/stop", response_model=SolverJobResponse)
+def stop_solver_job(
+    job_id: UUID,
+    jobs: SolverJobManager = Depends(get_solver_job_manager),
+    _: User = Depends(get_manager_user)
+):
+    """Stop the search early; the job finishes with the best solution found so far."""
+    return jobs.to_dict(jobs.stop(job_id))
+
+@router.get("/jobs/{job_id}/events")
+async def stream_solver_job_events(
+    job_id: UUID,
+    request: Request,
+    last_event_id: Optional[str] = Header(None),
+    jobs: SolverJobManager = Depends(get_solver_job_manager),
+    _: User = Depends(get_manager_user)
+):
+    """
+    Server-Sent Events stream of intermediate solutions (`solution` events with the
+    objective, bound and assignment diff) ending with a `done` event.
+    Reconnecting clients resume after the `Last-Event-ID` they received.
+    """
+    job = jobs.get(job_id)
+    cursor = int(last_event_id) if last_event_id and last_event_id.isdigit() else 0
+
+    async def event_stream():
+        nonlocal cursor
+        while True:
+            events = await asyncio.to_thread(job.wait_for_events, cursor, SSE_KEEPALIVE_SECONDS)
+            if not events:
+                if job.events_closed or await request.is_disconnected():
+                    return
+                yield ": keep-alive\n\n"
+                continue
+            for event in events:
+                cursor += 1
+                yield f"id: {cursor}\nevent: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+            if job.events_closed and cursor >= len(job.events):
+                return
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/telemetry", response_model=List[SolveRunResponse])
+def list_solve_runs(
+    limit: int = Query(100, ge=1, le=1000),
+    mode: Optional[str] = None,
+    session: Session = Depends(get_session),
+    _: User = Depends(get_manager_user)
+):
+    """Recent solves, newest first, with phase timings and CP-SAT statistics for trend charts."""
+    statement = select(SolveRun).order_by(SolveRun.created_at.desc()).limit(limit)
+    if mode:
+        statement = statement.where(SolveRun.mode == mode)
+    return session.exec(statement).all()
 
 @router.post("/save_batch")
 def save_batch_schedule(
@@ -37,14 +234,32 @@ def save_batch_schedule(
     count = service.save_batch(batch)
     return {"status": "saved", "count": count}
 
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
 @router.get("/list", response_model=List[ScheduleResponse])
 def list_schedules(
     start_date: date,
     end_date: date,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     service: SchedulerService = Depends(get_scheduler_service),
     _: User = Depends(get_manager_user)
 ):
-    return service.get_schedule_list(start_date, end_date)
+    """
+    The range's assignments. The ETag is a version stamp of the range, so polling clients
+    sending it back as If-None-Match get an empty 304 while nothing in the range changed.
+    """
+    schedules = service.get_schedule_list(start_date, end_date)
+    etag = schedule_list_etag(schedules)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return schedules
 
 @router.post("/publish")
 def publish_schedule(
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, field_validator, model_validator, ValidationInfo
 from datetime import datetime, date as date_type, time
-from typing import List, Optional
+from typing import List, Literal, Optional
 from uuid import UUID
 from .models import (
     RoleSystem, AvailabilityStatus, AttendanceStatus, GiveawayStatus, LeaveStatus,
@@ -244,6 +244,156 @@ class RequirementResponse(RequirementBase):
 class GenerateRequest(BaseModel):
     start_date: date_type
     end_date: date_type
+    # Re-solve: start from the schedule saved for the range and optionally penalise changes to it
+    warm_start: bool = False
+    deviation_penalty: int = 0
+    # Solve role groups / weeks as separate models in parallel (faster on month-long ranges)
+    decompose: bool = False
+    # Solve overlapping two-week windows, committing a week at a time (for quarter-long ranges)
+    rolling: bool = False
+    # Seed CP-SAT with the greedy/local-search draft (see POST /scheduler/draft)
+    heuristic_hint: bool = False
+    # CP-SAT search profile: workers, time budgets and stop gap (see services.solver_profiles)
+    profile: Literal["fast", "balanced", "thorough"] = "balanced"
+
+    @field_validator('deviation_penalty')
+    @classmethod
+    def deviation_penalty_non_negative(cls, v: int) -> int:
+        if v < 0:
+            raise ValueError('deviation_penalty must be >= 0')
+        return v
+
+class RepairRequest(GenerateRequest):
+    """Incremental re-solve of the saved schedule around a small change, see `ChangeSet`."""
+    user_ids: List[UUID] = []
+    dates: List[date_type] = []
+    shift_def_ids: List[int] = []
+    warm_start: bool = True
+
+    @model_validator(mode='after')
+    def check_change_set(self) -> 'RepairRequest':
+        if not (self.user_ids or self.dates or self.shift_def_ids):
+            raise ValueError('Provide at least one of user_ids, dates or shift_def_ids')
+        if any(d < self.start_date or d > self.end_date for d in self.dates):
+            raise ValueError('dates must lie between start_date and end_date')
+        return self
+
+class ScenarioRequirementPatch(BaseModel):
+    """Set (`min_count`) or shift (`delta`) a requirement on one `date` or every `day_of_week`."""
+    shift_def_id: int
+    role_id: int
+    date: Optional[date_type] = None
+    day_of_week: Optional[int] = None  # 0=Monday, 6=Sunday
+    min_count: Optional[int] = None
+    delta: Optional[int] = None
+
+    @model_validator(mode='after')
+    def check_patch(self) -> 'ScenarioRequirementPatch':
+        if (self.date is None) == (self.day_of_week is None):
+            raise ValueError('Provide exactly one of date or day_of_week')
+        if self.day_of_week is not None and not 0 <= self.day_of_week <= 6:
+            raise ValueError('day_of_week must be between 0 and 6')
+        if (self.min_count is None) == (self.delta is None):
+            raise ValueError('Provide exactly one of min_count or delta')
+        if self.min_count is not None and self.min_count < 0:
+            raise ValueError('min_count must be >= 0')
+        return self
+
+class ScenarioAvailabilityPatch(BaseModel):
+    user_id: UUID
+    date: date_type
+    shift_def_id: int
+    status: AvailabilityStatus
+
+class ScenarioHire(BaseModel):
+    """Hypothetical employee, available for every shift in the range."""
+    name: Optional[str] = None
+    role_ids: List[int]
+    target_hours_per_month: Optional[int] = None
+    target_shifts_per_month: Optional[int] = None
+
+class Scenario(BaseModel):
+    name: str
+    requirements: List[ScenarioRequirementPatch] = []
+    availability: List[ScenarioAvailabilityPatch] = []
+    remove_user_ids: List[UUID] = []
+    add_staff: List[ScenarioHire] = []
+
+class ScenarioRequest(BaseModel):
+    start_date: date_type
+    end_date: date_type
+    scenarios: List[Scenario]
+
+    @model_validator(mode='after')
+    def check_scenarios(self) -> 'ScenarioRequest':
+        # Each scenario is a full solve on the shared worker pool
+        if not 1 <= len(self.scenarios) <= 8:
+            raise ValueError('Provide between 1 and 8 scenarios')
+        names = [s.name for s in self.scenarios]
+        if len(set(names)) != len(names) or 'base' in names:
+            raise ValueError('Scenario names must be unique and not "base"')
+        return self
+
+class SlotShortage(BaseModel):
+    date: date_type
+    shift_def_id: int
+    role_id: int
+    role_name: str
+    shift_name: str
+    required: int
+    available: int
+    missing: int
+    reason: str
+
+class PrecheckResponse(BaseModel):
+    required_slots: int
+    fillable: bool
+    shortages: List[SlotShortage]
+
+class SolverJobResponse(BaseModel):
+    job_id: UUID
+    status: str
+    start_date: date_type
+    end_date: date_type
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    queue_position: Optional[int] = None
+    error: Optional[str] = None
+    solutions_found: int = 0
+    # Served from the solve result cache (identical inputs solved recently)
+    cached: bool = False
+
+class SolveRunResponse(BaseModel):
+    id: UUID
+    created_at: datetime
+    start_date: date_type
+    end_date: date_type
+    mode: str
+    profile: Optional[str] = None
+    status: str
+    employees: int
+    days: int
+    assignments: int
+    load_ms: Optional[float] = None
+    precheck_ms: Optional[float] = None
+    build_ms: Optional[float] = None
+    solve_ms: Optional[float] = None
+    extract_ms: Optional[float] = None
+    persist_ms: Optional[float] = None
+    total_ms: float
+    wall_time: Optional[float] = None
+    num_branches: Optional[int] = None
+    num_conflicts: Optional[int] = None
+    objective: Optional[float] = None
+    best_bound: Optional[float] = None
+    gap: Optional[float] = None
+    num_variables: Optional[int] = None
+    num_constraints: Optional[int] = None
+    num_workers: Optional[int] = None
+    deterministic_time: Optional[float] = None
+
+    class Config:
+        from_attributes = True
 
 class ScheduleBatchItem(BaseModel):
     date: date_type
@@ -270,6 +420,15 @@ class ScheduleResponse(BaseModel):
     end_time: time
     is_on_giveaway: bool = False
 
+class ScheduleFeedResponse(BaseModel):
+    # Pass back as `since` on the next sync
+    cursor: int
+    # True when the whole range was sent (no or expired cursor): replace local data
+    reset: bool = False
+    inserted: List[ScheduleResponse] = []
+    updated: List[ScheduleResponse] = []
+    deleted: List[UUID] = []
+
 class CoworkerEntry(BaseModel):
     name: str
     role_name: str
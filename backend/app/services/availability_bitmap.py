@@ -0,0 +1,331 @@
+"""
+Packed availability bitmaps.
+
+`Availability` rows stay the source of truth, one per (user, date, shift). Alongside
+them every (user, month) has an `AvailabilityBitmap`: a 2-bit code per (day, shift)
+cell, four cells to a byte. That is 31 bytes for a month of four shifts, instead of
+124 rows. The solver, the team availability view and the giveaway and staffing
+suggestions read a range as an `AvailabilityMatrix` built from one query over those
+bitmaps, rather than from thousands of rows.
+
+Cells are laid out day-major: cell (day, shift) of a month is at
+`(day - 1) * len(shift_ids) + shift_ids.index(shift)`. `shift_ids` is stored with
+each bitmap, so shifts created later simply widen the next rewrite.
+
+Bitmaps are recomputed from the rows of the (user, month) keys a write touches, in
+the same way as `hours_rollup`. ORM writes are handled by flush hooks. Bulk SQL
+statements must call `refresh_bitmaps` themselves (see `availability_writer`).
+`python -m app.services.availability_bitmap` rebuilds everything.
+"""
+import argparse
+import logging
+from calendar import monthrange
+from collections.abc import Mapping
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import and_, delete, event, func, insert
+from sqlmodel import Session, select
+
+from ..models import Availability, AvailabilityBitmap, ShiftDefinition
+from .months import month_start
+from .orm_history import previous_values
+
+logger = logging.getLogger(__name__)
+
+CELLS_PER_BYTE = 4
+
+# 2-bit cell codes; 0 means no Availability row
+UNKNOWN, AVAILABLE, UNAVAILABLE, PREFERRED = 0, 1, 2, 3
+STATUS_BY_CODE = (None, "AVAILABLE", "UNAVAILABLE", "PREFERRED")
+CODE_BY_STATUS = {name: code for code, name in enumerate(STATUS_BY_CODE) if name}
+SCHEDULABLE_STATUSES = ("AVAILABLE", "PREFERRED")
+
+# Users per IN (...) list, well below SQLite's bound parameter limit
+_CHUNK_SIZE = 500
+
+BitmapKey = Tuple[UUID, date]  # (user_id, first day of the month)
+
+_PENDING_KEYS = "availability_bitmap_keys"
+
+
+def pack_codes(codes: bytes) -> bytes:
+    """
+    Pack one-byte cell codes four to a byte, lowest bits first. Each of the four
+    interleaved planes holds values below 4, so shifting it as one big integer never
+    carries into the next byte.
+    """
+    n = -(-len(codes) // CELLS_PER_BYTE)
+    padded = bytes(codes) + bytes(n * CELLS_PER_BYTE - len(codes))
+    value = 0
+    for plane in range(CELLS_PER_BYTE):
+        value |= int.from_bytes(padded[plane::CELLS_PER_BYTE], "little") << (2 * plane)
+    return value.to_bytes(n, "little")
+
+
+def unpack_codes(bits: bytes, cells: int) -> bytes:
+    """Inverse of `pack_codes`: the first `cells` codes, one per byte."""
+    n = len(bits)
+    value = int.from_bytes(bits, "little")
+    mask = int.from_bytes(b"\x03" * n, "little")
+    out = bytearray(n * CELLS_PER_BYTE)
+    for plane in range(CELLS_PER_BYTE):
+        out[plane::CELLS_PER_BYTE] = ((value >> (2 * plane)) & mask).to_bytes(n, "little")
+    return bytes(out[:cells])
+
+
+def days_in_month(month: date) -> int:
+    return monthrange(month.year, month.month)[1]
+
+
+@lru_cache(maxsize=64)
+def parse_shift_ids(shift_ids: str) -> Tuple[int, ...]:
+    return tuple(int(s_id) for s_id in shift_ids.split(",")) if shift_ids else ()
+
+
+def _status_code(status) -> int:
+    return CODE_BY_STATUS[str(status.value) if hasattr(status, "value") else str(status)]
+
+
+class AvailabilityMatrix(Mapping):
+    """
+    Availability of many users over a date range, 2 bits per (user, day, shift) cell.
+
+    As a read-only mapping it is (user_id, date, shift_id) -> status name for the cells
+    that have a status, like `SolverInput.availability`. `status` and `slot` read
+    single cells and whole slots without unpacking rows.
+    """
+
+    def __init__(self, days: Sequence[date], shift_ids: Sequence[int], rows: Dict[UUID, bytes]):
+        """`rows` holds each user's unpacked codes, one byte per cell, day-major."""
+        self.days = tuple(days)
+        self.shift_ids = tuple(shift_ids)
+        self._day_index = {d: i for i, d in enumerate(self.days)}
+        self._shift_index = {s_id: i for i, s_id in enumerate(self.shift_ids)}
+        self._rows = {user_id: pack_codes(codes) for user_id, codes in rows.items()}
+        self._known = sum(len(codes) - codes.count(UNKNOWN) for codes in rows.values())
+
+    @property
+    def user_ids(self) -> Tuple[UUID, ...]:
+        return tuple(self._rows)
+
+    def _cell(self, d: date, shift_id: int) -> Optional[int]:
+        day = self._day_index.get(d)
+        shift = self._shift_index.get(shift_id)
+        if day is None or shift is None:
+            return None
+        return day * len(self.shift_ids) + shift
+
+    @staticmethod
+    def _code(bits: bytes, cell: int) -> int:
+        return (bits[cell >> 2] >> ((cell & 3) << 1)) & 3
+
+    def status(self, user_id: UUID, d: date, shift_id: int) -> Optional[str]:
+        bits = self._rows.get(user_id)
+        cell = self._cell(d, shift_id)
+        if bits is None or cell is None:
+            return None
+        return STATUS_BY_CODE[self._code(bits, cell)]
+
+    def slot(self, d: date, shift_id: int) -> Dict[UUID, str]:
+        """Every user with a status for one (date, shift) slot."""
+        cell = self._cell(d, shift_id)
+        if cell is None:
+            return {}
+        byte, shift = cell >> 2, (cell & 3) << 1
+        statuses = {}
+        for user_id, bits in self._rows.items():
+            code = (bits[byte] >> shift) & 3
+            if code:
+                statuses[user_id] = STATUS_BY_CODE[code]
+        return statuses
+
+    def available(self, d: date, shift_id: int, statuses: Iterable[str] = SCHEDULABLE_STATUSES) -> List[UUID]:
+        """Users whose status for the slot is one of `statuses`."""
+        wanted = set(statuses)
+        return [user_id for user_id, status in self.slot(d, shift_id).items() if status in wanted]
+
+    def codes(self, user_id: UUID) -> bytes:
+        """The user's unpacked row, one code per (day, shift) cell (all UNKNOWN if absent)."""
+        cells = len(self.days) * len(self.shift_ids)
+        bits = self._rows.get(user_id)
+        return unpack_codes(bits, cells) if bits is not None else bytes(cells)
+
+    def __getitem__(self, key: Tuple[UUID, date, int]) -> str:
+        status = self.status(*key)
+        if status is None:
+            raise KeyError(key)
+        return status
+
+    def __iter__(self) -> Iterator[Tuple[UUID, date, int]]:
+        width = len(self.shift_ids)
+        for user_id in self._rows:
+            for cell, code in enumerate(self.codes(user_id)):
+                if code:
+                    yield user_id, self.days[cell // width], self.shift_ids[cell % width]
+
+    def __len__(self) -> int:
+        return self._known
+
+    def __repr__(self) -> str:
+        return (
+            f"AvailabilityMatrix({len(self._rows)} users, {len(self.days)} days, "
+            f"{len(self.shift_ids)} shifts, {self._known} known cells)"
+        )
+
+
+def load_availability_matrix(
+    session: Session, start_date: date, end_date: date, user_ids: Optional[Iterable[UUID]] = None
+) -> AvailabilityMatrix:
+    """Availability of [start_date, end_date] from the month bitmaps, in one query."""
+    days = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+    query = select(
+        AvailabilityBitmap.user_id, AvailabilityBitmap.month, AvailabilityBitmap.shift_ids, AvailabilityBitmap.bits
+    ).where(AvailabilityBitmap.month >= month_start(start_date), AvailabilityBitmap.month <= end_date)
+    if user_ids is not None:
+        query = query.where(AvailabilityBitmap.user_id.in_(list(user_ids)))
+    bitmaps = session.exec(query).all()
+
+    shift_ids = sorted({s_id for _, _, ids, _ in bitmaps for s_id in parse_shift_ids(ids)})
+    shift_index = {s_id: i for i, s_id in enumerate(shift_ids)}
+    width = len(shift_ids)
+    rows: Dict[UUID, bytearray] = {}
+    for user_id, month, ids, bits in bitmaps:
+        month_shifts = parse_shift_ids(ids)
+        month_width = len(month_shifts)
+        codes = unpack_codes(bits, days_in_month(month) * month_width)
+        first = max(start_date, month)
+        last = min(end_date, month.replace(day=days_in_month(month)))
+        row = rows.setdefault(user_id, bytearray(len(days) * width))
+        offset = (first - start_date).days
+        if month_shifts == tuple(shift_ids):
+            # Same columns: the month's days in range are one contiguous slice
+            row[offset * width:(offset + last.day - first.day + 1) * width] = \
+                codes[(first.day - 1) * month_width:last.day * month_width]
+            continue
+        columns = [shift_index[s_id] for s_id in month_shifts]
+        for day in range(first.day, last.day + 1):
+            source = (day - 1) * month_width
+            target = (offset + day - first.day) * width
+            for j, column in enumerate(columns):
+                row[target + column] = codes[source + j]
+    return AvailabilityMatrix(days, shift_ids, rows)
+
+
+def _replace_month(session: Session, month: date, users: Optional[List[UUID]] = None):
+    last_day = month.replace(day=days_in_month(month))
+    in_month = and_(
+        Availability.shift_def_id == ShiftDefinition.id, Availability.date >= month, Availability.date <= last_day
+    )
+    stale = delete(AvailabilityBitmap).where(AvailabilityBitmap.month == month)
+    if users is not None:
+        in_month = and_(in_month, Availability.user_id.in_(users))
+        stale = stale.where(AvailabilityBitmap.user_id.in_(users))
+    # Joined from the shifts, so every shift id comes back and all bitmaps of the month share one layout
+    query = select(ShiftDefinition.id, Availability.user_id, Availability.date, Availability.status).outerjoin(
+        Availability, in_month
+    )
+    shift_ids = set()
+    cells_by_user: Dict[UUID, list] = {}
+    for shift_id, user_id, d, status in session.exec(query).all():
+        shift_ids.add(shift_id)
+        if user_id is not None:
+            cells_by_user.setdefault(user_id, []).append((d, shift_id, status))
+
+    columns = sorted(shift_ids)
+    index = {s_id: i for i, s_id in enumerate(columns)}
+    width = len(columns)
+    stored_ids = ",".join(str(s_id) for s_id in columns)
+    bitmaps = []
+    for user_id, cells in cells_by_user.items():
+        codes = bytearray(last_day.day * width)
+        for d, shift_id, status in cells:
+            codes[(d.day - 1) * width + index[shift_id]] = _status_code(status)
+        bitmaps.append({"user_id": user_id, "month": month, "shift_ids": stored_ids, "bits": pack_codes(codes)})
+
+    session.execute(stale)
+    if bitmaps:
+        session.execute(insert(AvailabilityBitmap), bitmaps)
+
+
+def refresh_bitmaps(session: Session, keys: Iterable[BitmapKey]):
+    """Recompute the bitmaps of `keys` from their Availability rows. The caller commits."""
+    users_by_month: Dict[date, Set[UUID]] = {}
+    for user_id, month in keys:
+        users_by_month.setdefault(month, set()).add(user_id)
+    if not users_by_month:
+        return
+    for month, users in sorted(users_by_month.items()):
+        users = sorted(users, key=str)
+        for i in range(0, len(users), _CHUNK_SIZE):
+            _replace_month(session, month, users[i:i + _CHUNK_SIZE])
+
+
+def rebuild_availability_bitmaps(
+    session: Session, start_date: Optional[date] = None, end_date: Optional[date] = None
+) -> int:
+    """
+    Recompute every bitmap of the months overlapping [start_date, end_date], or of all
+    months when no bounds are given. Returns the number of months. The caller commits.
+    """
+    if start_date is None or end_date is None:
+        first, last = session.exec(select(func.min(Availability.date), func.max(Availability.date))).one()
+        if start_date is None and end_date is None:
+            session.execute(delete(AvailabilityBitmap))
+        start_date = start_date or first
+        end_date = end_date or last
+        if start_date is None or end_date is None:
+            return 0
+
+    month = month_start(start_date)
+    months = 0
+    while month <= end_date:
+        _replace_month(session, month)
+        months += 1
+        month = month.replace(day=days_in_month(month)) + timedelta(days=1)
+    logger.info(f"Rebuilt availability bitmaps for {months} month(s) from {month_start(start_date)}")
+    return months
+
+
+def _touched_keys(session: Session, obj, is_update: bool) -> Set[BitmapKey]:
+    keys = {(obj.user_id, month_start(obj.date))}
+    if is_update:
+        previous = previous_values(session, obj, ("user_id", "date"))
+        keys.add((previous["user_id"], month_start(previous["date"])))
+    return keys
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_on_flush(session, flush_context, instances):
+    keys = session.info.setdefault(_PENDING_KEYS, set())
+    for objects, is_update in ((session.new, False), (session.deleted, False), (session.dirty, True)):
+        for obj in objects:
+            if isinstance(obj, Availability) and (not is_update or session.is_modified(obj)):
+                keys |= _touched_keys(session, obj, is_update)
+
+
+@event.listens_for(Session, "after_flush_postexec")
+def _refresh_on_flush(session, flush_context):
+    keys = session.info.pop(_PENDING_KEYS, None)
+    if keys:
+        with session.no_autoflush:
+            refresh_bitmaps(session, keys)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the packed availability bitmaps.")
+    parser.add_argument("--start", type=date.fromisoformat, help="First day to rebuild (default: earliest row)")
+    parser.add_argument("--end", type=date.fromisoformat, help="Last day to rebuild (default: latest row)")
+    args = parser.parse_args()
+
+    from ..database import engine
+    with Session(engine) as session:
+        months = rebuild_availability_bitmaps(session, args.start, args.end)
+        session.commit()
+    print(f"Rebuilt availability bitmaps for {months} month(s)")
+
+
+if __name__ == "__main__":
+    main()
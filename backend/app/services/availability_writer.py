@@ -0,0 +1,111 @@
+"""
+Bulk upsert of availability cells.
+
+Submitting a month of availability used to look up every (date, shift) cell with
+its own SELECT before inserting or updating it: about 120 round trips per employee,
+with everyone submitting near the deadline. `upsert_availability` writes all cells
+as multi-row `INSERT ... ON CONFLICT (user_id, date, shift_def_id) DO UPDATE`
+statements on PostgreSQL and SQLite, relying on the unique constraint of
+`Availability`. Other dialects get one SELECT of the existing keys, then bulk
+UPDATEs and a single executemany INSERT.
+
+Bulk statements bypass the ORM flush hooks, so the packed bitmaps of the touched
+months are recomputed (see `availability_bitmap`) and the solve cache entries for
+the touched dates are invalidated here. The caller commits.
+"""
+import logging
+from datetime import date
+from typing import Dict, Iterable, List, Tuple
+from uuid import UUID, uuid4
+
+from sqlalchemy import insert, tuple_, update
+from sqlmodel import Session, select
+
+from ..models import Availability, AvailabilityStatus
+from .availability_bitmap import refresh_bitmaps
+from .months import month_start
+from .solver_cache import solve_cache
+
+logger = logging.getLogger(__name__)
+
+# Rows per multi-row INSERT: 5 parameters each stays under SQLite's 999 bound parameter limit
+_CHUNK_SIZE = 150
+
+AvailabilityCell = Tuple[date, int, AvailabilityStatus]  # (date, shift_def_id, status)
+
+_UPSERT_DIALECTS = ("postgresql", "sqlite")
+
+
+def _upsert_statement(dialect: str, rows: List[dict]):
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    statement = dialect_insert(Availability).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=["user_id", "date", "shift_def_id"],
+        set_={"status": statement.excluded.status},
+    )
+
+
+def _portable_upsert(session: Session, user_id: UUID, rows: List[dict]):
+    existing = set()
+    for i in range(0, len(rows), _CHUNK_SIZE):
+        keys = [(row["date"], row["shift_def_id"]) for row in rows[i:i + _CHUNK_SIZE]]
+        existing.update(
+            tuple(key) for key in session.exec(
+                select(Availability.date, Availability.shift_def_id).where(
+                    Availability.user_id == user_id,
+                    tuple_(Availability.date, Availability.shift_def_id).in_(keys),
+                )
+            ).all()
+        )
+
+    updates: Dict[AvailabilityStatus, List[Tuple[date, int]]] = {}
+    new_rows = []
+    for row in rows:
+        key = (row["date"], row["shift_def_id"])
+        if key in existing:
+            updates.setdefault(row["status"], []).append(key)
+        else:
+            new_rows.append(row)
+    for status, keys in updates.items():
+        for i in range(0, len(keys), _CHUNK_SIZE):
+            session.execute(
+                update(Availability)
+                .where(
+                    Availability.user_id == user_id,
+                    tuple_(Availability.date, Availability.shift_def_id).in_(keys[i:i + _CHUNK_SIZE]),
+                )
+                .values(status=status)
+            )
+    if new_rows:
+        session.execute(insert(Availability), new_rows)
+
+
+def upsert_availability(session: Session, user_id: UUID, cells: Iterable[AvailabilityCell]) -> int:
+    """
+    Set the user's status for every (date, shift) cell, inserting missing ones.
+    A cell listed twice keeps its last status. Returns the number of cells written.
+    """
+    statuses: Dict[Tuple[date, int], AvailabilityStatus] = {}
+    for d, shift_def_id, status in cells:
+        statuses[(d, shift_def_id)] = status
+    if not statuses:
+        return 0
+
+    rows = [
+        {"id": uuid4(), "user_id": user_id, "date": d, "shift_def_id": shift_def_id, "status": status}
+        for (d, shift_def_id), status in sorted(statuses.items())
+    ]
+    dialect = session.get_bind().dialect.name
+    if dialect in _UPSERT_DIALECTS:
+        for i in range(0, len(rows), _CHUNK_SIZE):
+            session.execute(_upsert_statement(dialect, rows[i:i + _CHUNK_SIZE]))
+    else:
+        _portable_upsert(session, user_id, rows)
+
+    refresh_bitmaps(session, {(user_id, month_start(row["date"])) for row in rows})
+    solve_cache.invalidate(rows[0]["date"], rows[-1]["date"])
+    logger.info(f"Upserted {len(rows)} availability cells for user {user_id}")
+    return len(rows)
@@ -1,9 +1,13 @@
-from typing import List
+from typing import List, Optional
 from datetime import date
 from uuid import UUID
 from sqlmodel import Session, select
-from ..models import Availability, Schedule, ShiftDefinition, JobRole
+from ..models import Availability, Schedule, ScheduleChange, ScheduleChangeOp
 from ..schemas import AvailabilityUpdate
+from .availability_writer import upsert_availability
+from .schedule_changes import latest_cursor, oldest_cursor
+from .schedule_grid import schedule_grid
+from .scheduler_service import schedule_rows
 import logging
 
 logger = logging.getLogger(__name__)
@@ -21,27 +25,9 @@ class EmployeeService:
         return self.session.exec(statement).all()
 
     def update_availability(self, user_id: UUID, updates: List[AvailabilityUpdate]):
-        for up in updates:
-            existing = self.session.exec(select(Availability).where(
-                Availability.user_id == user_id,
-                Availability.date == up.date,
-                Availability.shift_def_id == up.shift_def_id
-            )).first()
-            
-            if existing:
-                existing.status = up.status
-                self.session.add(existing)
-            else:
-                new_avail = Availability(
-                    user_id=user_id,
-                    date=up.date,
-                    shift_def_id=up.shift_def_id,
-                    status=up.status
-                )
-                self.session.add(new_avail)
-        
+        written = upsert_availability(self.session, user_id, ((up.date, up.shift_def_id, up.status) for up in updates))
         self.session.commit()
-        logger.info(f"Updated availability for user {user_id}: {len(updates)} records changed.")
+        logger.info(f"Updated availability for user {user_id}: {written} records changed.")
 
     def link_google_calendar(self, user_id: UUID, auth_code: str):
         import os
@@ -90,118 +76,70 @@ class EmployeeService:
             raise HTTPException(status_code=500, detail=f"Could not connect to Google OAuth service: {str(e)}")
 
     def get_schedule(self, user_id: UUID, start_date: date, end_date: date) -> List[dict]:
-        statement = select(Schedule).where(
-            Schedule.user_id == user_id,
-            Schedule.date >= start_date,
-            Schedule.date <= end_date,
-            Schedule.is_published == True 
-        )
-        schedules = self.session.exec(statement).all()
-        
-        from ..models import ShiftGiveaway, GiveawayStatus, User
-        giveaways = self.session.exec(
-            select(ShiftGiveaway.schedule_id).where(
-                ShiftGiveaway.status == GiveawayStatus.OPEN
-            )
-        ).all()
-        giveaway_ids = set(str(g) for g in giveaways)
-
-        # Fetch all published schedules in range (for coworker data)
-        all_schedules_in_range = self.session.exec(
-            select(Schedule).where(
-                Schedule.date >= start_date,
-                Schedule.date <= end_date,
-                Schedule.is_published == True
-            )
-        ).all()
-        
-        # Map: (date, shift_def_id) -> List[(user_id, role_id)]
-        shift_workers_map: dict = {}
-        for s in all_schedules_in_range:
-            key = (s.date, s.shift_def_id)
-            if key not in shift_workers_map:
-                shift_workers_map[key] = []
-            if s.user_id != user_id:  # exclude self
-                shift_workers_map[key].append((s.user_id, s.role_id))
-
-        # Fetch all coworker users
-        all_user_ids = set(uid for entries in shift_workers_map.values() for uid, _ in entries)
-        users_map: dict = {}
-        if all_user_ids:
-            users = self.session.exec(select(User).where(User.id.in_(all_user_ids))).all()
-            users_map = {u.id: u.full_name for u in users}
-
-        # Fetch all role names we might need
-        all_role_ids = set(rid for entries in shift_workers_map.values() for _, rid in entries)
-        roles_map: dict = {}
-        if all_role_ids:
-            roles = self.session.exec(select(JobRole).where(JobRole.id.in_(all_role_ids))).all()
-            roles_map = {r.id: r.name for r in roles}
-
-        response = []
-        for s in schedules:
-            shift = self.session.get(ShiftDefinition, s.shift_def_id)
-            
-            coworker_entries = shift_workers_map.get((s.date, s.shift_def_id), [])
-            coworkers = [
-                {
-                    "name": users_map.get(uid, "Unknown"),
-                    "role_name": roles_map.get(rid, "Unknown"),
-                }
-                for uid, rid in coworker_entries
-            ]
-            
-            response.append({
-                "id": s.id,
-                "date": s.date,
-                "shift_name": shift.name if shift else "Unknown",
-                "role_name": self.session.get(JobRole, s.role_id).name if s.role_id else "Unknown",
-                "start_time": shift.start_time.strftime("%H:%M") if shift and shift.start_time else "",
-                "end_time": shift.end_time.strftime("%H:%M") if shift and shift.end_time else "",
-                "is_on_giveaway": str(s.id) in giveaway_ids,
-                "coworkers": coworkers,
-            })
-        return response
+        """The user's published shifts with their coworkers, served from the shared grid cache."""
+        grid = schedule_grid.get(self.session, start_date, end_date)
+        return [
+            {
+                "id": row["id"],
+                "date": row["date"],
+                "shift_name": row["shift_name"],
+                "role_name": row["role_name"],
+                "start_time": row["start_time"].strftime("%H:%M") if row["start_time"] else "",
+                "end_time": row["end_time"].strftime("%H:%M") if row["end_time"] else "",
+                "is_on_giveaway": row["is_on_giveaway"],
+                "coworkers": grid.coworkers(row),
+            }
+            for row in grid.by_user.get(user_id, [])
+        ]
 
     def get_team_schedule(self, start_date: date, end_date: date) -> List[dict]:
-        from ..models import JobRole, ShiftDefinition, User, ShiftGiveaway, GiveawayStatus
-        
-        statement = select(Schedule).where(
-            Schedule.date >= start_date,
-            Schedule.date <= end_date,
-            Schedule.is_published == True 
-        ).order_by(Schedule.date)
-        schedules = self.session.exec(statement).all()
-        
-        giveaways = self.session.exec(
-            select(ShiftGiveaway.schedule_id).where(
-                ShiftGiveaway.status == GiveawayStatus.OPEN
-            )
-        ).all()
-        giveaway_ids = set(str(g) for g in giveaways)
-
-        response = []
-        for s in schedules:
-            shift = self.session.get(ShiftDefinition, s.shift_def_id)
-            user = self.session.get(User, s.user_id)
-            role = self.session.get(JobRole, s.role_id)
-            
-            if not user or not shift:
-                continue
-
-            response.append({
-                "id": s.id,
-                "date": s.date,
-                "shift_def_id": s.shift_def_id,
-                "user_id": s.user_id,
-                "role_id": s.role_id,
-                "is_published": s.is_published,
-                "user_name": user.full_name,
-                "role_name": role.name if role else "Unknown",
-                "shift_name": shift.name,
-                "start_time": shift.start_time,
-                "end_time": shift.end_time,
-                "is_on_giveaway": str(s.id) in giveaway_ids,
-            })
-        return response
+        return list(schedule_grid.get(self.session, start_date, end_date).rows)
+
+    def get_schedule_changes(
+        self, since: Optional[int], start_date: date, end_date: date, user_id: Optional[UUID] = None
+    ) -> dict:
+        """
+        Published assignments in the range changed after cursor `since` (see
+        `schedule_changes`), only `user_id`'s when given. Rows inserted after the cursor
+        are under `inserted`, other changed rows under `updated`, and rows that were
+        deleted, unpublished or handed to someone else under `deleted` (ids only).
+        Without a cursor, or with one older than the retained log, the whole range is
+        returned under `inserted` with `reset` set. `cursor` is the next `since`.
+        """
+        cursor = latest_cursor(self.session)
+        visible = [Schedule.is_published == True]
+        if user_id is not None:
+            visible.append(Schedule.user_id == user_id)
+        oldest = oldest_cursor(self.session)
+        if since is None or since > cursor or (oldest is not None and since < oldest - 1):
+            rows = schedule_rows(self.session, Schedule.date >= start_date, Schedule.date <= end_date, *visible)
+            return {"cursor": cursor, "reset": True, "inserted": rows, "updated": [], "deleted": []}
+
+        query = select(ScheduleChange.schedule_id, ScheduleChange.op).where(
+            ScheduleChange.id > since,
+            ScheduleChange.id <= cursor,
+            ScheduleChange.date >= start_date,
+            ScheduleChange.date <= end_date,
+        )
+        if user_id is not None:
+            query = query.where(ScheduleChange.user_id == user_id)
+        first_op = {}
+        for schedule_id, op in self.session.exec(query.order_by(ScheduleChange.id)).all():
+            first_op.setdefault(schedule_id, op)
+
+        changed_ids = list(first_op)
+        current = {}
+        for i in range(0, len(changed_ids), 500):
+            for row in schedule_rows(self.session, Schedule.id.in_(changed_ids[i:i + 500]), *visible):
+                current[row["id"]] = row
+        feed = {"cursor": cursor, "reset": False, "inserted": [], "updated": [], "deleted": []}
+        for schedule_id, op in first_op.items():
+            row = current.get(schedule_id)
+            if row is None:
+                feed["deleted"].append(schedule_id)
+            elif op == ScheduleChangeOp.INSERT:
+                feed["inserted"].append(row)
+            else:
+                feed["updated"].append(row)
+        return feed
 
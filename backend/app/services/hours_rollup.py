@@ -0,0 +1,201 @@
+"""
+Per-user monthly rollup of planned and worked hours.
+
+The hours views (schedule summary, employee hours, user stats, staffing picker)
+used to fetch every Schedule or Attendance row of a month and sum durations in
+Python. They now read one `HoursRollup` row per user and month.
+
+Rows are never adjusted by deltas. A write marks the (user, month) keys it touches,
+before and after the change, and those keys are recomputed from their source rows
+with grouped queries: Schedule counts per shift weighted by the shift geometry, and
+confirmed Attendance counts per (check-in, check-out) pair. ORM writes are handled
+by flush hooks. Bulk SQL statements bypass them and must call `refresh_hours`
+themselves (see `schedule_writer`). Changing a shift's times rebuilds the months it
+is scheduled in. The migration creating the table backfills it, and
+`python -m app.services.hours_rollup` rebuilds everything on demand.
+"""
+import argparse
+import logging
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import delete, event, func, inspect, insert
+from sqlmodel import Session, select
+
+from ..models import Attendance, AttendanceStatus, HoursRollup, Schedule
+from .months import month_end, month_start
+from .orm_history import previous_values
+from .shift_geometry import ShiftGeometry, load_shift_geometry, minute_span
+
+logger = logging.getLogger(__name__)
+
+# Users per IN (...) list, well below SQLite's bound parameter limit
+_CHUNK_SIZE = 500
+
+RollupKey = Tuple[UUID, date]  # (user_id, first day of the month)
+
+_SCHEDULE_FIELDS = ("user_id", "date", "shift_def_id", "is_published")
+_ATTENDANCE_FIELDS = ("user_id", "date", "check_in", "check_out", "status")
+_PENDING_KEYS = "hours_rollup_keys"
+
+
+def _month_totals(
+    session: Session, geometry: ShiftGeometry, month: date, users: Optional[List[UUID]]
+) -> List[dict]:
+    last_day = month_end(month)
+    schedules = (
+        select(Schedule.user_id, Schedule.shift_def_id, Schedule.is_published, func.count())
+        .where(Schedule.date >= month, Schedule.date <= last_day)
+        .group_by(Schedule.user_id, Schedule.shift_def_id, Schedule.is_published)
+    )
+    attendances = (
+        select(Attendance.user_id, Attendance.check_in, Attendance.check_out, func.count())
+        .where(Attendance.date >= month, Attendance.date <= last_day)
+        .where(Attendance.status == AttendanceStatus.CONFIRMED)
+        .group_by(Attendance.user_id, Attendance.check_in, Attendance.check_out)
+    )
+    if users is not None:
+        schedules = schedules.where(Schedule.user_id.in_(users))
+        attendances = attendances.where(Attendance.user_id.in_(users))
+
+    totals: Dict[UUID, dict] = {}
+
+    def total(user_id: UUID) -> dict:
+        if user_id not in totals:
+            totals[user_id] = {
+                "user_id": user_id, "month": month, "planned_hours": 0.0, "planned_shifts": 0,
+                "published_hours": 0.0, "published_shifts": 0, "worked_hours": 0.0, "worked_shifts": 0,
+            }
+        return totals[user_id]
+
+    for user_id, shift_id, is_published, count in session.exec(schedules).all():
+        if shift_id not in geometry:
+            continue
+        hours = geometry.duration_hours(shift_id) * count
+        row = total(user_id)
+        row["planned_hours"] += hours
+        row["planned_shifts"] += count
+        if is_published:
+            row["published_hours"] += hours
+            row["published_shifts"] += count
+    for user_id, check_in, check_out, count in session.exec(attendances).all():
+        start, end = minute_span(check_in, check_out)
+        row = total(user_id)
+        row["worked_hours"] += (end - start) / 60 * count
+        row["worked_shifts"] += count
+    return list(totals.values())
+
+
+def _replace_month(session: Session, geometry: ShiftGeometry, month: date, users: Optional[List[UUID]] = None):
+    rows = _month_totals(session, geometry, month, users)
+    stale = delete(HoursRollup).where(HoursRollup.month == month)
+    if users is not None:
+        stale = stale.where(HoursRollup.user_id.in_(users))
+    session.execute(stale)
+    if rows:
+        session.execute(insert(HoursRollup), rows)
+
+
+def refresh_hours(session: Session, keys: Iterable[RollupKey]):
+    """Recompute the rollup rows of `keys` from their source rows. The caller commits."""
+    users_by_month: Dict[date, Set[UUID]] = {}
+    for user_id, month in keys:
+        users_by_month.setdefault(month, set()).add(user_id)
+    if not users_by_month:
+        return
+    geometry = load_shift_geometry(session)
+    for month, users in sorted(users_by_month.items()):
+        users = sorted(users, key=str)
+        for i in range(0, len(users), _CHUNK_SIZE):
+            _replace_month(session, geometry, month, users[i:i + _CHUNK_SIZE])
+
+
+def rebuild_hours_rollup(session: Session, start_date: Optional[date] = None, end_date: Optional[date] = None) -> int:
+    """
+    Recompute every rollup row of the months overlapping [start_date, end_date], or of
+    all months when no bounds are given. Returns the number of months. The caller commits.
+    """
+    if start_date is None or end_date is None:
+        first, last = None, None
+        for model in (Schedule, Attendance):
+            low, high = session.exec(select(func.min(model.date), func.max(model.date))).one()
+            if low is not None:
+                first = low if first is None else min(first, low)
+                last = high if last is None else max(last, high)
+        if start_date is None and end_date is None:
+            session.execute(delete(HoursRollup))
+        start_date = start_date or first
+        end_date = end_date or last
+        if start_date is None or end_date is None:
+            return 0
+
+    geometry = load_shift_geometry(session)
+    month = month_start(start_date)
+    months = 0
+    while month <= end_date:
+        _replace_month(session, geometry, month)
+        months += 1
+        month = month_end(month) + timedelta(days=1)
+    logger.info(f"Rebuilt hours rollup for {months} month(s) from {month_start(start_date)}")
+    return months
+
+
+def hours_for_month(session: Session, month: date, user_ids: Optional[Iterable[UUID]] = None) -> Dict[UUID, HoursRollup]:
+    """Rollup rows of one month by user; users without any hours have no row."""
+    query = select(HoursRollup).where(HoursRollup.month == month_start(month))
+    if user_ids is not None:
+        query = query.where(HoursRollup.user_id.in_(list(user_ids)))
+    return {row.user_id: row for row in session.exec(query).all()}
+
+
+def _touched_keys(session: Session, obj, fields, is_update: bool) -> Set[RollupKey]:
+    keys = {(obj.user_id, month_start(obj.date))}
+    if is_update:
+        state = inspect(obj)
+        if not any(state.attrs[name].history.has_changes() for name in fields):
+            return set()
+        previous = previous_values(session, obj, ("user_id", "date"))
+        keys.add((previous["user_id"], month_start(previous["date"])))
+    return keys
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_on_flush(session, flush_context, instances):
+    keys = session.info.setdefault(_PENDING_KEYS, set())
+    for objects, is_update in ((session.new, False), (session.deleted, False), (session.dirty, True)):
+        for obj in objects:
+            if isinstance(obj, Schedule):
+                fields = _SCHEDULE_FIELDS
+            elif isinstance(obj, Attendance):
+                fields = _ATTENDANCE_FIELDS
+            else:
+                continue
+            if is_update and not session.is_modified(obj):
+                continue
+            keys |= _touched_keys(session, obj, fields, is_update)
+
+
+@event.listens_for(Session, "after_flush_postexec")
+def _refresh_on_flush(session, flush_context):
+    keys = session.info.pop(_PENDING_KEYS, None)
+    if keys:
+        with session.no_autoflush:
+            refresh_hours(session, keys)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the per-user monthly hours rollup.")
+    parser.add_argument("--start", type=date.fromisoformat, help="First day to rebuild (default: earliest row)")
+    parser.add_argument("--end", type=date.fromisoformat, help="Last day to rebuild (default: latest row)")
+    args = parser.parse_args()
+
+    from ..database import engine
+    with Session(engine) as session:
+        months = rebuild_hours_rollup(session, args.start, args.end)
+        session.commit()
+    print(f"Rebuilt hours rollup for {months} month(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,8 +7,13 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-from ..models import JobRole, ShiftDefinition, StaffingRequirement, RestaurantConfig, User, UserJobRoleLink, RoleSystem, AttendanceStatus, Schedule, Attendance
+from ..models import JobRole, ShiftDefinition, StaffingRequirement, RestaurantConfig, User, UserJobRoleLink, RoleSystem, AttendanceStatus, Schedule, Attendance, HoursRollup
 from ..schemas import JobRoleCreate, ShiftDefCreate, RequirementCreate, ConfigUpdate, UserUpdate, UserCreate
+from .availability_bitmap import load_availability_matrix
+from .hours_rollup import hours_for_month, rebuild_hours_rollup
+from .months import month_start
+from .shift_geometry import geometry_for, load_shift_geometry
+from sqlalchemy import func
 
 class ManagerService:
     def __init__(self, session: Session):
@@ -132,6 +137,7 @@ class ManagerService:
             raise HTTPException(status_code=400, detail="Shift with these hours already exists")
 
         from ..models import ShiftDefinitionDayLink
+        times_changed = (shift.start_time, shift.end_time) != (s_time, e_time)
         shift.name = shift_in.name
         shift.start_time = s_time
         shift.end_time = e_time
@@ -145,6 +151,13 @@ class ManagerService:
             self.session.add(link)
             
         self.session.add(shift)
+        if times_changed:
+            # Planned hours of every month this shift is scheduled in change with its duration
+            first, last = self.session.exec(
+                select(func.min(Schedule.date), func.max(Schedule.date)).where(Schedule.shift_def_id == shift_id)
+            ).one()
+            if first is not None:
+                rebuild_hours_rollup(self.session, first, last)
         self.session.commit()
         self.session.refresh(shift)
         logger.info(f"Updated shift definition with ID: {shift_id}")
@@ -407,72 +420,26 @@ class ManagerService:
         return result
 
     def get_user_stats(self, user_id: UUID) -> dict:
-        from sqlalchemy import func
-
-        
-        # 1. Total shifts completed (from Attendance)
-        total_shifts = self.session.exec(
-            select(func.count(Attendance.id))
-            .where(Attendance.user_id == user_id)
-            .where(Attendance.status == AttendanceStatus.CONFIRMED)
-        ).one()
-        
-        # 2. Total hours (approximate from Attendance check in/out)
-        # SQLModel doesn't easily support complex time diff sums in all DBs, 
-        # so let's fetch and calc in python for now or use raw SQL.
-        # For simplicity/safety across DBs (sqlite/postgres): fetch all confirmed.
-        attendances = self.session.exec(
-            select(Attendance)
-            .where(Attendance.user_id == user_id)
-            .where(Attendance.status == AttendanceStatus.CONFIRMED)
-        ).all()
-        
-        total_hours = 0.0
-        for att in attendances:
-            start_dt = datetime.combine(att.date, att.check_in)
-            end_dt = datetime.combine(att.date, att.check_out)
-            if end_dt <= start_dt:
-                 end_dt += timedelta(days=1)
-            total_hours += (end_dt - start_dt).total_seconds() / 3600
-            
-        # 3. Monthly breakdown (last 6 months)
-        # We can use Schedule or Attendance. "Number of shifts in previous months" usually implies completed.
-        # Let's use Attendance.
-        
-        today = date.today()
+        # Completed shifts and hours come from confirmed Attendance, rolled up per month
+        rollup = {
+            row.month: row for row in self.session.exec(
+                select(HoursRollup).where(HoursRollup.user_id == user_id)
+            ).all()
+        }
+        total_shifts = sum(row.worked_shifts for row in rollup.values())
+        total_hours = sum(row.worked_hours for row in rollup.values())
+
+        # Monthly breakdown (last 6 months), starting with the current one
         monthly_stats = []
-        for i in range(6):
-            # i=0 is current month, i=1 is previous...
-            # Calculate month start/end
-            month_date = today.replace(day=1) 
-            # Go back i months
-            # Simplified decrement
-            y = month_date.year
-            m = month_date.month - i
-            while m <= 0:
-                m += 12
-                y -= 1
-            
-            start_of_month = date(y, m, 1)
-            # End of month
-            if m == 12:
-                end_of_month = date(y+1, 1, 1) - timedelta(days=1)
-            else:
-                end_of_month = date(y, m+1, 1) - timedelta(days=1)
-                
-            count = self.session.exec(
-                 select(func.count(Attendance.id))
-                .where(Attendance.user_id == user_id)
-                .where(Attendance.status == AttendanceStatus.CONFIRMED)
-                .where(Attendance.date >= start_of_month)
-                .where(Attendance.date <= end_of_month)
-            ).one()
-            
+        month = month_start(date.today())
+        for _ in range(6):
+            row = rollup.get(month)
             monthly_stats.append({
-                "month": start_of_month.strftime("%Y-%m"),
-                "count": count
+                "month": month.strftime("%Y-%m"),
+                "count": row.worked_shifts if row else 0
             })
-            
+            month = month_start(month - timedelta(days=1))
+
         return {
             "total_shifts_completed": total_shifts,
             "total_hours_worked": round(total_hours, 1),
@@ -606,11 +573,22 @@ class ManagerService:
 
     # --- Shift Giveaway ---
     def get_open_giveaways(self) -> List[dict]:
-        from ..models import ShiftGiveaway, GiveawayStatus, Availability
+        from ..models import ShiftGiveaway, GiveawayStatus
         
         giveaways = self.session.exec(
             select(ShiftGiveaway).where(ShiftGiveaway.status == GiveawayStatus.OPEN)
         ).all()
+        # Names, times and geometry of every shift from one column-only query
+        shifts = {
+            s.id: s for s in self.session.exec(
+                select(ShiftDefinition.id, ShiftDefinition.name, ShiftDefinition.start_time, ShiftDefinition.end_time)
+            ).all()
+        }
+        geometry = geometry_for(shifts.values())
+        
+        # Availability of every offered slot, read from the packed month bitmaps at once
+        dates = [g.schedule.date for g in giveaways if g.schedule]
+        matrix = load_availability_matrix(self.session, min(dates), max(dates)) if dates else None
         
         result = []
         for g in giveaways:
@@ -618,7 +596,7 @@ class ManagerService:
             if not schedule:
                 continue
             
-            shift = self.session.get(ShiftDefinition, schedule.shift_def_id)
+            shift = shifts.get(schedule.shift_def_id)
             role = self.session.get(JobRole, schedule.role_id)
             offerer = self.session.get(User, g.offered_by)
             
@@ -636,15 +614,6 @@ class ManagerService:
                 if schedule.role_id not in [r.id for r in u.job_roles]:
                     continue
                 
-                # Check availability for the date AND shift ID
-                avail = self.session.exec(
-                    select(Availability).where(
-                        Availability.user_id == u.id,
-                        Availability.date == schedule.date,
-                        Availability.shift_def_id == schedule.shift_def_id
-                    )
-                ).first()
-                
                 # Check other schedules on that date for conflicts
                 other_schedules = self.session.exec(
                     select(Schedule).where(
@@ -653,42 +622,16 @@ class ManagerService:
                     )
                 ).all()
                 
-                avail_status = avail.status if avail else "UNKNOWN"
+                # Availability for the date AND shift ID
+                avail_status = matrix.status(u.id, schedule.date, schedule.shift_def_id) or "UNKNOWN"
                 
-                if other_schedules:
-                    has_conflict = False
-                    start1 = datetime.combine(schedule.date, shift.start_time)
-                    end1 = datetime.combine(schedule.date, shift.end_time)
-                    if end1 <= start1: end1 += timedelta(days=1)
-                    
-                    for osch in other_schedules:
-                        if osch.shift_def_id == schedule.shift_def_id:
-                            has_conflict = True
-                            break
-                            
-                        oshift = self.session.get(ShiftDefinition, osch.shift_def_id)
-                        if not oshift:
-                            continue
-                            
-                        start2 = datetime.combine(schedule.date, oshift.start_time)
-                        end2 = datetime.combine(schedule.date, oshift.end_time)
-                        if end2 <= start2: end2 += timedelta(days=1)
-                        
-                        overlap_start = max(start1, start2)
-                        overlap_end = min(end1, end2)
-                        
-                        if overlap_start < overlap_end:
-                            overlap_duration = (overlap_end - overlap_start).total_seconds() / 60.0
-                            is_enveloped = False
-                            if (start1 <= start2 and end1 >= end2) or (start2 <= start1 and end2 >= end1):
-                                is_enveloped = True
-                            
-                            if overlap_duration > 30 or is_enveloped:
-                                has_conflict = True
-                                break
-                    
-                    if has_conflict:
-                        avail_status = "ALREADY_SCHEDULED"
+                has_conflict = any(
+                    osch.shift_def_id == schedule.shift_def_id
+                    or geometry.conflict(schedule.shift_def_id, osch.shift_def_id)
+                    for osch in other_schedules
+                )
+                if has_conflict:
+                    avail_status = "ALREADY_SCHEDULED"
                 
                 suggestions.append({
                     "user_id": u.id,
@@ -748,38 +691,15 @@ class ManagerService:
         }
 
     def get_available_employees_for_shift(self, date_in: date, shift_def_id: int) -> List[dict]:
-        from ..models import Availability, Schedule, ShiftDefinition, JobRole
-        from calendar import monthrange
-        from datetime import datetime, timedelta
-        
-        # Calculate hours_this_month
-        first_day = date(date_in.year, date_in.month, 1)
-        last_day = date(date_in.year, date_in.month, monthrange(date_in.year, date_in.month)[1])
-        
-        schedules = self.session.exec(
-            select(Schedule).where(
-                Schedule.date >= first_day,
-                Schedule.date <= last_day
-            )
-        ).all()
+        from ..models import Schedule
         
-        all_shifts = self.session.exec(select(ShiftDefinition)).all()
-        shift_map = {s.id: s for s in all_shifts}
+        # Planned hours this month, one rollup row per employee
+        hours_by_user = {
+            str(uid): row.planned_hours for uid, row in hours_for_month(self.session, date_in).items()
+        }
         
-        hours_by_user = {}
-        for schedule in schedules:
-            uid = str(schedule.user_id)
-            shift = shift_map.get(schedule.shift_def_id)
-            if not shift:
-                continue
-            
-            start_dt = datetime.combine(date.today(), shift.start_time)
-            end_dt = datetime.combine(date.today(), shift.end_time)
-            if end_dt <= start_dt:
-                end_dt += timedelta(days=1)
-            duration_hours = (end_dt - start_dt).total_seconds() / 3600
-            
-            hours_by_user[uid] = hours_by_user.get(uid, 0.0) + duration_hours
+        geometry = load_shift_geometry(self.session)
+        matrix = load_availability_matrix(self.session, date_in, date_in)
 
         # Get employees
         employees = self.session.exec(
@@ -790,14 +710,6 @@ class ManagerService:
         
         result = []
         for u in employees:
-            avail = self.session.exec(
-                select(Availability).where(
-                    Availability.user_id == u.id,
-                    Availability.date == date_in,
-                    Availability.shift_def_id == shift_def_id
-                )
-            ).first()
-            
             already_scheduled_this = self.session.exec(
                 select(Schedule).where(
                     Schedule.user_id == u.id,
@@ -814,41 +726,12 @@ class ManagerService:
                 )
             ).all()
             
-            status = avail.status.value if avail else "UNKNOWN"
+            status = matrix.status(u.id, date_in, shift_def_id) or "UNKNOWN"
             
             if already_scheduled_this:
                 status = "ALREADY_SCHEDULED_THIS"
-            elif other_schedules:
-                target_shift = shift_map.get(shift_def_id)
-                has_conflict = False
-                if target_shift:
-                    start1 = datetime.combine(date_in, target_shift.start_time)
-                    end1 = datetime.combine(date_in, target_shift.end_time)
-                    if end1 <= start1: end1 += timedelta(days=1)
-                    
-                    for osch in other_schedules:
-                        oshift = shift_map.get(osch.shift_def_id)
-                        if not oshift: continue
-                        
-                        start2 = datetime.combine(date_in, oshift.start_time)
-                        end2 = datetime.combine(date_in, oshift.end_time)
-                        if end2 <= start2: end2 += timedelta(days=1)
-                        
-                        overlap_start = max(start1, start2)
-                        overlap_end = min(end1, end2)
-                        
-                        if overlap_start < overlap_end:
-                            overlap_duration = (overlap_end - overlap_start).total_seconds() / 60.0
-                            is_enveloped = False
-                            if (start1 <= start2 and end1 >= end2) or (start2 <= start1 and end2 >= end1):
-                                is_enveloped = True
-                            
-                            if overlap_duration > 30 or is_enveloped:
-                                has_conflict = True
-                                break
-                
-                if has_conflict:
-                    status = "ALREADY_SCHEDULED_OTHER"
+            elif any(geometry.conflict(shift_def_id, osch.shift_def_id) for osch in other_schedules):
+                status = "ALREADY_SCHEDULED_OTHER"
                 
             roles_list = []
             for r in u.job_roles:
@@ -906,9 +789,8 @@ class ManagerService:
         return result
 
     def process_leave_request(self, request_id: UUID, approved: bool, manager_id: UUID, background_tasks=None):
-        from sqlmodel import select
-        from ..models import LeaveRequest, LeaveStatus, Availability, AvailabilityStatus, ShiftDefinition
-        from datetime import datetime, timedelta
+        from ..models import LeaveRequest, LeaveStatus
+        from datetime import datetime
         
         req = self.session.get(LeaveRequest, request_id)
         if not req:
@@ -925,33 +807,14 @@ class ManagerService:
         logger.info(f"Leave request {request_id} processed by {manager_id}. Approved: {approved}")
         
         if approved:
-            # Auto-Set Availability on Approval
-            shifts = self.session.exec(select(ShiftDefinition)).all()
-            
-            curr_date = req.start_date
-            while curr_date <= req.end_date:
-                for shift in shifts:
-                    avail = self.session.exec(
-                        select(Availability).where(
-                            Availability.user_id == req.user_id,
-                            Availability.date == curr_date,
-                            Availability.shift_def_id == shift.id
-                        )
-                    ).first()
-                    
-                    if avail:
-                        avail.status = AvailabilityStatus.UNAVAILABLE
-                        self.session.add(avail)
-                    else:
-                        new_avail = Availability(
-                            user_id=req.user_id,
-                            date=curr_date,
-                            shift_def_id=shift.id,
-                            status=AvailabilityStatus.UNAVAILABLE
-                        )
-                        self.session.add(new_avail)
-                curr_date += timedelta(days=1)
-                
+            # Mark the leave UNAVAILABLE and drop its assignments; behind the endpoint
+            # this runs after the response is sent, once the approval is committed
+            from .leave_writer import apply_leave, run_leave_job
+            if background_tasks:
+                background_tasks.add_task(run_leave_job, req.id, self.session.get_bind())
+            else:
+                apply_leave(self.session, req.user_id, req.start_date, req.end_date)
+
         # Notify the employee
         from ..models import Notification
         status_text = "zaakceptowany" if approved else "odrzucony"
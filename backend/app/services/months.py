@@ -0,0 +1,12 @@
+"""
+Calendar month bounds shared by the derived tables, the solve cache and the writers.
+"""
+from datetime import date, timedelta
+
+
+def month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def month_end(d: date) -> date:
+    return (d.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
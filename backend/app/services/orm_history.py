@@ -0,0 +1,37 @@
+"""
+Committed values of modified ORM attributes, for flush hooks.
+
+Attribute history only knows the previous value when it was loaded before the
+attribute was set. After a commit every attribute is expired, so reassigning one
+(`schedule.user_id = other` on an object from an earlier transaction) records the new
+value with an empty `history.deleted`. `previous_values` fills those gaps with one
+column select of the row, which still holds the committed values before the flush.
+"""
+from typing import Any, Dict, Iterable
+
+from sqlalchemy import inspect
+from sqlmodel import Session, select
+
+
+def previous_values(session: Session, obj, names: Iterable[str]) -> Dict[str, Any]:
+    """Values of `names` as last loaded or committed, for a persistent object about to be flushed."""
+    state = inspect(obj)
+    values: Dict[str, Any] = {}
+    missing = []
+    for name in names:
+        history = state.attrs[name].history
+        if history.deleted:
+            values[name] = history.deleted[0]
+        elif history.added:
+            # Set while expired: the old value was never loaded
+            missing.append(name)
+        else:
+            values[name] = getattr(obj, name)
+    if missing:
+        model = type(obj)
+        with session.no_autoflush:
+            row = session.exec(
+                select(*(getattr(model, name) for name in missing)).where(model.id == obj.id)
+            ).one()
+        values.update(zip(missing, row if len(missing) > 1 else (row,)))
+    return values
@@ -0,0 +1,92 @@
+"""
+Schedule change log backing the delta-sync feed of the employee apps.
+
+Every write to a `Schedule` row appends a `ScheduleChange` (INSERT, UPDATE or
+DELETE with the row's owner and date). The log id is a monotonically increasing
+cursor: a client that synced up to cursor N only needs the rows changed after N.
+
+ORM writes (manual assignments, publishing, giveaway claims and reassignments) are
+logged by a `before_flush` hook, so the entries commit together with the change.
+Bulk SQL statements bypass it and must call `record_changes` themselves (see
+`schedule_writer`). A change of owner is logged as a DELETE for the previous owner
+and an INSERT for the new one, so per-user feeds drop and gain the row. Opening or
+closing a giveaway changes the row's `is_on_giveaway` flag and logs an UPDATE.
+"""
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import delete, event, func, inspect, insert
+from sqlmodel import Session, select
+
+from ..models import Schedule, ScheduleChange, ScheduleChangeOp, ShiftGiveaway
+from .orm_history import previous_values
+
+# Entries older than this are pruned; clients with an older cursor get a full resync
+SCHEDULE_CHANGE_RETENTION_DAYS = 60
+
+ChangeEntry = Tuple[UUID, UUID, date, ScheduleChangeOp]  # (schedule_id, user_id, date, op)
+
+
+def record_changes(session: Session, changes: Iterable[ChangeEntry]):
+    """Append log entries with one executemany INSERT."""
+    now = datetime.utcnow()
+    rows = [
+        {"schedule_id": schedule_id, "user_id": user_id, "date": d, "op": op, "changed_at": now}
+        for schedule_id, user_id, d, op in changes
+    ]
+    if rows:
+        session.execute(insert(ScheduleChange), rows)
+
+
+def latest_cursor(session: Session) -> int:
+    return session.exec(select(func.max(ScheduleChange.id))).one() or 0
+
+
+def oldest_cursor(session: Session) -> Optional[int]:
+    return session.exec(select(func.min(ScheduleChange.id))).one()
+
+
+def prune_changes(session: Session, retention_days: int = SCHEDULE_CHANGE_RETENTION_DAYS):
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    session.execute(delete(ScheduleChange).where(ScheduleChange.changed_at < cutoff))
+
+
+def _orm_changes(session: Session) -> List[ChangeEntry]:
+    changes: List[ChangeEntry] = []
+    giveaway_schedules = set()
+    for obj in session.new:
+        if isinstance(obj, Schedule):
+            changes.append((obj.id, obj.user_id, obj.date, ScheduleChangeOp.INSERT))
+        elif isinstance(obj, ShiftGiveaway):
+            giveaway_schedules.add(obj.schedule_id)
+    for obj in session.deleted:
+        if isinstance(obj, Schedule):
+            changes.append((obj.id, obj.user_id, obj.date, ScheduleChangeOp.DELETE))
+        elif isinstance(obj, ShiftGiveaway):
+            giveaway_schedules.add(obj.schedule_id)
+    for obj in session.dirty:
+        if isinstance(obj, Schedule) and session.is_modified(obj):
+            previous = previous_values(session, obj, ("user_id", "date"))
+            if previous["user_id"] != obj.user_id:
+                changes.append((obj.id, previous["user_id"], previous["date"], ScheduleChangeOp.DELETE))
+                changes.append((obj.id, obj.user_id, obj.date, ScheduleChangeOp.INSERT))
+            else:
+                changes.append((obj.id, obj.user_id, obj.date, ScheduleChangeOp.UPDATE))
+        elif isinstance(obj, ShiftGiveaway) and inspect(obj).attrs.status.history.has_changes():
+            giveaway_schedules.add(obj.schedule_id)
+
+    giveaway_schedules -= {schedule_id for schedule_id, _, _, _ in changes}
+    if giveaway_schedules:
+        with session.no_autoflush:
+            rows = session.exec(
+                select(Schedule.id, Schedule.user_id, Schedule.date).where(Schedule.id.in_(giveaway_schedules))
+            ).all()
+        changes.extend((schedule_id, user_id, d, ScheduleChangeOp.UPDATE) for schedule_id, user_id, d in rows)
+    return changes
+
+
+@event.listens_for(Session, "before_flush")
+def _log_on_flush(session, flush_context, instances):
+    for schedule_id, user_id, d, op in _orm_changes(session):
+        session.add(ScheduleChange(schedule_id=schedule_id, user_id=user_id, date=d, op=op))
@@ -0,0 +1,92 @@
+"""
+Shared read-through cache of the published schedule grid.
+
+When staff open the app at shift change, every employee asks for the same week.
+Each request used to scan all published rows of the range just to find their
+coworkers. `schedule_grid.get` loads a range once, with one joined query (see
+`schedule_rows`), and indexes it by user and by (date, shift). Every employee's
+view of that range is then served from memory.
+
+Entries are versioned by the schedule change log cursor (see `schedule_changes`).
+Publishing, saving, assignments and giveaway writes all append to the log, so one
+indexed MAX query per request tells whether a cached grid is still current, across
+API worker processes too. Names of users, roles and shifts are not in the log; the
+TTL bounds how long a rename takes to show.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, List, Tuple
+from uuid import UUID
+
+from sqlmodel import Session
+
+from ..models import Schedule
+from .schedule_changes import latest_cursor
+from .scheduler_service import schedule_rows
+
+SCHEDULE_GRID_CACHE_SIZE = int(os.getenv("SCHEDULE_GRID_CACHE_SIZE", "64"))
+SCHEDULE_GRID_CACHE_TTL_SECONDS = int(os.getenv("SCHEDULE_GRID_CACHE_TTL_SECONDS", "60"))
+
+
+class PublishedGrid:
+    """The published rows of a range, indexed by user and by (date, shift)."""
+
+    def __init__(self, rows: List[Dict[str, Any]]):
+        self.rows = rows
+        self.by_user: Dict[UUID, List[Dict[str, Any]]] = {}
+        self.crews: Dict[Tuple[date, int], List[Dict[str, Any]]] = {}
+        for row in rows:
+            self.by_user.setdefault(row["user_id"], []).append(row)
+            self.crews.setdefault((row["date"], row["shift_def_id"]), []).append(row)
+
+    def coworkers(self, row: Dict[str, Any]) -> List[Dict[str, str]]:
+        """Everyone else working the same shift on the same day."""
+        return [
+            {"name": other["user_name"], "role_name": other["role_name"]}
+            for other in self.crews.get((row["date"], row["shift_def_id"]), [])
+            if other["user_id"] != row["user_id"]
+        ]
+
+
+class ScheduleGridCache:
+    """LRU of published grids per (start, end) range, each valid for one log cursor."""
+
+    def __init__(self, max_entries: int = SCHEDULE_GRID_CACHE_SIZE, ttl_seconds: float = SCHEDULE_GRID_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[date, date], Tuple[int, float, PublishedGrid]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session: Session, start_date: date, end_date: date) -> PublishedGrid:
+        key = (start_date, end_date)
+        # Read before loading: a write landing in between leaves an entry that is already outdated
+        cursor = latest_cursor(session)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == cursor and time.monotonic() - entry[1] <= self.ttl_seconds:
+                self._entries.move_to_end(key)
+                return entry[2]
+
+        grid = PublishedGrid(schedule_rows(
+            session, Schedule.date >= start_date, Schedule.date <= end_date, Schedule.is_published == True
+        ))
+        if self.max_entries > 0:
+            with self._lock:
+                self._entries[key] = (cursor, time.monotonic(), grid)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return grid
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+schedule_grid = ScheduleGridCache()
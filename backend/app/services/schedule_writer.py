@@ -0,0 +1,182 @@
+"""
+Diff-based persistence of a schedule range.
+
+Saving a generated or hand-edited schedule used to delete every row in the range
+and insert the new ones one ORM object at a time. `save_schedule_range` instead
+diffs the incoming assignments against the saved rows (one column-only query) and
+writes only the difference as bulk statements:
+
+- rows no longer assigned are deleted (their attendance links are cleared and the
+  giveaways offering them dropped first, both in bulk),
+- rows whose `is_published` flag changes get one UPDATE per flag value,
+- new assignments are inserted with a single executemany INSERT.
+
+Unchanged rows keep their id, so attendance check-ins and giveaways referring to
+them survive a re-save. Every written row is appended to the schedule change log
+(see `schedule_changes`) in the same bulk fashion, and the hours rollup of the
+touched users and months is recomputed (see `hours_rollup`). `remove_assignments`
+clears one user's rows from a range the same way, e.g. for an approved leave, but
+leaves rows that have a giveaway to the manager. The caller commits.
+"""
+import logging
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID, uuid4
+
+from sqlalchemy import delete, insert, update
+from sqlmodel import Session, select
+
+from ..models import Attendance, Schedule, ScheduleChangeOp, ShiftGiveaway
+from .hours_rollup import refresh_hours
+from .months import month_end, month_start
+from .schedule_changes import record_changes
+from .solver_cache import solve_cache
+
+logger = logging.getLogger(__name__)
+
+# Ids per IN (...) list, well below SQLite's bound parameter limit
+_CHUNK_SIZE = 500
+
+AssignmentKey = Tuple[UUID, date, int, int]  # (user_id, date, shift_def_id, role_id)
+
+
+@dataclass
+class ScheduleDiff:
+    inserted: int = 0
+    deleted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    # Row id of every assignment in the range after the save
+    ids: Dict[AssignmentKey, UUID] = field(default_factory=dict)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.inserted or self.deleted or self.updated)
+
+
+def _chunks(ids: List[UUID]) -> Iterable[List[UUID]]:
+    for i in range(0, len(ids), _CHUNK_SIZE):
+        yield ids[i:i + _CHUNK_SIZE]
+
+
+def _delete_rows(session: Session, schedule_ids: List[UUID]):
+    for ids in _chunks(schedule_ids):
+        session.execute(update(Attendance).where(Attendance.schedule_id.in_(ids)).values(schedule_id=None))
+        session.execute(delete(ShiftGiveaway).where(ShiftGiveaway.schedule_id.in_(ids)))
+        session.execute(delete(Schedule).where(Schedule.id.in_(ids)))
+
+
+def save_schedule_range(
+    session: Session,
+    start_date: date,
+    end_date: date,
+    assignments: Iterable[AssignmentKey],
+    published: Optional[bool] = None,
+) -> ScheduleDiff:
+    """
+    Make the saved schedule for [start_date, end_date] equal to `assignments`.
+
+    `published` sets `is_published` on every row of the range; with None, kept rows
+    keep their flag and new rows are saved unpublished.
+    """
+    wanted = set(assignments)
+    saved = session.exec(
+        select(
+            Schedule.id, Schedule.user_id, Schedule.date, Schedule.shift_def_id, Schedule.role_id,
+            Schedule.is_published,
+        ).where(Schedule.date >= start_date, Schedule.date <= end_date)
+    ).all()
+
+    diff = ScheduleDiff()
+    kept = set()
+    to_delete: List[UUID] = []
+    to_flip: List[UUID] = []
+    changes = []
+    for s_id, user_id, d, shift_def_id, role_id, is_published in saved:
+        key = (user_id, d, shift_def_id, role_id)
+        if key not in wanted or key in kept:
+            # Unassigned, or a duplicate of a row already kept
+            to_delete.append(s_id)
+            changes.append((s_id, user_id, d, ScheduleChangeOp.DELETE))
+        else:
+            kept.add(key)
+            diff.ids[key] = s_id
+            if published is not None and is_published != published:
+                to_flip.append(s_id)
+                changes.append((s_id, user_id, d, ScheduleChangeOp.UPDATE))
+            else:
+                diff.unchanged += 1
+
+    _delete_rows(session, to_delete)
+    for ids in _chunks(to_flip):
+        session.execute(update(Schedule).where(Schedule.id.in_(ids)).values(is_published=published))
+
+    new_rows = [
+        {
+            "id": uuid4(), "user_id": user_id, "date": d, "shift_def_id": shift_def_id, "role_id": role_id,
+            "is_published": bool(published),
+        }
+        for user_id, d, shift_def_id, role_id in sorted(wanted - kept, key=lambda k: (k[1], k[2], k[3], str(k[0])))
+    ]
+    if new_rows:
+        session.execute(insert(Schedule), new_rows)
+        for row in new_rows:
+            diff.ids[(row["user_id"], row["date"], row["shift_def_id"], row["role_id"])] = row["id"]
+            changes.append((row["id"], row["user_id"], row["date"], ScheduleChangeOp.INSERT))
+    record_changes(session, changes)
+    refresh_hours(session, {(user_id, month_start(d)) for _, user_id, d, _ in changes})
+
+    diff.inserted, diff.deleted, diff.updated = len(new_rows), len(to_delete), len(to_flip)
+    if diff.changed:
+        # Bulk statements bypass the ORM flush hook that keeps the solve cache fresh
+        solve_cache.invalidate(start_date, month_end(end_date))
+    logger.info(
+        f"Saved schedule {start_date}..{end_date}: {diff.inserted} inserted, {diff.deleted} deleted, "
+        f"{diff.updated} updated, {diff.unchanged} unchanged"
+    )
+    return diff
+
+
+@dataclass
+class AssignmentRemoval:
+    # (schedule_id, date, shift_def_id, is_published) of every deleted row
+    removed: List[Tuple[UUID, date, int, bool]] = field(default_factory=list)
+    # Rows left in place because a giveaway refers to them; the manager resolves those
+    on_giveaway: List[Tuple[UUID, date, int]] = field(default_factory=list)
+
+    @property
+    def removed_published(self) -> List[Tuple[UUID, date, int, bool]]:
+        return [row for row in self.removed if row[3]]
+
+
+def remove_assignments(session: Session, user_id: UUID, start_date: date, end_date: date) -> AssignmentRemoval:
+    """
+    Delete the user's rows in [start_date, end_date], published or not, with the same
+    bulk statements and bookkeeping as a save. Rows with a giveaway (open, or taken by
+    this user) are kept so the giveaway is not lost; they are listed in the result.
+    """
+    has_giveaway = select(ShiftGiveaway.id).where(ShiftGiveaway.schedule_id == Schedule.id).exists()
+    rows = session.exec(
+        select(Schedule.id, Schedule.date, Schedule.shift_def_id, Schedule.is_published, has_giveaway).where(
+            Schedule.user_id == user_id, Schedule.date >= start_date, Schedule.date <= end_date
+        )
+    ).all()
+    result = AssignmentRemoval()
+    for s_id, d, shift_def_id, is_published, on_giveaway in rows:
+        if on_giveaway:
+            result.on_giveaway.append((s_id, d, shift_def_id))
+        else:
+            result.removed.append((s_id, d, shift_def_id, bool(is_published)))
+    if not result.removed:
+        return result
+
+    _delete_rows(session, [s_id for s_id, _, _, _ in result.removed])
+    record_changes(session, [(s_id, user_id, d, ScheduleChangeOp.DELETE) for s_id, d, _, _ in result.removed])
+    refresh_hours(session, {(user_id, month_start(d)) for _, d, _, _ in result.removed})
+    solve_cache.invalidate(start_date, month_end(end_date))
+    logger.info(
+        f"Removed {len(result.removed)} assignment(s) of user {user_id} from {start_date} to {end_date}, "
+        f"{len(result.removed_published)} published; kept {len(result.on_giveaway)} on giveaway"
+    )
+    return result
@@ -1,93 +1,91 @@
 from datetime import date
 from typing import List, Dict, Any
 from uuid import UUID
+from sqlalchemy import exists
 from sqlmodel import Session, select
-from ..models import Schedule, User, JobRole, ShiftDefinition
+from ..models import Schedule, User, JobRole, ShiftDefinition, ShiftGiveaway, GiveawayStatus
 from ..schemas import BatchSaveRequest, ScheduleResponse
+from .schedule_changes import prune_changes
+from .schedule_writer import save_schedule_range
+import hashlib
+import json
 import logging
 
 logger = logging.getLogger(__name__)
 
+def schedule_list_etag(schedules: List[Dict[str, Any]]) -> str:
+    """Version stamp of a listed range: changes exactly when any listed field does."""
+    payload = json.dumps(schedules, default=str, sort_keys=True).encode()
+    return f'"{hashlib.sha256(payload).hexdigest()[:32]}"'
+
+
+def schedule_rows(session: Session, *criteria) -> List[Dict[str, Any]]:
+    """
+    Schedule rows matching `criteria` with user, role and shift names, as one joined
+    projection query. Ordered by date, shift, role and id, so equal contents serialise
+    identically.
+    """
+    on_giveaway = exists().where(
+        ShiftGiveaway.schedule_id == Schedule.id,
+        ShiftGiveaway.status == GiveawayStatus.OPEN
+    )
+    rows = session.exec(
+        select(
+            Schedule.id, Schedule.date, Schedule.shift_def_id, Schedule.user_id, Schedule.role_id,
+            Schedule.is_published, User.full_name, JobRole.name, ShiftDefinition.name,
+            ShiftDefinition.start_time, ShiftDefinition.end_time, on_giveaway.label("is_on_giveaway"),
+        )
+        .join(User, User.id == Schedule.user_id, isouter=True)
+        .join(JobRole, JobRole.id == Schedule.role_id, isouter=True)
+        .join(ShiftDefinition, ShiftDefinition.id == Schedule.shift_def_id, isouter=True)
+        .where(*criteria)
+        .order_by(Schedule.date, Schedule.shift_def_id, Schedule.role_id, Schedule.id)
+    ).all()
+
+    return [
+        {
+            "id": s_id,
+            "date": d,
+            "shift_def_id": shift_def_id,
+            "user_id": user_id,
+            "role_id": role_id,
+            "is_published": is_published,
+            "user_name": user_name if user_name is not None else "Unknown",
+            "role_name": role_name if role_name is not None else "?",
+            "shift_name": shift_name if shift_name is not None else "?",
+            "start_time": start_time,
+            "end_time": end_time,
+            "is_on_giveaway": bool(is_on_giveaway),
+        }
+        for (
+            s_id, d, shift_def_id, user_id, role_id, is_published, user_name, role_name, shift_name,
+            start_time, end_time, is_on_giveaway,
+        ) in rows
+    ]
+
+
 class SchedulerService:
     def __init__(self, session: Session):
         self.session = session
 
     def save_batch(self, batch: BatchSaveRequest) -> int:
-        # 1. Clear existing in range
-        statements = select(Schedule).where(
-            Schedule.date >= batch.start_date, 
-            Schedule.date <= batch.end_date
+        # Published immediately: visible to employees after save
+        diff = save_schedule_range(
+            self.session,
+            batch.start_date,
+            batch.end_date,
+            ((item.user_id, item.date, item.shift_def_id, item.role_id) for item in batch.items),
+            published=True,
         )
-        existing = self.session.exec(statements).all()
-        
-        # Handle linked Attendance records (set schedule_id to None) to avoid FK violation
-        existing_ids = [e.id for e in existing]
-        if existing_ids:
-            from ..models import Attendance
-            linked_attendances = self.session.exec(
-                select(Attendance).where(Attendance.schedule_id.in_(existing_ids))
-            ).all()
-            for att in linked_attendances:
-                att.schedule_id = None
-                self.session.add(att)
-            self.session.commit() # Commit updates to Attendance first
-            
-        for e in existing:
-            self.session.delete(e)
-        
-        # 2. Add new items
-        count = 0
-        for item in batch.items:
-            new_sched = Schedule(
-                date=item.date,
-                shift_def_id=item.shift_def_id,
-                user_id=item.user_id,
-                role_id=item.role_id,
-                is_published=True  # Visible to employees immediately after save
-            )
-            self.session.add(new_sched)
-            count += 1
-        
         self.session.commit()
-        logger.info(f"Saved batch schedule from {batch.start_date} to {batch.end_date}. Created {count} records.")
-        return count
-
-    def get_schedule_list(self, start_date: date, end_date: date) -> List[Dict[str, Any]]:
-        query = select(Schedule).where(
-            Schedule.date >= start_date,
-            Schedule.date <= end_date
+        logger.info(
+            f"Saved batch schedule from {batch.start_date} to {batch.end_date}. "
+            f"{diff.inserted} created, {diff.deleted} removed, {diff.updated} published."
         )
-        schedules = self.session.exec(query).all()
-        
-        response = []
-        # Optimization: fetch all roles/shifts/users once if needed, but for weekly scale this is fine
-        
-        # Fetch active giveaways to mark them
-        from ..models import ShiftGiveaway, GiveawayStatus
-        giveaways = self.session.exec(
-            select(ShiftGiveaway.schedule_id).where(
-                ShiftGiveaway.status == GiveawayStatus.OPEN
-            )
-        ).all()
-        giveaway_ids = set(str(g) for g in giveaways)
+        return len(diff.ids)
 
-        for s in schedules:
-            shift = self.session.get(ShiftDefinition, s.shift_def_id)
-            response.append({
-                "id": s.id,
-                "date": s.date,
-                "shift_def_id": s.shift_def_id,
-                "user_id": s.user_id,
-                "role_id": s.role_id,
-                "is_published": s.is_published,
-                "user_name": s.user.full_name if s.user else "Unknown",
-                "role_name": self.session.get(JobRole, s.role_id).name if s.role_id else "?",
-                "shift_name": shift.name if shift else "?",
-                "start_time": shift.start_time if shift else None,
-                "end_time": shift.end_time if shift else None,
-                "is_on_giveaway": str(s.id) in giveaway_ids
-            })
-        return response
+    def get_schedule_list(self, start_date: date, end_date: date) -> List[Dict[str, Any]]:
+        return schedule_rows(self.session, Schedule.date >= start_date, Schedule.date <= end_date)
 
     def publish_schedule(self, start_date: date, end_date: date, background_tasks=None) -> int:
         from ..models import Notification
@@ -129,6 +127,8 @@ class SchedulerService:
                 if tokens:
                     background_tasks.add_task(send_push_to_tokens, tokens, title, body)
             
+        # Publishing is periodic, so it also keeps the change log bounded
+        prune_changes(self.session)
         self.session.commit()
         logger.info(f"Published schedules from {start_date} to {end_date}. Affected users: {len(published_user_ids)}")
         return count
@@ -0,0 +1,99 @@
+"""
+Shift geometry shared by the solver and the giveaway / staffing views.
+
+Shift times are turned into integer minute offsets from midnight. A shift ending at
+or before its start time runs overnight, so its end offset is past 1440. Two shifts
+conflict (one person cannot work both on the same day) when they overlap by more
+than `HANDOVER_MINUTES` or one envelops the other. A shorter overlap is a handover.
+
+`geometry_for` builds the duration vector and conflict matrix once per version of
+the shift definitions. Versions are cached by their (id, start, end) signature, so
+later lookups are O(1) with no datetime arithmetic.
+"""
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+
+from sqlmodel import Session, select
+
+from ..models import ShiftDefinition
+
+HANDOVER_MINUTES = 30
+MINUTES_PER_DAY = 24 * 60
+
+
+def minute_span(start_time, end_time) -> Tuple[int, int]:
+    """(start, end) in minutes after midnight; `end` > `start`, past 1440 when overnight."""
+    start = start_time.hour * 60 + start_time.minute
+    end = end_time.hour * 60 + end_time.minute
+    if end <= start:
+        end += MINUTES_PER_DAY
+    return start, end
+
+
+def spans_conflict(span1: Tuple[int, int], span2: Tuple[int, int]) -> bool:
+    (start1, end1), (start2, end2) = span1, span2
+    overlap = min(end1, end2) - max(start1, start2)
+    if overlap <= 0:
+        return False
+    is_enveloped = (start1 >= start2 and end1 <= end2) or (start2 >= start1 and end2 <= end1)
+    return overlap > HANDOVER_MINUTES or is_enveloped
+
+
+class ShiftGeometry:
+    """Minute offsets, durations and the pairwise conflict matrix of a set of shifts."""
+
+    def __init__(self, spans: Iterable[Tuple[int, int, int]]):
+        spans = sorted(spans)
+        self.ids: Tuple[int, ...] = tuple(s_id for s_id, _, _ in spans)
+        self.index: Dict[int, int] = {s_id: i for i, s_id in enumerate(self.ids)}
+        self.start_minutes: Tuple[int, ...] = tuple(start for _, start, _ in spans)
+        self.end_minutes: Tuple[int, ...] = tuple(end for _, _, end in spans)
+        self.duration_minutes: Tuple[int, ...] = tuple(end - start for _, start, end in spans)
+        windows = list(zip(self.start_minutes, self.end_minutes))
+        # A shift always conflicts with itself (nobody works the same shift twice)
+        self.conflicts: Tuple[Tuple[bool, ...], ...] = tuple(
+            tuple(i == j or spans_conflict(windows[i], windows[j]) for j in range(len(windows)))
+            for i in range(len(windows))
+        )
+
+    def __contains__(self, shift_id) -> bool:
+        return shift_id in self.index
+
+    def duration_hours(self, shift_id: int) -> float:
+        return self.duration_minutes[self.index[shift_id]] / 60
+
+    def hours_by_shift(self) -> Dict[int, float]:
+        return {s_id: minutes / 60 for s_id, minutes in zip(self.ids, self.duration_minutes)}
+
+    def conflict(self, shift_id1: int, shift_id2: int) -> bool:
+        """Whether one person cannot work both shifts on one day (False for unknown shifts)."""
+        i = self.index.get(shift_id1)
+        j = self.index.get(shift_id2)
+        if i is None or j is None:
+            return False
+        return self.conflicts[i][j]
+
+    def conflict_pairs(self) -> List[Tuple[int, int]]:
+        """Conflicting pairs of distinct shifts, (lower id, higher id)."""
+        return [
+            (self.ids[i], self.ids[j])
+            for i in range(len(self.ids)) for j in range(i + 1, len(self.ids))
+            if self.conflicts[i][j]
+        ]
+
+
+@lru_cache(maxsize=32)
+def _build(signature: Tuple) -> ShiftGeometry:
+    return ShiftGeometry((s_id, *minute_span(start, end)) for s_id, start, end in signature)
+
+
+def geometry_for(shifts) -> ShiftGeometry:
+    """Geometry of any objects with `id`, `start_time` and `end_time` (cached per version)."""
+    return _build(tuple(sorted((s.id, s.start_time, s.end_time) for s in shifts)))
+
+
+def load_shift_geometry(session: Session) -> ShiftGeometry:
+    """Geometry of every shift definition, fetched as a single column-only query."""
+    return geometry_for(session.exec(
+        select(ShiftDefinition.id, ShiftDefinition.start_time, ShiftDefinition.end_time)
+    ).all())
@@ -1,316 +1,648 @@
-from datetime import date, timedelta, datetime
-from typing import List, Dict, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import List, Dict, Set, Tuple, Callable, Optional
+from ortools.sat import cp_model_pb2
 from ortools.sat.python import cp_model
-from sqlmodel import Session, select
-from ..models import User, ShiftDefinition, JobRole, Availability, StaffingRequirement, Schedule, AvailabilityStatus
+from sqlmodel import Session
+from ..models import Schedule
+from .availability_bitmap import SCHEDULABLE_STATUSES
+from .schedule_writer import save_schedule_range
+from .solver_decompose import decompose
+from .shift_geometry import geometry_for
+from .solver_input import ChangeSet, SolverInput, SolverInputLoader
+from .solver_instance import export_instance
+from .solver_heuristic import draft_schedule
+from .solver_objective import (
+    FILL_REWARD, EXCESS_SHIFT_PENALTY, EXCESS_HOURS_PENALTY, SPLIT_SHIFT_PENALTY,
+    evaluate, hours_budget_scaled, month_of, scaled_hours, shifts_budget, status_bonus,
+)
+from .solver_precheck import capacity_shortages, nothing_fillable, slot_capacity
+from .solver_profiles import DEFAULT_PROFILE, SolveProfile, get_profile, thread_budget
+from .solver_rolling import ROLLING_COMMIT_DAYS, ROLLING_WINDOW_DAYS, RollingHorizon, horizon_windows
+from .solver_telemetry import PhaseTimer, merge_stats, record_solve_run, relative_gap, telemetry_fields
 import logging
+import os
+import threading
 
 logger = logging.getLogger(__name__)
 
+# Wall-clock budget for one schedule generation (that of the "balanced" profile)
+SOLVER_TIME_LIMIT_SECONDS = 10.0
+# When set, every loaded solver input is saved here for offline replay (benchmarks.replay)
+SOLVER_EXPORT_DIR = os.getenv("SOLVER_EXPORT_DIR")
+
+
+def _staffing_warnings(assigned_count: Dict, req_map: Dict, shift_names: Dict, role_names: Dict) -> List[dict]:
+    """Slots whose requirement is not met by the given (date, shift, role) -> count map."""
+    warnings = []
+    for (d, s_id, r_id), required in req_map.items():
+        if required > 0:
+            assigned = assigned_count.get((d, s_id, r_id), 0)
+            if assigned < required:
+                warnings.append({
+                    "date": d.isoformat(),
+                    "shift_def_id": s_id,
+                    "role_id": r_id,
+                    "role_name": role_names.get(r_id, "Unknown"),
+                    "shift_name": shift_names.get(s_id, "Unknown"),
+                    "required": required,
+                    "assigned": assigned,
+                    "missing": required - assigned
+                })
+    return warnings
+
+
+def _assignment_dicts(keys) -> List[dict]:
+    """(user_id, date, shift_id, role_id) keys as JSON-friendly dicts, in a stable order."""
+    return [
+        {"user_id": str(e_id), "date": d.isoformat(), "shift_def_id": s_id, "role_id": r_id}
+        for e_id, d, s_id, r_id in sorted(keys, key=lambda k: (k[1], k[2], k[3], str(k[0])))
+    ]
+
+
+class _SolutionStreamer(cp_model.CpSolverSolutionCallback):
+    """Reports every improving solution found during search as a diff against the previous one."""
+
+    def __init__(self, work: Dict, req_map: Dict, shift_names: Dict, role_names: Dict,
+                 on_solution: Callable[[dict], None]):
+        super().__init__()
+        self._work = work
+        self._req_map = req_map
+        self._shift_names = shift_names
+        self._role_names = role_names
+        self._on_solution = on_solution
+        self._previous = set()
+        self.solution_count = 0
+
+    def OnSolutionCallback(self):
+        current = {key for key, var in self._work.items() if self.Value(var)}
+        assigned_count = {}
+        for e_id, d, s_id, r_id in current:
+            assigned_count[(d, s_id, r_id)] = assigned_count.get((d, s_id, r_id), 0) + 1
+
+        self.solution_count += 1
+        self._on_solution({
+            "type": "solution",
+            "solution": self.solution_count,
+            "objective": self.ObjectiveValue(),
+            "best_bound": self.BestObjectiveBound(),
+            "wall_time": round(self.WallTime(), 3),
+            "count": len(current),
+            "added": _assignment_dicts(current - self._previous),
+            "removed": _assignment_dicts(self._previous - current),
+            "warnings": _staffing_warnings(assigned_count, self._req_map, self._shift_names, self._role_names),
+        })
+        self._previous = current
+
+
+def _stop_when_requested(solver: cp_model.CpSolver, stop_event, finished: threading.Event):
+    # stop_event may be a multiprocessing proxy, so poll instead of blocking on it
+    while not finished.wait(0.1):
+        if stop_event.is_set():
+            solver.StopSearch()
+            return
+
+
+def interchangeable_employees(data: SolverInput) -> List[List]:
+    """
+    Groups (2+ members) of employees the model cannot tell apart: same roles, same
+    monthly targets and hours so far, same availability statuses and the same saved
+    assignments. Swapping two members of a group never changes feasibility or the
+    objective. Members are sorted by id.
+    """
+    role_ids = {r.id for r in data.roles}
+    available = {}
+    for (e_id, d, s_id), status in data.availability.items():
+        if status in SCHEDULABLE_STATUSES:
+            available.setdefault(e_id, set()).add((d, s_id, status))
+    saved = {}
+    for e_id, d, s_id, r_id in data.existing:
+        saved.setdefault(e_id, set()).add((d, s_id, r_id))
+
+    groups = {}
+    for e in data.employees:
+        signature = (
+            e.role_ids & role_ids,
+            e.target_hours_per_month,
+            e.target_shifts_per_month,
+            data.mtd_hours.get(e.id, 0.0),
+            data.mtd_shifts.get(e.id, 0),
+            frozenset(available.get(e.id, ())),
+            frozenset(saved.get(e.id, ())),
+        )
+        groups.setdefault(signature, []).append(e.id)
+    return [sorted(ids, key=str) for ids in groups.values() if len(ids) > 1]
+
+
+def build_model(data: SolverInput, prune: bool = True, warm_start: bool = False,
+                deviation_penalty: int = 0,
+                change_set: Optional[ChangeSet] = None,
+                break_symmetry: bool = True,
+                hint: Optional[Set] = None) -> Tuple[cp_model.CpModel, Dict]:
+    """
+    Build the CP-SAT model from a loaded snapshot. Returns the model and the assignment
+    variables keyed by (employee_id, date, shift_id, role_id).
+
+    `warm_start` hints the search with the schedule currently saved for the range
+    (`data.existing`); `deviation_penalty` is subtracted from the objective for every
+    saved assignment dropped or new assignment added, favouring minimal-change schedules.
+    Without `warm_start`, a `hint` set of assignments (e.g. a heuristic draft) seeds the search.
+
+    With `prune` (the default) a variable is only created when it could ever be 1: the
+    employee said they are available and the slot has a requirement. Every other
+    combination would be fixed to 0 by C2/C3 anyway, so the optimum is unchanged.
+    `prune=False` builds the dense model (one variable per role the employee holds).
+
+    With a `change_set` only the assignments in its neighbourhood get variables; every
+    saved assignment outside it is kept as a constant that still uses up slot capacity,
+    blocks overlapping shifts and counts towards the monthly targets.
+
+    With `break_symmetry` (the default) members of each `interchangeable_employees` group
+    are ordered by number of assigned shifts, so CP-SAT does not explore permutations of
+    otherwise identical staff. Any solution can be permuted into that order, so the
+    optimum is unchanged. Skipped for change sets, whose fixed assignments tell staff apart.
+    """
+    model = cp_model.CpModel()
+    shifts, roles = data.shifts, data.roles
+    avail_map, req_map = data.availability, data.requirements
+
+    # Variables: work[(employee_id, day, shift_id, role_id)], plus indexes used by the constraints
+    work = {}
+    by_employee = {}      # e_id -> [(var, shift_id)]
+    by_employee_month = {}  # (e_id, (year, month)) -> [(var, shift_id)]
+    by_employee_day = {}  # (e_id, d) -> {shift_id: [vars]}
+    by_slot = {}          # (d, shift_id, role_id) -> [vars]
+
+    # Saved assignments outside the change set, fixed to 1
+    fixed_by_employee_month = {}  # (e_id, (year, month)) -> [shift_id]
+    fixed_by_employee_day = {}  # (e_id, d) -> {shift_id: count}
+    fixed_by_slot = {}          # (d, shift_id, role_id) -> count
+    if change_set is not None:
+        for key in data.existing:
+            if change_set.contains(key):
+                continue
+            e_id, d, s_id, r_id = key
+            fixed_by_employee_month.setdefault((e_id, month_of(d)), []).append(s_id)
+            day_counts = fixed_by_employee_day.setdefault((e_id, d), {})
+            day_counts[s_id] = day_counts.get(s_id, 0) + 1
+            fixed_by_slot[(d, s_id, r_id)] = fixed_by_slot.get((d, s_id, r_id), 0) + 1
+
+    for e in data.employees:
+        e_roles = [r.id for r in roles if r.id in e.role_ids]
+        if not e_roles:
+            continue
+        for d in data.days:
+            weekday = d.weekday()
+            for s in shifts:
+                # Check if shift is applicable for this weekday
+                if weekday not in s.weekdays:
+                    continue
+                status = avail_map.get((e.id, d, s.id), "UNKNOWN")
+                if prune and status not in SCHEDULABLE_STATUSES:
+                    continue
+                for r_id in e_roles:
+                    if prune and req_map.get((d, s.id, r_id), 0) <= 0:
+                        continue
+                    if change_set is not None and not change_set.contains((e.id, d, s.id, r_id)):
+                        continue
+                    var = model.NewBoolVar(f"work_{e.id}_{d}_{s.id}_{r_id}")
+                    work[(e.id, d, s.id, r_id)] = var
+                    by_employee.setdefault(e.id, []).append((var, s.id))
+                    by_employee_month.setdefault((e.id, month_of(d)), []).append((var, s.id))
+                    by_employee_day.setdefault((e.id, d), {}).setdefault(s.id, []).append(var)
+                    by_slot.setdefault((d, s.id, r_id), []).append(var)
+
+                    # C2. Availability: forbid scheduling if they didn't explicitly say they are available
+                    if status not in SCHEDULABLE_STATUSES:
+                        model.Add(var == 0)
+
+    geometry = geometry_for(shifts)
+    shift_durations = geometry.hours_by_shift()
+
+    # C1. No overlapping shifts per employee per day & Max 1 role per shift
+    for day_key, day_shifts in by_employee_day.items():
+        fixed_day = fixed_by_employee_day.get(day_key, {})
+        for s_id, vars_for_shift in day_shifts.items():
+            cap = max(0, 1 - fixed_day.get(s_id, 0))
+            if len(vars_for_shift) > cap:
+                model.Add(sum(vars_for_shift) <= cap)
+        for s1_id, s2_id in geometry.conflict_pairs():
+            vars_s1 = day_shifts.get(s1_id, [])
+            vars_s2 = day_shifts.get(s2_id, [])
+            fixed_s1 = fixed_day.get(s1_id, 0)
+            fixed_s2 = fixed_day.get(s2_id, 0)
+            if (vars_s1 or fixed_s1) and (vars_s2 or fixed_s2) and (vars_s1 or vars_s2):
+                model.Add(sum(vars_s1) + sum(vars_s2) <= max(0, 1 - fixed_s1 - fixed_s2))
+
+    # C3. Staffing Requirements. `min_count` is used as a cap ("slots available"): the
+    # objective fills up to it, and under-staffing shows up as warnings instead of infeasibility.
+    # Slots with no more candidates than openings can never exceed the cap and need no constraint.
+    for slot, relevant_workers in by_slot.items():
+        cap = max(0, req_map.get(slot, 0) - fixed_by_slot.get(slot, 0))
+        if len(relevant_workers) > cap:
+            model.Add(sum(relevant_workers) <= cap)
+
+    # Objective: Maximize preferences & Penalize Overworking
+    objective_terms = []
+
+    # C4. Monthly Targets (Hours / Shifts) as soft penalties, one budget per calendar month,
+    # counting hours and shifts already scheduled earlier in the first month.
+    employees_by_id = {e.id: e for e in data.employees}
+    for (e_id, month), assigned in by_employee_month.items():
+        e = employees_by_id[e_id]
+        employee_vars = [var for var, _ in assigned]
+        employee_hours_coeffs = [scaled_hours(shift_durations[s_id]) for _, s_id in assigned] # Scaled for int
+        fixed_shifts = fixed_by_employee_month.get((e.id, month), [])
+        fixed_scaled = sum(scaled_hours(shift_durations[s_id]) for s_id in fixed_shifts if s_id in shift_durations)
+        suffix = f"{e.id}_{month[0]}_{month[1]}"
+
+        # Shift Count Limit (Soft Penalty instead of Hard Constraint)
+        if e.target_shifts_per_month is not None:
+            excess_shifts_var = model.NewIntVar(0, len(employee_vars) + len(fixed_shifts), f"excess_shifts_{suffix}")
+            model.Add(sum(employee_vars) + len(fixed_shifts) - shifts_budget(data, e, month) <= excess_shifts_var)
+            objective_terms.append(excess_shifts_var * -EXCESS_SHIFT_PENALTY)
+
+        # Hours Limit (Soft Penalty)
+        if e.target_hours_per_month is not None:
+            target_scaled = hours_budget_scaled(data, e, month)
+            assigned_scaled = cp_model.LinearExpr.WeightedSum(employee_vars, employee_hours_coeffs)
+
+            # Soft penalty for exceeding
+            excess_var = model.NewIntVar(0, sum(employee_hours_coeffs) + fixed_scaled + 1000, f"excess_hours_{suffix}")
+            model.Add(assigned_scaled + fixed_scaled - target_scaled <= excess_var)
+
+            objective_terms.append(excess_var * -EXCESS_HOURS_PENALTY)
+
+    # 1. Preferences & Slot Filling Reward
+    for key, w_var in work.items():
+        e_id, d, s_id, r_id = key
+        status = avail_map.get((e_id, d, s_id), "UNKNOWN")
+
+        # CRITICAL: High reward for simply filling a requirement so it outweighs overtime penalties,
+        # plus the PREFERRED / AVAILABLE bonus
+        objective_terms.append(w_var * (FILL_REWARD + status_bonus(status)))
+
+    # 2. Penalty for split shifts (working > 1 shift per day)
+    # The penalty is far below the fill reward, so filling a slot is prioritized over avoiding split shifts.
+    for (e_id, d), day_shifts in by_employee_day.items():
+        daily_vars = [var for vars_for_shift in day_shifts.values() for var in vars_for_shift]
+        shifts_worked = sum(daily_vars)
+        penalty_weight = SPLIT_SHIFT_PENALTY
+        if fixed_by_employee_day.get((e_id, d)):
+            # Already working a fixed shift that day, every free one is an extra shift
+            objective_terms.append(shifts_worked * (-penalty_weight))
+            continue
+        is_working = model.NewBoolVar(f"working_{e_id}_{d}")
+        model.Add(shifts_worked >= 1).OnlyEnforceIf(is_working)
+        model.Add(shifts_worked == 0).OnlyEnforceIf(is_working.Not())
+
+        objective_terms.append(shifts_worked * (-penalty_weight))
+        objective_terms.append(is_working * penalty_weight)
+
+    # C5. Symmetry breaking: interchangeable employees take non-increasing numbers of shifts
+    if break_symmetry and change_set is None:
+        for group in interchangeable_employees(data):
+            loads = [sum(var for var, _ in by_employee[e_id]) for e_id in group if e_id in by_employee]
+            for heavier, lighter in zip(loads, loads[1:]):
+                model.Add(heavier >= lighter)
+
+    # 3. Re-solve: stay close to the saved schedule
+    hinted = data.existing if warm_start else hint
+    if hinted is not None:
+        for key, w_var in work.items():
+            model.AddHint(w_var, key in hinted)
+    if deviation_penalty:
+        for key, w_var in work.items():
+            # Dropping a saved assignment costs the same as adding a new one; the
+            # constant part of (1 - w_var) does not change the optimum.
+            objective_terms.append(w_var * (deviation_penalty if key in data.existing else -deviation_penalty))
+
+    model.Maximize(sum(objective_terms))
+    return model, work
+
+
+def _solve_model(model: cp_model.CpModel, work: Dict, time_limit: float, num_workers: int = 0,
+                 callback=None, stop_event=None, stats: Optional[dict] = None,
+                 profile: Optional[SolveProfile] = None) -> Tuple[int, Set]:
+    """
+    Run CP-SAT and return the status and the assignment keys set to 1. `stats` is filled
+    with the response statistics (search effort, bound, model size) for telemetry.
+
+    `profile` sets the search parameters (see `solver_profiles`); `num_workers` overrides
+    its worker count. The workers are taken from the process-wide thread budget, waiting
+    while other solves hold it.
+    """
+    solver = cp_model.CpSolver()
+    wanted = num_workers or (profile.num_workers if profile is not None else thread_budget.total)
+
+    finished = threading.Event()
+    if stop_event is not None:
+        threading.Thread(
+            target=_stop_when_requested, args=(solver, stop_event, finished), daemon=True
+        ).start()
+    try:
+        with thread_budget.acquire(wanted) as threads:
+            if profile is not None:
+                profile.apply(solver.parameters, time_limit, threads)
+            else:
+                solver.parameters.max_time_in_seconds = time_limit
+                solver.parameters.num_workers = threads
+            status = solver.Solve(model, callback)
+    finally:
+        finished.set()
+
+    if stats is not None:
+        proto = model.Proto()
+        stats.update({
+            "wall_time": solver.WallTime(),
+            "num_branches": solver.NumBranches(),
+            "num_conflicts": solver.NumConflicts(),
+            "num_variables": len(proto.variables),
+            "num_constraints": len(proto.constraints),
+            "num_workers": threads,
+            "deterministic_time": solver.ResponseProto().deterministic_time,
+        })
+        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            stats["objective"] = solver.ObjectiveValue()
+            stats["best_bound"] = solver.BestObjectiveBound()
+            stats["gap"] = relative_gap(stats["objective"], stats["best_bound"])
+
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return status, set()
+    return status, {key for key, w_var in work.items() if solver.Value(w_var) == 1}
+
+
+def solve_decomposed(
+    data: SolverInput,
+    time_limit: float = SOLVER_TIME_LIMIT_SECONDS,
+    max_workers: Optional[int] = None,
+    on_piece: Optional[Callable[[dict], None]] = None,
+    stop_event=None,
+    stats: Optional[dict] = None,
+    profile: Optional[SolveProfile] = None,
+    **build_options,
+) -> Tuple[int, Set]:
+    """
+    Solve the pieces from `decompose` in parallel and stitch the assignments together.
+
+    CP-SAT releases the GIL while searching, so a thread per piece keeps the thread budget
+    busy. The time limit is shared out so the whole run still fits in about `time_limit`.
+    The status is OPTIMAL only when every piece was solved to optimality. `stats` gets
+    the response statistics summed over the pieces.
+    """
+    pieces = decompose(data)
+    if not pieces:
+        return cp_model.OPTIMAL, set()
+
+    max_workers = max_workers or min(len(pieces), thread_budget.total)
+    piece_time_limit = max(1.0, time_limit * max_workers / len(pieces))
+    workers_per_piece = max(1, thread_budget.total // max_workers)
+    if profile is not None:
+        workers_per_piece = min(workers_per_piece, profile.num_workers)
+
+    def run(piece: SolverInput) -> Tuple[int, Set, dict]:
+        model, work = build_model(piece, **build_options)
+        piece_stats = {}
+        status, keys = _solve_model(
+            model, work, piece_time_limit, workers_per_piece, stop_event=stop_event, stats=piece_stats,
+            profile=profile,
+        )
+        return status, keys, piece_stats
+
+    statuses, assigned, piece_stats = [], set(), []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for i, (piece, (status, keys, run_stats)) in enumerate(zip(pieces, pool.map(run, pieces)), start=1):
+            statuses.append(status)
+            assigned |= keys
+            piece_stats.append(run_stats)
+            if on_piece is not None:
+                on_piece({
+                    "type": "piece",
+                    "piece": i,
+                    "pieces": len(pieces),
+                    "start_date": piece.start_date.isoformat(),
+                    "end_date": piece.end_date.isoformat(),
+                    "status": cp_model_pb2.CpSolverStatus.Name(status),
+                    "count": len(keys),
+                })
+
+    logger.info(f"Solved {len(pieces)} pieces on {max_workers} threads, {piece_time_limit:.1f}s each")
+    if stats is not None:
+        stats.update(merge_stats(piece_stats))
+    failed = [status for status in statuses if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE)]
+    if failed:
+        return failed[0], set()
+    if all(status == cp_model.OPTIMAL for status in statuses):
+        return cp_model.OPTIMAL, assigned
+    return cp_model.FEASIBLE, assigned
+
+
+def solve_rolling(
+    data: SolverInput,
+    window_days: int = ROLLING_WINDOW_DAYS,
+    commit_days: int = ROLLING_COMMIT_DAYS,
+    time_limit: float = SOLVER_TIME_LIMIT_SECONDS,
+    on_window: Optional[Callable[[dict], None]] = None,
+    stop_event=None,
+    stats: Optional[dict] = None,
+    profile: Optional[SolveProfile] = None,
+    **build_options,
+) -> Tuple[int, Set]:
+    """
+    Solve long ranges as a rolling horizon of overlapping windows (see `solver_rolling`).
+
+    Each window gets `time_limit` per 31 committed days, so model size and solve time
+    grow linearly with the range instead of super-linearly. Monthly budgets carry over
+    between windows. The status is OPTIMAL only for a single optimally solved window;
+    `stats` gets the summed search statistics and the objective of the stitched schedule.
+    """
+    windows = horizon_windows(data.days, window_days, commit_days)
+    if not windows:
+        return cp_model.OPTIMAL, set()
+
+    horizon = RollingHorizon(data)
+    statuses, assigned, window_stats = [], set(), []
+    for i, (days, commit) in enumerate(windows, start=1):
+        window = horizon.window_input(days)
+        model, work = build_model(window, **build_options)
+        run_stats = {}
+        status, keys = _solve_model(
+            model, work, max(1.0, time_limit * len(commit) / 31), stop_event=stop_event, stats=run_stats,
+            profile=profile,
+        )
+        statuses.append(status)
+        window_stats.append(run_stats)
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            break
+        committed = {key for key in keys if key[1] <= commit[-1]}
+        horizon.commit(committed)
+        assigned |= committed
+        if on_window is not None:
+            on_window({
+                "type": "window",
+                "window": i,
+                "windows": len(windows),
+                "start_date": days[0].isoformat(),
+                "end_date": days[-1].isoformat(),
+                "committed_until": commit[-1].isoformat(),
+                "status": cp_model_pb2.CpSolverStatus.Name(status),
+                "count": len(committed),
+            })
+
+    if stats is not None:
+        merged = merge_stats(window_stats)
+        # Windows run one after another and overlap, so their objectives do not add up
+        for key in ("objective", "best_bound", "gap"):
+            merged.pop(key, None)
+        merged["wall_time"] = sum(s.get("wall_time", 0.0) for s in window_stats)
+        if statuses[-1] in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            merged["objective"] = evaluate(data, assigned)
+        stats.update(merged)
+    if statuses[-1] not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return statuses[-1], set()
+    logger.info(f"Solved {len(windows)} rolling windows of {window_days} days")
+    if len(windows) == 1 and statuses[0] == cp_model.OPTIMAL:
+        return cp_model.OPTIMAL, assigned
+    return cp_model.FEASIBLE, assigned
+
+
 class SolverService:
     def __init__(self, session: Session):
         self.session = session
 
-    def solve(self, start_date: date, end_date: date, save: bool = True):
+    def solve(
+        self,
+        start_date: date,
+        end_date: date,
+        save: bool = True,
+        on_solution: Optional[Callable[[dict], None]] = None,
+        stop_event=None,
+        warm_start: bool = False,
+        deviation_penalty: int = 0,
+        change_set: Optional[ChangeSet] = None,
+        decompose: bool = False,
+        rolling: bool = False,
+        engine: str = "cpsat",
+        heuristic_hint: bool = False,
+        profile: str = DEFAULT_PROFILE,
+        data: Optional[SolverInput] = None,
+    ):
+        """
+        Generate a schedule for the given range.
+
+        `on_solution` receives an event for every improving solution found during the
+        search; setting `stop_event` ends the search early and keeps the best solution so far.
+        `warm_start` / `deviation_penalty` re-solve starting from (and staying close to) the
+        schedule already saved for the range, see `build_model`.
+
+        With a `change_set` only its neighbourhood is re-optimised and the rest of the saved
+        schedule is kept as is. The result then carries a `diff` (added / removed assignments)
+        against the saved schedule, and `save` applies just that diff.
+
+        `decompose` solves role groups and calendar weeks as separate models in parallel
+        (see `solve_decomposed`), trading exact monthly targets for speed on large ranges.
+        `on_solution` then receives a `piece` event as each piece finishes. It is ignored
+        together with a `change_set`, whose neighbourhood is already small.
+
+        `rolling` solves the range as overlapping windows that commit a week at a time
+        (see `solve_rolling`), for ranges of a quarter or more; `on_solution` then receives
+        a `window` event per window. Like `decompose` it is ignored with a `change_set`.
+
+        `engine="heuristic"` returns a greedy/local-search draft (`draft_schedule`) in
+        milliseconds instead of running CP-SAT; `heuristic_hint` computes that draft and
+        hands it to CP-SAT as a starting hint. Neither applies to change sets.
+
+        `profile` names the CP-SAT search profile ("fast", "balanced" or "thorough", see
+        `solver_profiles`): worker count, time budgets and the gap at which to stop.
+
+        `data` is a snapshot of the range the caller already loaded (e.g. to fingerprint
+        it); it is solved as is instead of being loaded again.
+
+        Before any model is built, required slots that not enough qualified staff are
+        available for are reported under `precheck`; when none can be filled at all the
+        (empty) schedule is returned without running CP-SAT.
+        """
+        timer = PhaseTimer()
+        stats = {}
+        search = get_profile(profile)
+
         # 1. Fetch Data
-        employees = self.session.exec(select(User).where(User.is_active == True)).all()
-        shifts = self.session.exec(select(ShiftDefinition)).all()
-        roles = self.session.exec(select(JobRole)).all()
-        
-        # Helper to get range of dates
-        delta = end_date - start_date
-        days = [start_date + timedelta(days=i) for i in range(delta.days + 1)]
-        
         logger.info(f"Starting schedule generation for {start_date} to {end_date}")
+        with timer.phase("load"):
+            if data is None:
+                data = SolverInputLoader(self.session).load(start_date, end_date)
+        req_map = data.requirements
+        if SOLVER_EXPORT_DIR:
+            try:
+                logger.info(f"Exported solver input to {export_instance(data, SOLVER_EXPORT_DIR)}")
+            except OSError as e:
+                logger.warning(f"Could not export solver input: {e}")
 
-        # Fetch operational data
-        availabilities = self.session.exec(select(Availability).where(
-            Availability.date >= start_date, Availability.date <= end_date
-        )).all()
-        
-        # Map availability: (str(user_id), date, shift_id) -> status string
-        avail_map = {}
-        for a in availabilities:
-            val = str(a.status.value) if hasattr(a.status, 'value') else str(a.status)
-            avail_map[(str(a.user_id), a.date.isoformat(), a.shift_def_id)] = val
-
-        # Fetch specific requirements
-        specific_reqs = self.session.exec(select(StaffingRequirement).where(
-            StaffingRequirement.date >= start_date, 
-            StaffingRequirement.date <= end_date
-        )).all()
-
-        # Fetch global requirements (where day_of_week is NOT NULL)
-        global_reqs = self.session.exec(select(StaffingRequirement).where(
-            StaffingRequirement.day_of_week != None
-        )).all()
-        
-        # Fetch month-to-date schedules for hours calculation
-        month_start_date = start_date.replace(day=1)
-        mtd_schedules = self.session.exec(select(Schedule).where(
-            Schedule.date >= month_start_date,
-            Schedule.date < start_date
-        )).all()
-        
-        # Calculate already scheduled hours per employee
-        mtd_hours = {}
-        for s in mtd_schedules:
-            shift = self.session.get(ShiftDefinition, s.shift_def_id)
-            if shift:
-                start_dt = datetime.combine(date.today(), shift.start_time)
-                end_dt = datetime.combine(date.today(), shift.end_time)
-                if end_dt <= start_dt: end_dt += timedelta(days=1)
-                duration = (end_dt - start_dt).total_seconds() / 3600
-                mtd_hours[s.user_id] = mtd_hours.get(s.user_id, 0.0) + duration
-
-        req_map = {}
-        
-        # Populate with global first
-        for d in days:
-            dow = d.weekday()
-            for r in global_reqs:
-                if r.day_of_week == dow:
-                    req_map[(d, r.shift_def_id, r.role_id)] = r.min_count
-        
-        # Override with specific
-        for r in specific_reqs:
-            if r.date: # Should be true given query, but safe check
-                req_map[(r.date, r.shift_def_id, r.role_id)] = r.min_count
-
-        # 2. Build Model
-        model = cp_model.CpModel()
-        
-        # Variables: shifts[(employee_id, day_str, shift_id, role_id)]
-        # We use strings for keys in the dict to be safe with ortools
-        work = {} 
-        
-        for e in employees:
-            for d in days:
-                for s in shifts:
-                    # Check if shift is applicable for this weekday
-                    weekday = d.weekday()  # 0=Mon, 6=Sun
-                    if hasattr(s, 'days') and s.days:
-                        applicable_days = [link.day_of_week for link in s.days]
-                    else:
-                        applicable_days = list(range(7))
-                        
-                    if weekday not in applicable_days:
-                        continue  # Skip this shift for this day
-                    
-                    for r in roles:
-                        # Check if employee has this role
-                        # In the real world, check e.job_roles links. Assuming simple check:
-                        user_has_role = any(ur.id == r.id for ur in e.job_roles)
-                        
-                        if user_has_role:
-                            # Create variable
-                            var_name = f"work_{e.id}_{d}_{s.id}_{r.id}"
-                            work[(e.id, d, s.id, r.id)] = model.NewBoolVar(var_name)
-                        else:
-                            # If employee doesn't have role, they can't work
-                            pass
-        
-        # Constraints
-        
-        # Constraints
-        
-        # Helper: Calculate shift durations and overlaps
-        shift_durations = {}
-        shift_overlaps = [] # List of tuples (s1_id, s2_id)
-        
-        for s1 in shifts:
-            start1 = datetime.combine(date.today(), s1.start_time)
-            end1 = datetime.combine(date.today(), s1.end_time)
-            if end1 <= start1: end1 += timedelta(days=1)
-            duration = (end1 - start1).total_seconds() / 3600
-            shift_durations[s1.id] = duration
-            
-            for s2 in shifts:
-                if s1.id >= s2.id: continue # unique pairs, avoid self-compare (handled separately)
-                
-                start2 = datetime.combine(date.today(), s2.start_time)
-                end2 = datetime.combine(date.today(), s2.end_time)
-                if end2 <= start2: end2 += timedelta(days=1)
-                
-                # Check overlap: Max(start1, start2) < Min(end1, end2)
-                latest_start = max(start1, start2)
-                earliest_end = min(end1, end2)
-                
-                if latest_start < earliest_end:
-                    overlap_duration = (earliest_end - latest_start).total_seconds() / 60 # minutes
-                    
-                    # Check if one shift is completely enveloped by the other
-                    is_enveloped = (start1 >= start2 and end1 <= end2) or (start2 >= start1 and end2 <= end1)
-                    
-                    # Allow overlap if <= 30 minutes (e.g. handover) AND not enveloped
-                    if overlap_duration > 30 or is_enveloped:
-                        shift_overlaps.append((s1.id, s2.id))
-
-        # C1. No overlapping shifts per employee per day & Max 1 role per shift
-        for e in employees:
-            for d in days:
-                # 1. Max 1 role per unique shift (s.id)
-                for s in shifts:
-                    vars_for_shift = []
-                    for r in roles:
-                        if (e.id, d, s.id, r.id) in work:
-                            vars_for_shift.append(work[(e.id, d, s.id, r.id)])
-                    if vars_for_shift:
-                        model.Add(sum(vars_for_shift) <= 1)
-                
-                # 2. No overlapping different shifts
-                for s1_id, s2_id in shift_overlaps:
-                    vars_s1 = []
-                    vars_s2 = []
-                    for r in roles:
-                        if (e.id, d, s1_id, r.id) in work: vars_s1.append(work[(e.id, d, s1_id, r.id)])
-                        if (e.id, d, s2_id, r.id) in work: vars_s2.append(work[(e.id, d, s2_id, r.id)])
-                    
-                    if vars_s1 and vars_s2:
-                        model.Add(sum(vars_s1) + sum(vars_s2) <= 1)
-
-        # C2. Availability Constraints
-        for key, w_var in work.items():
-            e_id, d, s_id, r_id = key
-            status = avail_map.get((str(e_id), d.isoformat(), s_id), "UNKNOWN") 
-            
-            # Forbid scheduling if they didn't explicitly say they are available
-            if status not in ["AVAILABLE", "PREFERRED"]:
-                # logger.debug(f"Forcing w_var=0 for {e_id} on {d} due to {status}")
-                model.Add(w_var == 0)
-
-        # C3. Staffing Requirements
-        for d in days:
-            for s in shifts:
-                for r in roles:
-                    min_req = req_map.get((d, s.id, r.id), 0)
-                    relevant_workers = []
-                    for e in employees:
-                        if (e.id, d, s.id, r.id) in work:
-                            relevant_workers.append(work[(e.id, d, s.id, r.id)])
-                    if relevant_workers:
-                        # Allow slightly less if infeasible? No, hard constraint for now.
-                        # But to prevent "infeasible" due to lack of staff, usually we might use soft constraint.
-                        # For now, keep as hard constraint <= min_req ??? 
-                        # Wait, original code was sum <= min_req? That sounds wrong. 
-                        # Usually min_req means "at least".
-                        # Original: "model.Add(sum(relevant_workers) <= min_req)" 
-                        # The user feedback implied they rely on this. 
-                        # Actually, looking at previous code, it was trying to fill UP TO requirement.
-                        # "constraint: sum ... <= min_req". This acts as a CAP.
-                        # Typically "Requirement" = "We NEED this many".
-                        # If I change it to >= it might break if not enough staff.
-                        # Let's keep it as CAP for now (matches "Target"), 
-                        # BUT usually a "Requirement" is a lower bound. 
-                        # Let's switch to >= but maybe with a slack variable if we wanted to be fancy.
-                        # Given the prompt doesn't explicitly ask to fix "requirements logic", 
-                        # I will assume the previous "Max Cap" logic was intended or I should stick to it unless asked.
-                        # Wait, "min_count" implies minimum. 
-                        # Let's look at the UI/Usage context. "Requirements" usually means "I need 2 waiters".
-                        # If I only have 1, I want 1. If I have 3, I want 2.
-                        # So `sum == min_req` is ideal. `sum <= min_req` allows 0. `sum >= min_req` forces it.
-                        # The previous code had `sum <= min_req`. This forces under-staffing or exact staffing.
-                        # Let's keep it `sum <= min_req` to avoid breaking "feasible" status, 
-                        # effectively treating it as "Slots Available".
-                        model.Add(sum(relevant_workers) <= min_req)
-
-        # Objective: Maximize preferences & Penalize Overworking
-        objective_terms = []
-
-        # C4. Monthly Targets (Hours / Shifts)
-        # We are solving for a range [start_date, end_date]. 
-        # If this range is shorter than a month, we only enforce proportional or absolute?
-        # User asked: "Assuming if not defined, no limit".
-        # We will enforce limit for the *generated period* based on the monthly target.
-        # Ideally we'd know usage so far in month, but we don't.
-        # We will assume the target applies to this generation if it covers the whole month (simplification).
-        # Or better: Just apply the limit as a Hard Cap for the period.
-        
-        for e in employees:
-            employee_vars = []
-            employee_hours_coeffs = []
-            
-            for d in days:
-                for s in shifts:
-                    for r in roles:
-                        if (e.id, d, s.id, r.id) in work:
-                            var = work[(e.id, d, s.id, r.id)]
-                            employee_vars.append(var)
-                            employee_hours_coeffs.append(int(shift_durations[s.id] * 10)) # Scaled by 10 for int 
-
-            # Shift Count Limit (Soft Penalty instead of Hard Constraint)
-            if e.target_shifts_per_month is not None:
-                excess_shifts_var = model.NewIntVar(0, len(employee_vars), f"excess_shifts_{e.id}")
-                model.Add(sum(employee_vars) - e.target_shifts_per_month <= excess_shifts_var)
-                # Penalty 2000 per excess shift
-                objective_terms.append(excess_shifts_var * -2000)
-                
-            # Hours Limit (Soft Penalty)
-            if e.target_hours_per_month is not None:
-                already_scheduled = mtd_hours.get(e.id, 0.0)
-                remaining = max(0, e.target_hours_per_month - already_scheduled)
-                target_scaled = int(remaining * 10)
-                assigned_scaled = cp_model.LinearExpr.WeightedSum(employee_vars, employee_hours_coeffs)
-                
-                # Soft penalty for exceeding
-                excess_var = model.NewIntVar(0, sum(employee_hours_coeffs) + 1000, f"excess_hours_{e.id}")
-                model.Add(assigned_scaled - target_scaled <= excess_var)
-                
-                # Penalty 100 per scaled hour (meaning 1000 per full hour)
-                objective_terms.append(excess_var * -100)
-
-        # 1. Preferences & Slot Filling Reward
-        for key, w_var in work.items():
-            e_id, d, s_id, r_id = key
-            status = avail_map.get((str(e_id), d.isoformat(), s_id), "UNKNOWN")
-            
-            # CRITICAL: High reward for simply filling a requirement so it outweighs overtime penalties
-            objective_terms.append(w_var * 50000) 
-            
-            if status == "PREFERRED":
-                # Reward for PREFERRED
-                objective_terms.append(w_var * 2000)
-            elif status == "AVAILABLE":
-                # Reward for being available
-                objective_terms.append(w_var * 500)
-        
-        # 2. Penalty for split shifts (working > 1 shift per day)
-        # We subtract Penalty * Excess from objective
-        # Let Penalty = 50. It's less than 100, so filling a slot is prioritized over avoiding split shifts.
-        for e in employees:
-            for d in days:
-                daily_vars = []
-                for s in shifts:
-                    for r in roles:
-                         if (e.id, d, s.id, r.id) in work:
-                            daily_vars.append(work[(e.id, d, s.id, r.id)])
-                
-                if daily_vars:
-                    shifts_worked = sum(daily_vars)
-                    is_working = model.NewBoolVar(f"working_{e.id}_{d}")
-                    model.Add(shifts_worked >= 1).OnlyEnforceIf(is_working)
-                    model.Add(shifts_worked == 0).OnlyEnforceIf(is_working.Not())
-                    
-                    penalty_weight = 50
-                    objective_terms.append(shifts_worked * (-penalty_weight))
-                    objective_terms.append(is_working * penalty_weight)
-
-        model.Maximize(sum(objective_terms))
-
-        # 3. Solve
-        solver = cp_model.CpSolver()
-        # Set a time limit in case of complexity
-        solver.parameters.max_time_in_seconds = 10.0
-        logger.info("Solving CP model...")
-        status = solver.Solve(model)
-
-        generated_schedules = []
+        shift_map = {s.id: s.name for s in data.shifts}
+        role_map = {r.id: r.name for r in data.roles}
+
+        # Capacity pre-check: pure counting, no model
+        with timer.phase("precheck"):
+            capacity = slot_capacity(data)
+            shortages = capacity_shortages(data, capacity)
+            hopeless = nothing_fillable(data, capacity)
+        if shortages:
+            logger.info(f"Pre-check: {len(shortages)} required slots cannot be fully staffed")
+
+        if hopeless:
+            # The pruned model would have no variables, so the empty schedule is optimal
+            mode = "precheck"
+            status, generated_keys = cp_model.OPTIMAL, set()
+        elif engine == "heuristic" and change_set is None:
+            mode = "heuristic"
+            with timer.phase("solve"):
+                generated_keys = draft_schedule(data)
+            status = cp_model.FEASIBLE
+            stats["objective"] = evaluate(data, generated_keys)
+        elif decompose and change_set is None:
+            # 2./3. Build and solve the pieces in parallel
+            mode = "decomposed"
+            with timer.phase("solve"):
+                status, generated_keys = solve_decomposed(
+                    data, time_limit=search.time_limit, on_piece=on_solution, stop_event=stop_event,
+                    stats=stats, profile=search, warm_start=warm_start, deviation_penalty=deviation_penalty,
+                )
+        elif rolling and change_set is None:
+            mode = "rolling"
+            with timer.phase("solve"):
+                status, generated_keys = solve_rolling(
+                    data, time_limit=search.time_limit, on_window=on_solution, stop_event=stop_event,
+                    stats=stats, profile=search, warm_start=warm_start, deviation_penalty=deviation_penalty,
+                )
+        else:
+            mode = "full" if change_set is None else "repair"
+            # 2. Build Model
+            with timer.phase("build"):
+                hint = draft_schedule(data) if heuristic_hint and change_set is None else None
+                model, work = build_model(
+                    data, warm_start=warm_start, deviation_penalty=deviation_penalty, change_set=change_set,
+                    hint=hint,
+                )
+
+            # 3. Solve
+            callback = None
+            if on_solution is not None:
+                callback = _SolutionStreamer(work, req_map, shift_map, role_map, on_solution)
+
+            logger.info("Solving CP model...")
+            with timer.phase("solve"):
+                status, generated_keys = _solve_model(
+                    model, work, search.time_limit, callback=callback, stop_event=stop_event, stats=stats,
+                    profile=search,
+                )
 
         if status == cp_model.OPTIMAL or status == cp_model.FEASIBLE:
-            generated_schedules = []
-            for key, w_var in work.items():
-                if solver.Value(w_var) == 1:
-                    e_id, d, s_id, r_id = key
+            with timer.phase("extract"):
+                if change_set is not None:
+                    generated_keys |= {key for key in data.existing if not change_set.contains(key)}
+
+                generated_schedules = []
+                for e_id, d, s_id, r_id in sorted(generated_keys, key=lambda k: (k[1], k[2], k[3], str(k[0]))):
                     sc = Schedule(
                         date=d,
                         shift_def_id=s_id,
@@ -320,78 +652,91 @@ class SolverService:
                     )
                     generated_schedules.append(sc)
 
-            # 4. Calculate staffing warnings
-            # Count assigned workers per (date, shift, role)
-            assigned_count = {}
-            for sc in generated_schedules:
-                key = (sc.date, sc.shift_def_id, sc.role_id)
-                assigned_count[key] = assigned_count.get(key, 0) + 1
-            
-            # Compare with requirements and generate warnings
-            warnings = []
-            shift_map = {s.id: s.name for s in shifts}
-            role_map = {r.id: r.name for r in roles}
-            
-            for (d, s_id, r_id), required in req_map.items():
-                if required > 0:
-                    assigned = assigned_count.get((d, s_id, r_id), 0)
-                    if assigned < required:
-                        warnings.append({
-                            "date": d.isoformat(),
-                            "shift_def_id": s_id,
-                            "role_id": r_id,
-                            "role_name": role_map.get(r_id, "Unknown"),
-                            "shift_name": shift_map.get(s_id, "Unknown"),
-                            "required": required,
-                            "assigned": assigned,
-                            "missing": required - assigned
-                        })
+                # 4. Calculate staffing warnings
+                # Count assigned workers per (date, shift, role)
+                assigned_count = {}
+                for sc in generated_schedules:
+                    key = (sc.date, sc.shift_def_id, sc.role_id)
+                    assigned_count[key] = assigned_count.get(key, 0) + 1
+
+                # Compare with requirements and generate warnings
+                warnings = _staffing_warnings(assigned_count, req_map, shift_map, role_map)
 
             if save:
-                # Clear old schedules for this period first to clean up
-                statements = select(Schedule).where(Schedule.date >= start_date, Schedule.date <= end_date)
-                results = self.session.exec(statements).all()
-                for res in results:
-                    self.session.delete(res)
-                
-                # Save to DB
-                for item in generated_schedules:
-                    self.session.add(item)
-                self.session.commit()
-            
-            # Create maps for lookup
-            shift_map_obj = {s.id: s for s in shifts}
-            role_map_obj = {r.id: r for r in roles}
-            user_map_obj = {u.id: u for u in employees}
-
-            enriched_schedules = []
-            for sc in generated_schedules:
-                sh = shift_map_obj.get(sc.shift_def_id)
-                r = role_map_obj.get(sc.role_id)
-                u = user_map_obj.get(sc.user_id)
-                
-                enriched_schedules.append({
-                    "id": sc.id, 
-                    "date": sc.date,
-                    "shift_def_id": sc.shift_def_id,
-                    "user_id": sc.user_id,
-                    "role_id": sc.role_id,
-                    "is_published": sc.is_published,
-                    "user_name": u.full_name if u else "Unknown",
-                    "role_name": r.name if r else "Unknown",
-                    "shift_name": sh.name if sh else "Unknown",
-                    "start_time": sh.start_time if sh else None,
-                    "end_time": sh.end_time if sh else None,
-                })
+                with timer.phase("persist"):
+                    self._save(data, generated_schedules, generated_keys, change_set)
+
+            with timer.phase("extract"):
+                # Create maps for lookup
+                shift_map_obj = {s.id: s for s in data.shifts}
+                role_map_obj = {r.id: r for r in data.roles}
+                user_map_obj = {u.id: u for u in data.employees}
+
+                enriched_schedules = []
+                for sc in generated_schedules:
+                    sh = shift_map_obj.get(sc.shift_def_id)
+                    r = role_map_obj.get(sc.role_id)
+                    u = user_map_obj.get(sc.user_id)
+
+                    enriched_schedules.append({
+                        "id": sc.id,
+                        "date": sc.date,
+                        "shift_def_id": sc.shift_def_id,
+                        "user_id": sc.user_id,
+                        "role_id": sc.role_id,
+                        "is_published": sc.is_published,
+                        "user_name": u.full_name if u else "Unknown",
+                        "role_name": r.name if r else "Unknown",
+                        "shift_name": sh.name if sh else "Unknown",
+                        "start_time": sh.start_time if sh else None,
+                        "end_time": sh.end_time if sh else None,
+                    })
 
             logger.info(f"Solver found a valid schedule (status={status}), generating {len(generated_schedules)} assignments.")
 
-            return {
+            result = {
                 "status": "success", 
                 "count": len(generated_schedules), 
                 "schedules": enriched_schedules,
-                "warnings": warnings
+                "warnings": warnings,
+                "precheck": shortages,
             }
+            if warm_start or deviation_penalty or change_set is not None:
+                result["changes"] = {
+                    "added": len(generated_keys - data.existing),
+                    "removed": len(data.existing - generated_keys),
+                }
+            if change_set is not None:
+                result["diff"] = {
+                    "added": _assignment_dicts(generated_keys - data.existing),
+                    "removed": _assignment_dicts(data.existing - generated_keys),
+                }
         else:
             logger.warning(f"Solver failed to find a feasible schedule. Status: {status}")
-            return {"status": "infeasible", "count": 0, "warnings": []}
+            result = {"status": "infeasible", "count": 0, "warnings": [], "precheck": shortages}
+
+        result["telemetry"] = telemetry_fields(timer, stats)
+        record_solve_run(
+            self.session,
+            start_date=start_date,
+            end_date=end_date,
+            mode=mode,
+            profile=search.name,
+            status=cp_model_pb2.CpSolverStatus.Name(status),
+            employees=len(data.employees),
+            days=len(data.days),
+            assignments=result["count"],
+            **result["telemetry"],
+        )
+        return result
+
+    def _save(self, data: SolverInput, generated_schedules: List[Schedule], generated_keys: Set,
+              change_set: Optional[ChangeSet]):
+        # A full solve saves a fresh draft; a repair keeps the published state of untouched rows
+        diff = save_schedule_range(
+            self.session, data.start_date, data.end_date, generated_keys,
+            published=False if change_set is None else None,
+        )
+        self.session.commit()
+        for sc in generated_schedules:
+            sc.id = diff.ids[(sc.user_id, sc.date, sc.shift_def_id, sc.role_id)]
@@ -0,0 +1,142 @@
+"""
+Memoised solve results.
+
+Managers often press "Generate" repeatedly without changing anything. The job
+manager fingerprints the loaded `SolverInput` together with the solve options. It
+serves a finished result for a known fingerprint instead of queueing another
+CP-SAT run.
+
+Because the key is derived from the inputs, a changed input can never hit a stale
+entry. Writes to solver inputs still evict the entries for the dates they touch
+(see `_invalidate_on_flush`), so superseded results do not linger until their TTL.
+Bulk SQL statements bypass the flush hook and must call `solve_cache.invalidate`
+themselves.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event, inspect
+from sqlmodel import Session
+
+from ..models import (
+    Availability, JobRole, Schedule, ShiftDefinition, ShiftDefinitionDayLink, StaffingRequirement, User,
+    UserJobRoleLink,
+)
+from .months import month_end
+from .solver_input import SolverInput
+from .solver_instance import instance_to_dict
+
+logger = logging.getLogger(__name__)
+
+SOLVER_CACHE_SIZE = int(os.getenv("SOLVER_CACHE_SIZE", "32"))
+SOLVER_CACHE_TTL_SECONDS = int(os.getenv("SOLVER_CACHE_TTL_SECONDS", "900"))
+
+# User columns that end up in a SolverInput (or in the enriched result)
+_SOLVER_USER_FIELDS = ("full_name", "is_active", "target_hours_per_month", "target_shifts_per_month")
+
+
+def input_fingerprint(data: SolverInput, options: Optional[Dict[str, Any]] = None) -> str:
+    """Stable SHA-256 of a solver input plus the options it is solved with."""
+    payload = instance_to_dict(data, anonymize=False)
+    # Load order of employees / shifts / roles is not guaranteed by the database
+    for collection in ("employees", "shifts", "roles"):
+        payload[collection] = sorted(payload[collection], key=lambda item: str(item["id"]))
+    payload["options"] = options or {}
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class SolveCache:
+    """Thread-safe LRU of solve results with a time-to-live, indexed by fingerprint."""
+
+    def __init__(self, max_entries: int = SOLVER_CACHE_SIZE, ttl_seconds: float = SOLVER_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            _, _, result, stored_at = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return result
+
+    def put(self, key: str, start_date: date, end_date: date, result: dict):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (start_date, end_date, result, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, start_date: Optional[date] = None, end_date: Optional[date] = None) -> int:
+        """Drop entries whose range overlaps [start_date, end_date] (open ends: unbounded)."""
+        with self._lock:
+            stale = [
+                key for key, (start, end, _, _) in self._entries.items()
+                if (end_date is None or start <= end_date) and (start_date is None or end >= start_date)
+            ]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _affected_range(obj, is_update: bool):
+    """
+    Dates whose solver input `obj` feeds, as (start, end); (None, None) for every
+    range, or False when the change does not matter to the solver.
+    """
+    if isinstance(obj, Availability):
+        return obj.date, obj.date
+    if isinstance(obj, StaffingRequirement):
+        # Recurring (day_of_week) requirements apply to any range
+        return (obj.date, obj.date) if obj.date is not None else (None, None)
+    if isinstance(obj, Schedule):
+        # Saved assignments in the range and hours worked earlier in the same month
+        return obj.date, month_end(obj.date)
+    if isinstance(obj, User):
+        if is_update and not any(inspect(obj).attrs[name].history.has_changes() for name in _SOLVER_USER_FIELDS):
+            return False
+        return None, None
+    if isinstance(obj, (ShiftDefinition, ShiftDefinitionDayLink, JobRole, UserJobRoleLink)):
+        return None, None
+    return False
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_on_flush(session, flush_context):
+    if not len(solve_cache):
+        return
+    changes = [(obj, False) for obj in session.new] + [(obj, False) for obj in session.deleted]
+    changes += [(obj, True) for obj in session.dirty if session.is_modified(obj)]
+    for obj, is_update in changes:
+        affected = _affected_range(obj, is_update)
+        if affected is False:
+            continue
+        dropped = solve_cache.invalidate(*affected)
+        if dropped:
+            logger.info(f"Evicted {dropped} cached solve result(s) after a {type(obj).__name__} change")
+
+
+solve_cache = SolveCache()
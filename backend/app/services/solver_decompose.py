@@ -0,0 +1,160 @@
+"""
+Decomposition of a solver snapshot into independently solvable pieces.
+
+A month-long model for a large team often runs out of time before CP-SAT can prove
+anything. The snapshot is split into role groups (no employee holds roles from two
+groups, so no constraint spans them) and, for ranges longer than a week, into
+calendar weeks (cut at month boundaries). Each piece is an ordinary `SolverInput`, so
+`build_model` solves it unchanged and the pieces can run on separate cores.
+
+Role groups are exact. Weeks are only coupled through the monthly targets, so each
+employee's remaining hours and shift budget for a month is apportioned to that month's
+weeks up front, in proportion to how many shifts they are available for in each week.
+"""
+import dataclasses
+from datetime import date, timedelta
+from types import MappingProxyType
+from typing import Dict, FrozenSet, List, Sequence, Tuple
+from uuid import UUID
+
+from .availability_bitmap import SCHEDULABLE_STATUSES
+from .solver_input import SolverInput
+from .solver_objective import month_of, shifts_budget
+
+
+def role_groups(data: SolverInput) -> List[FrozenSet[int]]:
+    """Role ids partitioned so that every employee's roles fall into a single group."""
+    parent = {r.id: r.id for r in data.roles}
+
+    def find(role_id):
+        while parent[role_id] != role_id:
+            parent[role_id] = parent[parent[role_id]]
+            role_id = parent[role_id]
+        return role_id
+
+    for e in data.employees:
+        role_ids = sorted(r_id for r_id in e.role_ids if r_id in parent)
+        for r_id in role_ids[1:]:
+            parent[find(r_id)] = find(role_ids[0])
+
+    groups = {}
+    for r_id in parent:
+        groups.setdefault(find(r_id), set()).add(r_id)
+    return [frozenset(g) for g in sorted(groups.values(), key=min)]
+
+
+def calendar_weeks(days: Sequence[date]) -> List[Tuple[date, ...]]:
+    """Consecutive days grouped into Monday-Sunday weeks."""
+    weeks = {}
+    for d in days:
+        weeks.setdefault(d - timedelta(days=d.weekday()), []).append(d)
+    return [tuple(week) for _, week in sorted(weeks.items())]
+
+
+def budget_periods(days: Sequence[date]) -> List[Tuple[date, ...]]:
+    """Calendar weeks, cut at month boundaries so each falls within one monthly budget."""
+    periods = {}
+    for d in days:
+        periods.setdefault((d - timedelta(days=d.weekday()), d.month), []).append(d)
+    return sorted((tuple(period) for period in periods.values()), key=lambda period: period[0])
+
+
+def restrict_to_roles(data: SolverInput, role_ids: FrozenSet[int]) -> SolverInput:
+    employees = tuple(e for e in data.employees if e.role_ids & role_ids)
+    employee_ids = {e.id for e in employees}
+    return dataclasses.replace(
+        data,
+        employees=employees,
+        roles=tuple(r for r in data.roles if r.id in role_ids),
+        availability=MappingProxyType({k: v for k, v in data.availability.items() if k[0] in employee_ids}),
+        requirements=MappingProxyType({k: v for k, v in data.requirements.items() if k[2] in role_ids}),
+        mtd_hours=MappingProxyType({k: v for k, v in data.mtd_hours.items() if k in employee_ids}),
+        existing=frozenset(k for k in data.existing if k[0] in employee_ids and k[3] in role_ids),
+    )
+
+
+def _apportion(total: float, weights: Sequence[int]) -> List[float]:
+    if not sum(weights):
+        weights = [1] * len(weights)
+    return [total * w / sum(weights) for w in weights]
+
+
+def _apportion_int(total: int, weights: Sequence[int]) -> List[int]:
+    """Largest-remainder split of `total` that sums back to it exactly."""
+    shares = _apportion(total, weights)
+    result = [int(share) for share in shares]
+    by_remainder = sorted(range(len(shares)), key=lambda i: shares[i] - result[i], reverse=True)
+    for i in by_remainder[:total - sum(result)]:
+        result[i] += 1
+    return result
+
+
+def split_into_weeks(data: SolverInput) -> List[SolverInput]:
+    """One piece per week (`budget_periods`) with each month's targets apportioned between its weeks."""
+    weeks = budget_periods(data.days)
+    week_of = {d: i for i, week in enumerate(weeks) for d in week}
+    weeks_by_month: Dict[Tuple[int, int], List[int]] = {}
+    for i, week in enumerate(weeks):
+        weeks_by_month.setdefault(month_of(week[0]), []).append(i)
+
+    available = {}  # e_id -> [schedulable (day, shift) cells per week]
+    for (e_id, d, _), status in data.availability.items():
+        if status in SCHEDULABLE_STATUSES and d in week_of:
+            available.setdefault(e_id, [0] * len(weeks))[week_of[d]] += 1
+
+    employees_per_week = [[] for _ in weeks]
+    mtd_per_week: List[Dict[UUID, float]] = [{} for _ in weeks]
+    first_month = month_of(data.start_date)
+    for e in data.employees:
+        weights = available.get(e.id, [0] * len(weeks))
+        shift_shares = [None] * len(weeks)
+        hour_shares = [None] * len(weeks)
+        for month, indexes in weeks_by_month.items():
+            month_weights = [weights[i] for i in indexes]
+            if e.target_shifts_per_month is not None:
+                for i, share in zip(indexes, _apportion_int(shifts_budget(data, e, month), month_weights)):
+                    shift_shares[i] = share
+            if e.target_hours_per_month is not None:
+                carried = data.mtd_hours.get(e.id, 0.0) if month == first_month else 0.0
+                remaining = max(0.0, e.target_hours_per_month - carried)
+                for i, share in zip(indexes, _apportion(remaining, month_weights)):
+                    hour_shares[i] = share
+        for i in range(len(weeks)):
+            employees_per_week[i].append(dataclasses.replace(e, target_shifts_per_month=shift_shares[i]))
+            if hour_shares[i] is not None:
+                # build_model budgets target - mtd_hours, so this leaves exactly the week's share
+                mtd_per_week[i][e.id] = e.target_hours_per_month - hour_shares[i]
+
+    pieces = []
+    for i, week in enumerate(weeks):
+        in_week = set(week)
+        pieces.append(dataclasses.replace(
+            data,
+            start_date=week[0],
+            end_date=week[-1],
+            days=week,
+            employees=tuple(employees_per_week[i]),
+            availability=MappingProxyType({k: v for k, v in data.availability.items() if k[1] in in_week}),
+            requirements=MappingProxyType({k: v for k, v in data.requirements.items() if k[0] in in_week}),
+            mtd_hours=MappingProxyType(mtd_per_week[i]),
+            existing=frozenset(k for k in data.existing if k[1] in in_week),
+            # The shift share already is the whole budget of the piece
+            mtd_shifts=MappingProxyType({}),
+        ))
+    return pieces
+
+
+def decompose(data: SolverInput) -> List[SolverInput]:
+    """Split the snapshot into role groups, then each group into weeks."""
+    groups = role_groups(data)
+    parts = [restrict_to_roles(data, group) for group in groups] if len(groups) > 1 else [data]
+
+    pieces = []
+    for part in parts:
+        if not part.employees:
+            continue
+        if len(budget_periods(part.days)) > 1:
+            pieces.extend(split_into_weeks(part))
+        else:
+            pieces.append(part)
+    return pieces
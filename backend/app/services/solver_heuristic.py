@@ -0,0 +1,167 @@
+"""
+Heuristic draft schedules for instant previews.
+
+A greedy pass fills the required slots, scarcest first (fewest available qualified
+staff per opening), always taking the candidate with the best marginal objective.
+A bounded local search then tries to swap each assignment to a better candidate and
+to fill slots left open. Both use the weights of the CP-SAT model
+(`solver_objective`), so a draft scores on the same scale and can be passed to
+`build_model` as a hint. There is no optimality guarantee.
+"""
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from .availability_bitmap import SCHEDULABLE_STATUSES
+from .shift_geometry import geometry_for
+from .solver_input import SolverInput
+from .solver_objective import (
+    FILL_REWARD, EXCESS_SHIFT_PENALTY, EXCESS_HOURS_PENALTY, SPLIT_SHIFT_PENALTY,
+    hours_budget_scaled, month_of, scaled_hours, shifts_budget, status_bonus,
+)
+from .solver_precheck import slot_capacity
+
+# Local search stops after this long even if it could still improve the draft
+DRAFT_SEARCH_BUDGET_SECONDS = 0.05
+
+
+class _Draft:
+    """Assignments plus the per-employee tallies needed to price a move in O(1)."""
+
+    def __init__(self, data: SolverInput):
+        self.data = data
+        geometry = geometry_for(data.shifts)
+        self.hours = {s_id: scaled_hours(hours) for s_id, hours in geometry.hours_by_shift().items()}
+        self.conflicts: Dict[int, Set[int]] = {
+            s_id: {other for other in geometry.ids if geometry.conflict(s_id, other)} for s_id in geometry.ids
+        }
+        months = sorted({month_of(d) for d in data.days})
+        self.hours_budget = {
+            (e.id, month): hours_budget_scaled(data, e, month)
+            for e in data.employees if e.target_hours_per_month is not None for month in months
+        }
+        self.shifts_budget = {
+            (e.id, month): shifts_budget(data, e, month)
+            for e in data.employees if e.target_shifts_per_month is not None for month in months
+        }
+
+        self.assigned: Set[Tuple] = set()
+        self.slot_fill: Dict[Tuple, int] = {}
+        self.day_shifts: Dict[Tuple, Set[int]] = {}
+        self.shift_count: Dict = {}  # (e_id, month) -> shifts
+        self.hours_used: Dict = {}   # (e_id, month) -> scaled hours
+
+    def can_take(self, e_id, d, s_id) -> bool:
+        return not (self.day_shifts.get((e_id, d), set()) & self.conflicts.get(s_id, {s_id}))
+
+    def gain(self, e_id, d, s_id) -> int:
+        """Objective change of giving the employee one more shift."""
+        key = (e_id, month_of(d))
+        value = FILL_REWARD + status_bonus(self.data.availability.get((e_id, d, s_id), "UNKNOWN"))
+        if key in self.shifts_budget and self.shift_count.get(key, 0) + 1 > self.shifts_budget[key]:
+            value -= EXCESS_SHIFT_PENALTY
+        if key in self.hours_budget:
+            used = self.hours_used.get(key, 0)
+            budget = self.hours_budget[key]
+            excess = max(0, used + self.hours.get(s_id, 0) - budget) - max(0, used - budget)
+            value -= EXCESS_HOURS_PENALTY * excess
+        if self.day_shifts.get((e_id, d)):
+            value -= SPLIT_SHIFT_PENALTY
+        return value
+
+    def add(self, key):
+        e_id, d, s_id, r_id = key
+        self.assigned.add(key)
+        self.slot_fill[(d, s_id, r_id)] = self.slot_fill.get((d, s_id, r_id), 0) + 1
+        self.day_shifts.setdefault((e_id, d), set()).add(s_id)
+        month = (e_id, month_of(d))
+        self.shift_count[month] = self.shift_count.get(month, 0) + 1
+        self.hours_used[month] = self.hours_used.get(month, 0) + self.hours.get(s_id, 0)
+
+    def remove(self, key):
+        e_id, d, s_id, r_id = key
+        self.assigned.discard(key)
+        self.slot_fill[(d, s_id, r_id)] -= 1
+        self.day_shifts[(e_id, d)].discard(s_id)
+        month = (e_id, month_of(d))
+        self.shift_count[month] -= 1
+        self.hours_used[month] -= self.hours.get(s_id, 0)
+
+
+def _candidates(data: SolverInput) -> Dict[Tuple, List]:
+    """(date, shift_id, role_id) -> employees who hold the role and are available for it."""
+    weekdays = {s.id: s.weekdays for s in data.shifts}
+    by_role = {}
+    for e in data.employees:
+        for r_id in e.role_ids:
+            by_role.setdefault(r_id, []).append(e.id)
+    candidates = {}
+    for (d, s_id, r_id), required in data.requirements.items():
+        if required <= 0 or d.weekday() not in weekdays.get(s_id, ()):
+            continue
+        candidates[(d, s_id, r_id)] = [
+            e_id for e_id in by_role.get(r_id, ())
+            if data.availability.get((e_id, d, s_id)) in SCHEDULABLE_STATUSES
+        ]
+    return candidates
+
+
+def _fill(draft: _Draft, slot, candidates: List, required: int) -> bool:
+    d, s_id, r_id = slot
+    improved = False
+    while draft.slot_fill.get(slot, 0) < required:
+        options = [
+            (draft.gain(e_id, d, s_id), e_id) for e_id in candidates
+            if (e_id, d, s_id, r_id) not in draft.assigned and draft.can_take(e_id, d, s_id)
+        ]
+        if not options:
+            break
+        gain, e_id = max(options, key=lambda option: (option[0], str(option[1])))
+        if gain <= 0:
+            break
+        draft.add((e_id, d, s_id, r_id))
+        improved = True
+    return improved
+
+
+def draft_schedule(data: SolverInput, search_budget: Optional[float] = DRAFT_SEARCH_BUDGET_SECONDS) -> Set[Tuple]:
+    """
+    Greedy + local-search draft as (employee_id, date, shift_id, role_id) assignments.
+    `search_budget` caps the local search in seconds (None: run until no move improves).
+    """
+    draft = _Draft(data)
+    candidates = _candidates(data)
+    capacity = slot_capacity(data)
+
+    # Greedy: scarcest slots first, so staff who are the only option for a slot are not
+    # used up elsewhere
+    def scarcity(slot):
+        return (capacity.get(slot, 0) / data.requirements[slot], slot[0], slot[1], slot[2])
+
+    slots = sorted(candidates, key=scarcity)
+    for slot in slots:
+        _fill(draft, slot, candidates[slot], data.requirements[slot])
+
+    # Local search: move each assignment to a better candidate, then refill open slots
+    deadline = None if search_budget is None else time.perf_counter() + search_budget
+    improved = True
+    while improved and (deadline is None or time.perf_counter() < deadline):
+        improved = False
+        for key in sorted(draft.assigned, key=lambda k: (k[1], k[2], k[3], str(k[0]))):
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            e_id, d, s_id, r_id = key
+            draft.remove(key)
+            current = draft.gain(e_id, d, s_id)
+            best_gain, best = current, e_id
+            for other in candidates[(d, s_id, r_id)]:
+                if other == e_id or (other, d, s_id, r_id) in draft.assigned or not draft.can_take(other, d, s_id):
+                    continue
+                other_gain = draft.gain(other, d, s_id)
+                if other_gain > best_gain:
+                    best_gain, best = other_gain, other
+            draft.add((best, d, s_id, r_id))
+            improved |= best != e_id
+        for slot in slots:
+            improved |= _fill(draft, slot, candidates[slot], data.requirements[slot])
+
+    return set(draft.assigned)
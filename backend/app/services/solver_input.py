@@ -0,0 +1,230 @@
+"""
+Solver input loading.
+
+Everything the CP-SAT model needs is fetched in a fixed number of queries
+(eager-loaded relationships, column-only selects and SQL aggregation) and
+frozen into a `SolverInput` snapshot. The model builder only reads the
+snapshot, so it never touches the session or triggers lazy loads.
+"""
+from dataclasses import dataclass, field
+from datetime import date, time, timedelta
+from types import MappingProxyType
+from typing import Dict, FrozenSet, Mapping, Optional, Tuple
+from uuid import UUID
+import logging
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, select
+
+from ..models import User, ShiftDefinition, JobRole, StaffingRequirement, Schedule
+from .availability_bitmap import load_availability_matrix
+from .shift_geometry import minute_span
+
+logger = logging.getLogger(__name__)
+
+ALL_WEEKDAYS = frozenset(range(7))
+
+
+@dataclass(frozen=True)
+class EmployeeInput:
+    id: UUID
+    full_name: str
+    role_ids: FrozenSet[int]
+    target_hours_per_month: Optional[int] = None
+    target_shifts_per_month: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class ShiftInput:
+    id: int
+    name: str
+    start_time: time
+    end_time: time
+    weekdays: FrozenSet[int] = ALL_WEEKDAYS
+
+    @property
+    def duration_hours(self) -> float:
+        start, end = minute_span(self.start_time, self.end_time)
+        return (end - start) / 60
+
+
+@dataclass(frozen=True)
+class RoleInput:
+    id: int
+    name: str
+
+
+@dataclass(frozen=True)
+class SolverInput:
+    """
+    Immutable snapshot of the solver inputs for one date range.
+
+    - `availability`: (user_id, date, shift_id) -> status name ("AVAILABLE", ...); loaded
+      from the database as a packed `AvailabilityMatrix`
+    - `requirements`: (date, shift_id, role_id) -> min_count, weekly defaults already
+      overridden by date-specific requirements
+    - `mtd_hours` / `mtd_shifts`: user_id -> hours / shifts scheduled earlier in the month
+      of `start_date`. Months after the first one start from zero (see `solver_objective`).
+    - `existing`: (user_id, date, shift_id, role_id) of the schedule currently saved for
+      the range, used to warm-start re-solves
+    """
+    start_date: date
+    end_date: date
+    days: Tuple[date, ...]
+    employees: Tuple[EmployeeInput, ...]
+    shifts: Tuple[ShiftInput, ...]
+    roles: Tuple[RoleInput, ...]
+    availability: Mapping[Tuple[UUID, date, int], str]
+    requirements: Mapping[Tuple[date, int, int], int]
+    mtd_hours: Mapping[UUID, float]
+    existing: FrozenSet[Tuple[UUID, date, int, int]] = frozenset()
+    mtd_shifts: Mapping[UUID, int] = field(default_factory=lambda: MappingProxyType({}))
+
+
+@dataclass(frozen=True)
+class ChangeSet:
+    """
+    The part of a saved schedule to re-optimise after a small change (e.g. one employee
+    editing their availability for a day).
+
+    An assignment (user_id, date, shift_id, role_id) is in the neighbourhood when its date
+    is in `dates` (any date if empty) and it belongs to one of `user_ids` or to one of
+    the `shift_ids` slots, so others can take over what the affected users give up.
+    With no users and no shifts every assignment on `dates` is free.
+    """
+    user_ids: FrozenSet[UUID] = frozenset()
+    dates: FrozenSet[date] = frozenset()
+    shift_ids: FrozenSet[int] = frozenset()
+
+    def contains(self, key: Tuple[UUID, date, int, int]) -> bool:
+        user_id, d, shift_id, _ = key
+        if self.dates and d not in self.dates:
+            return False
+        if not self.user_ids and not self.shift_ids:
+            return True
+        return user_id in self.user_ids or shift_id in self.shift_ids
+
+
+def date_range(start_date: date, end_date: date) -> Tuple[date, ...]:
+    return tuple(start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1))
+
+
+def status_name(status) -> str:
+    return str(status.value) if hasattr(status, "value") else str(status)
+
+
+def build_requirements(days, requirement_rows) -> Dict[Tuple[date, int, int], int]:
+    """
+    Resolve requirement rows (date, day_of_week, shift_id, role_id, min_count) into a per-day
+    map: weekly (day_of_week) requirements first, overridden by date-specific ones.
+    """
+    in_range = set(days)
+    by_weekday = {}
+    specific = []
+    for req_date, day_of_week, shift_id, role_id, min_count in requirement_rows:
+        if day_of_week is not None:
+            by_weekday.setdefault(day_of_week, []).append((shift_id, role_id, min_count))
+        if req_date is not None and req_date in in_range:
+            specific.append((req_date, shift_id, role_id, min_count))
+
+    requirements = {}
+    for d in days:
+        for shift_id, role_id, min_count in by_weekday.get(d.weekday(), []):
+            requirements[(d, shift_id, role_id)] = min_count
+    for req_date, shift_id, role_id, min_count in specific:
+        requirements[(req_date, shift_id, role_id)] = min_count
+    return requirements
+
+
+class SolverInputLoader:
+    def __init__(self, session: Session):
+        self.session = session
+
+    def load(self, start_date: date, end_date: date) -> SolverInput:
+        days = date_range(start_date, end_date)
+
+        users = self.session.exec(
+            select(User).where(User.is_active == True).options(selectinload(User.job_roles))
+        ).all()
+        employees = tuple(
+            EmployeeInput(
+                id=u.id,
+                full_name=u.full_name,
+                role_ids=frozenset(r.id for r in u.job_roles),
+                target_hours_per_month=u.target_hours_per_month,
+                target_shifts_per_month=u.target_shifts_per_month,
+            )
+            for u in users
+        )
+
+        shift_rows = self.session.exec(
+            select(ShiftDefinition).options(selectinload(ShiftDefinition.days))
+        ).all()
+        shifts = tuple(
+            ShiftInput(
+                id=s.id,
+                name=s.name,
+                start_time=s.start_time,
+                end_time=s.end_time,
+                weekdays=frozenset(link.day_of_week for link in s.days) or ALL_WEEKDAYS,
+            )
+            for s in shift_rows
+        )
+
+        roles = tuple(
+            RoleInput(id=role_id, name=name)
+            for role_id, name in self.session.exec(select(JobRole.id, JobRole.name)).all()
+        )
+
+        # Packed month bitmaps: one row per user and month instead of one per cell
+        availability = load_availability_matrix(self.session, start_date, end_date)
+
+        requirement_rows = self.session.exec(
+            select(
+                StaffingRequirement.date, StaffingRequirement.day_of_week,
+                StaffingRequirement.shift_def_id, StaffingRequirement.role_id, StaffingRequirement.min_count,
+            ).where(or_(
+                StaffingRequirement.day_of_week != None,
+                StaffingRequirement.date.between(start_date, end_date),
+            ))
+        ).all()
+        requirements = build_requirements(days, requirement_rows)
+
+        # Month-to-date hours: count earlier shifts per (user, shift) in SQL, weight by duration here
+        durations = {s.id: s.duration_hours for s in shifts}
+        mtd_hours = {}
+        mtd_shifts = {}
+        for user_id, shift_id, count in self.session.exec(
+            select(Schedule.user_id, Schedule.shift_def_id, func.count())
+            .where(Schedule.date >= start_date.replace(day=1), Schedule.date < start_date)
+            .group_by(Schedule.user_id, Schedule.shift_def_id)
+        ).all():
+            if shift_id in durations:
+                mtd_hours[user_id] = mtd_hours.get(user_id, 0.0) + durations[shift_id] * count
+                mtd_shifts[user_id] = mtd_shifts.get(user_id, 0) + count
+
+        existing = frozenset(
+            tuple(row) for row in self.session.exec(
+                select(Schedule.user_id, Schedule.date, Schedule.shift_def_id, Schedule.role_id)
+                .where(Schedule.date >= start_date, Schedule.date <= end_date)
+            ).all()
+        )
+
+        logger.info(
+            f"Loaded solver input for {start_date} to {end_date}: {len(employees)} employees, "
+            f"{len(shifts)} shifts, {len(availability)} availability entries, {len(requirements)} requirements"
+        )
+        return SolverInput(
+            start_date=start_date,
+            end_date=end_date,
+            days=days,
+            employees=employees,
+            shifts=shifts,
+            roles=roles,
+            availability=availability,
+            requirements=MappingProxyType(requirements),
+            mtd_hours=MappingProxyType(mtd_hours),
+            existing=existing,
+            mtd_shifts=MappingProxyType(mtd_shifts),
+        )
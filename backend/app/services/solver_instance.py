@@ -0,0 +1,135 @@
+"""
+Versioned on-disk format for solver inputs.
+
+A `SolverInput` snapshot is written as (optionally gzipped) JSON so a slow or
+surprising production solve can be replayed offline with `benchmarks.replay`.
+Employee names are replaced by placeholders unless `anonymize=False`; ids are
+kept so assignments can still be matched to the database.
+"""
+import gzip
+import json
+import os
+from datetime import date, datetime, time
+from types import MappingProxyType
+from uuid import UUID
+
+from .solver_input import EmployeeInput, RoleInput, ShiftInput, SolverInput
+
+INSTANCE_FORMAT = "planner-solver-instance"
+INSTANCE_VERSION = 1
+
+
+class InstanceFormatError(ValueError):
+    pass
+
+
+def instance_to_dict(data: SolverInput, anonymize: bool = True) -> dict:
+    return {
+        "format": INSTANCE_FORMAT,
+        "version": INSTANCE_VERSION,
+        "start_date": data.start_date.isoformat(),
+        "end_date": data.end_date.isoformat(),
+        "days": [d.isoformat() for d in data.days],
+        "employees": [
+            {
+                "id": str(e.id),
+                "full_name": f"Employee {i + 1}" if anonymize else e.full_name,
+                "role_ids": sorted(e.role_ids),
+                "target_hours_per_month": e.target_hours_per_month,
+                "target_shifts_per_month": e.target_shifts_per_month,
+            }
+            for i, e in enumerate(data.employees)
+        ],
+        "shifts": [
+            {
+                "id": s.id,
+                "name": s.name,
+                "start_time": s.start_time.isoformat(),
+                "end_time": s.end_time.isoformat(),
+                "weekdays": sorted(s.weekdays),
+            }
+            for s in data.shifts
+        ],
+        "roles": [{"id": r.id, "name": r.name} for r in data.roles],
+        "availability": sorted(
+            [str(e_id), d.isoformat(), s_id, status] for (e_id, d, s_id), status in data.availability.items()
+        ),
+        "requirements": sorted(
+            [d.isoformat(), s_id, r_id, count] for (d, s_id, r_id), count in data.requirements.items()
+        ),
+        "mtd_hours": {str(e_id): hours for e_id, hours in data.mtd_hours.items()},
+        "mtd_shifts": {str(e_id): count for e_id, count in data.mtd_shifts.items()},
+        "existing": sorted([str(e_id), d.isoformat(), s_id, r_id] for e_id, d, s_id, r_id in data.existing),
+    }
+
+
+def instance_from_dict(payload: dict) -> SolverInput:
+    if payload.get("format") != INSTANCE_FORMAT:
+        raise InstanceFormatError("Not a solver instance file")
+    if payload.get("version") != INSTANCE_VERSION:
+        raise InstanceFormatError(f"Unsupported solver instance version {payload.get('version')}")
+
+    return SolverInput(
+        start_date=date.fromisoformat(payload["start_date"]),
+        end_date=date.fromisoformat(payload["end_date"]),
+        days=tuple(date.fromisoformat(d) for d in payload["days"]),
+        employees=tuple(
+            EmployeeInput(
+                id=UUID(e["id"]),
+                full_name=e["full_name"],
+                role_ids=frozenset(e["role_ids"]),
+                target_hours_per_month=e["target_hours_per_month"],
+                target_shifts_per_month=e["target_shifts_per_month"],
+            )
+            for e in payload["employees"]
+        ),
+        shifts=tuple(
+            ShiftInput(
+                id=s["id"],
+                name=s["name"],
+                start_time=time.fromisoformat(s["start_time"]),
+                end_time=time.fromisoformat(s["end_time"]),
+                weekdays=frozenset(s["weekdays"]),
+            )
+            for s in payload["shifts"]
+        ),
+        roles=tuple(RoleInput(id=r["id"], name=r["name"]) for r in payload["roles"]),
+        availability=MappingProxyType({
+            (UUID(e_id), date.fromisoformat(d), s_id): status
+            for e_id, d, s_id, status in payload["availability"]
+        }),
+        requirements=MappingProxyType({
+            (date.fromisoformat(d), s_id, r_id): count
+            for d, s_id, r_id, count in payload["requirements"]
+        }),
+        mtd_hours=MappingProxyType({UUID(e_id): hours for e_id, hours in payload["mtd_hours"].items()}),
+        existing=frozenset(
+            (UUID(e_id), date.fromisoformat(d), s_id, r_id) for e_id, d, s_id, r_id in payload["existing"]
+        ),
+        # Added after version 1 was first written; older files have no shift counts
+        mtd_shifts=MappingProxyType({UUID(e_id): count for e_id, count in payload.get("mtd_shifts", {}).items()}),
+    )
+
+
+def _open(path: str, mode: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def save_instance(data: SolverInput, path: str, anonymize: bool = True) -> str:
+    with _open(path, "w") as f:
+        json.dump(instance_to_dict(data, anonymize=anonymize), f, separators=(",", ":"))
+    return path
+
+
+def load_instance(path: str) -> SolverInput:
+    with _open(path, "r") as f:
+        return instance_from_dict(json.load(f))
+
+
+def export_instance(data: SolverInput, directory: str, anonymize: bool = True) -> str:
+    """Write the snapshot into `directory` under a timestamped name; returns the path."""
+    os.makedirs(directory, exist_ok=True)
+    name = f"{data.start_date}_{data.end_date}_{datetime.utcnow():%Y%m%dT%H%M%S%f}.json.gz"
+    return save_instance(data, os.path.join(directory, name), anonymize=anonymize)
@@ -0,0 +1,480 @@
+"""
+Background execution of schedule generation.
+
+CP-SAT solves are CPU-bound and can take the whole solver time budget, so they
+are not run inside request threads. Jobs are queued on a bounded process pool
+(one solve per worker process, no GIL contention with the API) and the API only
+keeps track of job state. Each worker process opens its own DB session.
+
+While a job runs, every improving solution found by CP-SAT is reported back as
+a progress event (over a multiprocessing queue when running on the process pool)
+so clients can follow the search and stop it once the draft is good enough.
+
+What-if scenario jobs (`submit_scenarios`) fan out into one task per scenario on
+the same pool, all solving overlays of one snapshot loaded by the API.
+
+Jobs submitted with a `cache_key` (an input fingerprint, see `solver_cache`) are
+answered from the result cache when the same inputs were solved recently; such a
+job is created already finished.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import CancelledError, Executor, Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional
+from uuid import UUID, uuid4
+
+from fastapi import HTTPException
+
+from .solver_cache import SolveCache, solve_cache
+from .solver_profiles import SOLVER_MAX_THREADS, limit_solver_threads
+
+logger = logging.getLogger(__name__)
+
+SOLVER_MAX_WORKERS = int(os.getenv("SOLVER_MAX_WORKERS", "2"))
+SOLVER_MAX_PENDING_JOBS = int(os.getenv("SOLVER_MAX_PENDING_JOBS", "20"))
+SOLVER_JOB_TTL_SECONDS = int(os.getenv("SOLVER_JOB_TTL_SECONDS", "3600"))
+
+
+class SolverJobStatus(str, Enum):
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    SUCCEEDED = "SUCCEEDED"
+    FAILED = "FAILED"
+    CANCELLED = "CANCELLED"
+
+
+class SolverProgress:
+    """
+    Handle passed to the runner: `emit` publishes a progress event for the job and
+    `stop_event` is set when the client asks the search to stop early.
+    Picklable when built from multiprocessing manager proxies.
+    """
+
+    def __init__(self, job_id: UUID, sink, stop_event):
+        self.job_id = job_id
+        self.sink = sink
+        self.stop_event = stop_event
+
+    def emit(self, event: dict):
+        self.sink.put((self.job_id, event))
+
+
+def run_solve_job(
+    start_date: date,
+    end_date: date,
+    progress: Optional[SolverProgress] = None,
+    snapshot: Optional[dict] = None,
+    **options,
+) -> dict:
+    """
+    Entry point executed inside a worker process. `options` are passed on to `SolverService.solve`.
+    `snapshot` is the input already loaded by the API, in instance format; it is solved
+    instead of loading the range again.
+    """
+    from sqlmodel import Session
+    from ..database import engine
+    from .solver import SolverService
+    from .solver_instance import instance_from_dict
+
+    with Session(engine) as session:
+        # Draft Mode: the manager reviews the result and saves it via /save_batch
+        return SolverService(session).solve(
+            start_date,
+            end_date,
+            save=False,
+            on_solution=progress.emit if progress else None,
+            stop_event=progress.stop_event if progress else None,
+            data=instance_from_dict(snapshot) if snapshot is not None else None,
+            **options,
+        )
+
+
+def run_scenario_job(
+    base: dict, scenario: Optional[dict], progress: Optional[SolverProgress] = None, num_workers: int = 0
+) -> dict:
+    """
+    Entry point for one what-if scenario (None: the unchanged base). `base` is the
+    snapshot in instance format, so it pickles without touching the database.
+    """
+    from .solver_instance import instance_from_dict
+    from .solver_scenarios import solve_scenario
+
+    row = solve_scenario(
+        instance_from_dict(base),
+        scenario,
+        num_workers=num_workers,
+        stop_event=progress.stop_event if progress else None,
+    )
+    if progress:
+        progress.emit({"type": "scenario", **row})
+    return row
+
+
+def _gather(parts: List[Future], combine: Callable[[List[Any]], Any]) -> Future:
+    """A running future resolved with `combine(results)` once every part is done."""
+    combined = Future()
+    combined.set_running_or_notify_cancel()
+    remaining = [len(parts)]
+    lock = threading.Lock()
+
+    def on_part_done(_):
+        with lock:
+            remaining[0] -= 1
+            if remaining[0]:
+                return
+        if any(part.cancelled() for part in parts):
+            combined.set_exception(CancelledError("A scenario was cancelled"))
+            return
+        errors = [part.exception() for part in parts if part.exception() is not None]
+        if errors:
+            combined.set_exception(errors[0])
+            return
+        try:
+            combined.set_result(combine([part.result() for part in parts]))
+        except Exception as e:
+            combined.set_exception(e)
+
+    for part in parts:
+        part.add_done_callback(on_part_done)
+    return combined
+
+
+@dataclass
+class SolverJob:
+    id: UUID
+    start_date: date
+    end_date: date
+    requested_by: Optional[UUID] = None
+    options: Dict[str, Any] = field(default_factory=dict)
+    cache_key: Optional[str] = None
+    cached: bool = False
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+    cancel_requested: bool = False
+    future: Optional[Future] = None
+    stop_event: Any = None
+    events: List[dict] = field(default_factory=list)
+    events_closed: bool = False
+    _events_changed: threading.Condition = field(default_factory=threading.Condition, repr=False)
+
+    def add_event(self, event: dict, last: bool = False):
+        with self._events_changed:
+            if self.events_closed:
+                return
+            self.events.append(event)
+            self.events_closed = last
+            self._events_changed.notify_all()
+
+    def wait_for_events(self, after: int, timeout: float) -> List[dict]:
+        """Events after index `after`, blocking up to `timeout` seconds for new ones."""
+        with self._events_changed:
+            self._events_changed.wait_for(
+                lambda: len(self.events) > after or self.events_closed, timeout=timeout
+            )
+            return self.events[after:]
+
+    @property
+    def status(self) -> SolverJobStatus:
+        if self.cancel_requested or (self.future is not None and self.future.cancelled()):
+            return SolverJobStatus.CANCELLED
+        if self.future is None:
+            return SolverJobStatus.QUEUED
+        if self.future.done():
+            if self.future.exception() is not None:
+                return SolverJobStatus.FAILED
+            return SolverJobStatus.SUCCEEDED
+        if self.future.running():
+            return SolverJobStatus.RUNNING
+        return SolverJobStatus.QUEUED
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (SolverJobStatus.SUCCEEDED, SolverJobStatus.FAILED, SolverJobStatus.CANCELLED)
+
+    @property
+    def error(self) -> Optional[str]:
+        if self.status == SolverJobStatus.FAILED:
+            return str(self.future.exception())
+        return None
+
+    @property
+    def result(self) -> Optional[dict]:
+        if self.status == SolverJobStatus.SUCCEEDED:
+            return self.future.result()
+        return None
+
+
+class SolverJobManager:
+    """Tracks solver jobs and dispatches them to a bounded worker pool."""
+
+    def __init__(
+        self,
+        max_workers: int = SOLVER_MAX_WORKERS,
+        max_pending: int = SOLVER_MAX_PENDING_JOBS,
+        executor: Optional[Executor] = None,
+        runner: Callable[..., dict] = run_solve_job,
+        scenario_runner: Callable[..., dict] = run_scenario_job,
+        cache: Optional[SolveCache] = solve_cache,
+    ):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = executor
+        self._runner = runner
+        self._scenario_runner = scenario_runner
+        self.cache = cache
+        self._jobs: Dict[UUID, SolverJob] = {}
+        self._lock = threading.Lock()
+        self._mp_manager = None
+        self._event_queue = None
+        self._collector: Optional[threading.Thread] = None
+
+    def _get_executor(self) -> Executor:
+        # Created lazily so importing the app never spawns processes.
+        # "spawn" avoids forking a process that holds open DB connections and threads.
+        if self._executor is None:
+            # Each worker process gets an equal share of the solver thread cap
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=limit_solver_threads,
+                initargs=(max(1, SOLVER_MAX_THREADS // self.max_workers),),
+            )
+        return self._executor
+
+    def _uses_processes(self) -> bool:
+        return isinstance(self._get_executor(), ProcessPoolExecutor)
+
+    def _progress_for(self, job: SolverJob) -> SolverProgress:
+        if not self._uses_processes():
+            job.stop_event = threading.Event()
+            return SolverProgress(job.id, _LocalEventSink(self), job.stop_event)
+
+        with self._lock:
+            if self._mp_manager is None:
+                self._mp_manager = multiprocessing.get_context("spawn").Manager()
+                self._event_queue = self._mp_manager.Queue()
+                self._collector = threading.Thread(
+                    target=self._collect_events, name="solver-events", daemon=True
+                )
+                self._collector.start()
+        job.stop_event = self._mp_manager.Event()
+        return SolverProgress(job.id, self._event_queue, job.stop_event)
+
+    def _collect_events(self):
+        event_queue = self._event_queue
+        while True:
+            try:
+                item = event_queue.get()
+            except (EOFError, OSError):
+                return
+            if item is None:
+                return
+            self._record_event(*item)
+
+    def _record_event(self, job_id: UUID, event: dict):
+        job = self._jobs.get(job_id)
+        if job is not None:
+            job.add_event(event, last=event.get("type") == "done")
+
+    def _prune(self):
+        now = datetime.utcnow()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at and (now - job.finished_at).total_seconds() > SOLVER_JOB_TTL_SECONDS
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _pending_jobs(self) -> List[SolverJob]:
+        return [j for j in self._jobs.values() if not j.is_finished]
+
+    def submit(
+        self,
+        start_date: date,
+        end_date: date,
+        requested_by: Optional[UUID] = None,
+        options: Optional[Dict[str, Any]] = None,
+        cache_key: Optional[str] = None,
+        snapshot=None,
+    ) -> SolverJob:
+        """
+        Queue a solve; `options` are keyword arguments for the runner (e.g. warm_start).
+        With a `cache_key`, a cached result for the same key is returned as a finished job.
+        A `snapshot` (the SolverInput the caller loaded, e.g. to compute `cache_key`) is
+        shipped to the worker so the range is not loaded a second time.
+        """
+        cached = self.cache.get(cache_key) if self.cache is not None and cache_key else None
+        if cached is not None:
+            return self._finished_from_cache(start_date, end_date, requested_by, options, cache_key, cached)
+
+        job = self._register(SolverJob(
+            id=uuid4(), start_date=start_date, end_date=end_date,
+            requested_by=requested_by, options=dict(options or {}), cache_key=cache_key,
+        ))
+
+        runner_args = dict(job.options)
+        if snapshot is not None:
+            from .solver_instance import instance_to_dict
+            # Picklable for the worker process, unlike the snapshot's read-only mappings
+            runner_args["snapshot"] = instance_to_dict(snapshot, anonymize=False)
+        progress = self._progress_for(job)
+        job.future = self._get_executor().submit(self._runner, start_date, end_date, progress, **runner_args)
+        job.future.add_done_callback(lambda _: self._on_done(job, progress))
+        logger.info(f"Queued solver job {job.id} for {start_date} to {end_date}")
+        return job
+
+    def submit_scenarios(
+        self,
+        base,
+        scenarios: List[Dict[str, Any]],
+        requested_by: Optional[UUID] = None,
+    ) -> SolverJob:
+        """
+        Solve the `base` SolverInput and each scenario overlay (see `solver_scenarios`) as
+        separate tasks on the worker pool. The job result is the comparison table, base first.
+        """
+        from .solver_instance import instance_to_dict
+        from .solver_scenarios import comparison_table
+
+        job = self._register(SolverJob(
+            id=uuid4(), start_date=base.start_date, end_date=base.end_date,
+            requested_by=requested_by, options={"scenarios": [scenario["name"] for scenario in scenarios]},
+        ))
+        progress = self._progress_for(job)
+        payload = instance_to_dict(base, anonymize=False)
+        # The scenarios share the cores, as the pieces of a decomposed solve do
+        num_workers = max(1, SOLVER_MAX_THREADS // max(1, min(self.max_workers, len(scenarios) + 1)))
+        executor = self._get_executor()
+        parts = [
+            executor.submit(self._scenario_runner, payload, scenario, progress, num_workers)
+            for scenario in [None, *scenarios]
+        ]
+        job.future = _gather(parts, lambda rows: {"status": "success", "scenarios": comparison_table(rows)})
+        job.future.add_done_callback(lambda _: self._on_done(job, progress))
+        logger.info(f"Queued {len(scenarios)} scenario(s) as solver job {job.id}")
+        return job
+
+    def _register(self, job: SolverJob) -> SolverJob:
+        with self._lock:
+            self._prune()
+            if len(self._pending_jobs()) >= self.max_pending:
+                raise HTTPException(status_code=503, detail="Solver queue is full, try again later")
+            self._jobs[job.id] = job
+        return job
+
+    def _finished_from_cache(self, start_date, end_date, requested_by, options, cache_key, result) -> SolverJob:
+        future = Future()
+        future.set_result(result)
+        job = SolverJob(
+            id=uuid4(), start_date=start_date, end_date=end_date, requested_by=requested_by,
+            options=dict(options or {}), cache_key=cache_key, cached=True, future=future,
+            finished_at=datetime.utcnow(), events_closed=True,
+        )
+        job.events.append({"type": "done", "status": job.status.value, "error": None})
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        logger.info(f"Solver job {job.id} for {start_date} to {end_date} served from cache")
+        return job
+
+    def _on_done(self, job: SolverJob, progress: SolverProgress):
+        job.finished_at = datetime.utcnow()
+        if job.status == SolverJobStatus.FAILED:
+            logger.error(f"Solver job {job.id} failed: {job.error}")
+        else:
+            logger.info(f"Solver job {job.id} finished with status {job.status.value}")
+        # A search stopped early is not the answer a fresh solve would give
+        if (job.cache_key and self.cache is not None and job.status == SolverJobStatus.SUCCEEDED
+                and not job.stop_event.is_set()):
+            self.cache.put(job.cache_key, job.start_date, job.end_date, job.result)
+        # Sent through the same channel as the solutions so it is always the last event
+        try:
+            progress.emit({"type": "done", "status": job.status.value, "error": job.error})
+        except (EOFError, OSError):
+            job.add_event({"type": "done", "status": job.status.value, "error": job.error}, last=True)
+
+    def get(self, job_id: UUID) -> SolverJob:
+        job = self._jobs.get(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Solver job not found")
+        return job
+
+    def queue_position(self, job: SolverJob) -> Optional[int]:
+        """1-based position among jobs still waiting for a worker, None once started."""
+        if job.status != SolverJobStatus.QUEUED:
+            return None
+        with self._lock:
+            waiting = [
+                j for j in self._jobs.values()
+                if j.status == SolverJobStatus.QUEUED and j.created_at <= job.created_at
+            ]
+        return len(waiting)
+
+    def cancel(self, job_id: UUID) -> SolverJob:
+        job = self.get(job_id)
+        if job.is_finished:
+            raise HTTPException(status_code=409, detail=f"Solver job already {job.status.value}")
+        # Queued jobs never start. A running job is asked to stop searching and its
+        # result is discarded once it finishes.
+        if not job.future.cancel():
+            job.cancel_requested = True
+            job.stop_event.set()
+        logger.info(f"Cancelled solver job {job.id}")
+        return job
+
+    def stop(self, job_id: UUID) -> SolverJob:
+        """Stop the search of a running job early, keeping the best solution found so far."""
+        job = self.get(job_id)
+        if job.is_finished:
+            raise HTTPException(status_code=409, detail=f"Solver job already {job.status.value}")
+        if job.status != SolverJobStatus.RUNNING:
+            raise HTTPException(status_code=409, detail="Solver job has not started yet, cancel it instead")
+        job.stop_event.set()
+        logger.info(f"Stop requested for solver job {job.id}")
+        return job
+
+    def to_dict(self, job: SolverJob) -> Dict[str, Any]:
+        return {
+            "job_id": job.id,
+            "status": job.status.value,
+            "start_date": job.start_date,
+            "end_date": job.end_date,
+            "created_at": job.created_at,
+            "finished_at": job.finished_at,
+            "queue_position": self.queue_position(job),
+            "error": job.error,
+            "solutions_found": sum(1 for e in job.events if e.get("type") == "solution"),
+            "cached": job.cached,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._mp_manager is not None:
+            self._event_queue.put(None)
+            self._mp_manager.shutdown()
+            self._mp_manager = None
+            self._event_queue = None
+
+
+class _LocalEventSink:
+    """Delivers progress events directly when jobs run in this process (thread executors)."""
+
+    def __init__(self, manager: SolverJobManager):
+        self._manager = manager
+
+    def put(self, item):
+        self._manager._record_event(*item)
+
+
+solver_jobs = SolverJobManager()
+
+
+def get_solver_job_manager() -> SolverJobManager:
+    return solver_jobs
@@ -0,0 +1,92 @@
+"""
+Objective weights of the schedule model, shared by the CP-SAT model builder and the
+heuristic draft engine, plus a plain-Python evaluation of that objective.
+
+Monthly targets are budgeted per calendar month. The month of `start_date` carries
+what was worked before the range (`mtd_hours` / `mtd_shifts`); any later month in
+the range starts from zero.
+"""
+from datetime import date
+from typing import Dict, Iterable, Optional, Tuple
+
+from .solver_input import SolverInput
+
+# Filling a required slot outweighs every penalty below, so coverage comes first
+FILL_REWARD = 50000
+PREFERRED_BONUS = 2000
+AVAILABLE_BONUS = 500
+# Per shift over `target_shifts_per_month`
+EXCESS_SHIFT_PENALTY = 2000
+# Hours are scaled by 10 to stay integral; 100 per scaled unit is 1000 per hour
+HOURS_SCALE = 10
+EXCESS_HOURS_PENALTY = 100
+# Per extra shift worked on the same day
+SPLIT_SHIFT_PENALTY = 50
+
+
+def status_bonus(status: str) -> int:
+    if status == "PREFERRED":
+        return PREFERRED_BONUS
+    if status == "AVAILABLE":
+        return AVAILABLE_BONUS
+    return 0
+
+
+def scaled_hours(hours: float) -> int:
+    return int(hours * HOURS_SCALE)
+
+
+def month_of(d: date) -> Tuple[int, int]:
+    return d.year, d.month
+
+
+def hours_budget_scaled(data: SolverInput, employee, month: Optional[Tuple[int, int]] = None) -> int:
+    """Scaled hours left in `month` (default: the first month) before the monthly hours target."""
+    carried = data.mtd_hours.get(employee.id, 0.0) if month in (None, month_of(data.start_date)) else 0.0
+    return scaled_hours(max(0, employee.target_hours_per_month - carried))
+
+
+def shifts_budget(data: SolverInput, employee, month: Optional[Tuple[int, int]] = None) -> int:
+    """Shifts left in `month` (default: the first month) before the monthly shift target."""
+    carried = data.mtd_shifts.get(employee.id, 0) if month in (None, month_of(data.start_date)) else 0
+    return max(0, employee.target_shifts_per_month - carried)
+
+
+def evaluate(data: SolverInput, assignments: Iterable[Tuple]) -> int:
+    """
+    Objective value (as maximised by `build_model`, without re-solve terms) of a set of
+    (employee_id, date, shift_id, role_id) assignments. Feasibility is not checked.
+    """
+    assignments = list(assignments)
+    value = 0
+    shifts_per_day: Dict = {}
+    for e_id, d, s_id, _ in assignments:
+        value += FILL_REWARD + status_bonus(data.availability.get((e_id, d, s_id), "UNKNOWN"))
+        shifts_per_day[(e_id, d)] = shifts_per_day.get((e_id, d), 0) + 1
+    excess_shifts, excess_hours = monthly_excess(data, assignments)
+    value -= EXCESS_SHIFT_PENALTY * excess_shifts + EXCESS_HOURS_PENALTY * excess_hours
+    value -= SPLIT_SHIFT_PENALTY * sum(count - 1 for count in shifts_per_day.values())
+    return value
+
+
+def monthly_excess(data: SolverInput, assignments: Iterable[Tuple]) -> Tuple[int, int]:
+    """Shifts and scaled hours over the monthly targets, summed over employees and months."""
+    durations = {s.id: scaled_hours(s.duration_hours) for s in data.shifts}
+    shifts: Dict = {}
+    hours: Dict = {}
+    for e_id, d, s_id, _ in assignments:
+        key = (e_id, month_of(d))
+        shifts[key] = shifts.get(key, 0) + 1
+        hours[key] = hours.get(key, 0) + durations.get(s_id, 0)
+
+    employees = {e.id: e for e in data.employees}
+    excess_shifts = excess_hours = 0
+    for (e_id, month), count in shifts.items():
+        e = employees.get(e_id)
+        if e is None:
+            continue
+        if e.target_shifts_per_month is not None:
+            excess_shifts += max(0, count - shifts_budget(data, e, month))
+        if e.target_hours_per_month is not None:
+            excess_hours += max(0, hours[(e_id, month)] - hours_budget_scaled(data, e, month))
+    return excess_shifts, excess_hours
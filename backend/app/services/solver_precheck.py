@@ -0,0 +1,71 @@
+"""
+Counting pre-pass run before the CP-SAT model is built.
+
+For every required (date, shift, role) slot it counts the qualified employees who
+marked themselves available. That is an upper bound on how many people the solver
+could ever put there, so slots below their requirement can be reported (with a
+reason) in milliseconds, and a range where no required slot can be filled at all
+does not need a model.
+"""
+from datetime import date
+from typing import Dict, List, Tuple
+
+from .availability_bitmap import SCHEDULABLE_STATUSES
+from .solver_input import SolverInput
+
+
+def slot_capacity(data: SolverInput) -> Dict[Tuple[date, int, int], int]:
+    """(date, shift_id, role_id) -> number of qualified employees available for the slot."""
+    roles_of = {e.id: e.role_ids for e in data.employees}
+    weekdays = {s.id: s.weekdays for s in data.shifts}
+    capacity = {}
+    for (e_id, d, s_id), status in data.availability.items():
+        if status not in SCHEDULABLE_STATUSES or d.weekday() not in weekdays.get(s_id, ()):
+            continue
+        for r_id in roles_of.get(e_id, ()):
+            capacity[(d, s_id, r_id)] = capacity.get((d, s_id, r_id), 0) + 1
+    return capacity
+
+
+def capacity_shortages(data: SolverInput, capacity: Dict[Tuple[date, int, int], int]) -> List[dict]:
+    """Required slots that cannot be fully staffed whatever the solver does, with the reason."""
+    shifts = {s.id: s for s in data.shifts}
+    role_names = {r.id: r.name for r in data.roles}
+    role_holders = {}
+    for e in data.employees:
+        for r_id in e.role_ids:
+            role_holders[r_id] = role_holders.get(r_id, 0) + 1
+
+    shortages = []
+    for (d, s_id, r_id), required in sorted(data.requirements.items(), key=lambda item: item[0]):
+        available = capacity.get((d, s_id, r_id), 0)
+        if required <= 0 or available >= required:
+            continue
+        shift = shifts.get(s_id)
+        if shift is None or d.weekday() not in shift.weekdays:
+            reason = "Shift is not run on this weekday"
+        elif not role_holders.get(r_id):
+            reason = "No active employee holds this role"
+        elif not available:
+            reason = "No qualified employee is available"
+        else:
+            reason = f"Only {available} of {role_holders[r_id]} qualified employees are available"
+        shortages.append({
+            "date": d.isoformat(),
+            "shift_def_id": s_id,
+            "role_id": r_id,
+            "role_name": role_names.get(r_id, "Unknown"),
+            "shift_name": shift.name if shift else "Unknown",
+            "required": required,
+            "available": available,
+            "missing": required - available,
+            "reason": reason,
+        })
+    return shortages
+
+
+def nothing_fillable(data: SolverInput, capacity: Dict[Tuple[date, int, int], int]) -> bool:
+    """True when no required slot has anyone available, i.e. the optimal schedule is empty."""
+    return not any(
+        required > 0 and capacity.get(slot, 0) > 0 for slot, required in data.requirements.items()
+    )
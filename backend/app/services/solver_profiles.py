@@ -0,0 +1,111 @@
+"""
+CP-SAT search profiles and the cap on concurrent solver threads.
+
+A profile sets how hard one solve searches: the number of parallel search workers
+(CP-SAT runs a portfolio of different strategies, one per worker), the wall-clock
+and deterministic time limits, the relative gap at which a solution is good enough,
+and which portfolio members to leave out. Deterministic time counts search work,
+not seconds, so a profile stops at the same point on a loaded or slower host; the
+wall-clock limit only remains as a backstop.
+
+Every CP-SAT solve takes its workers from a process-wide `ThreadBudget`. The job
+manager gives each worker process an equal share of `SOLVER_MAX_THREADS`, so
+simultaneous solves never run more search threads than the host has cores.
+"""
+import os
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional, Tuple
+
+# Total CP-SAT search threads for all concurrent solves (default: one per core)
+SOLVER_MAX_THREADS = int(os.getenv("SOLVER_MAX_THREADS", "0")) or (os.cpu_count() or 1)
+
+
+@dataclass(frozen=True)
+class SolveProfile:
+    name: str
+    num_workers: int
+    time_limit: float
+    deterministic_time: float
+    # Stop once the objective is within this fraction of the best bound
+    relative_gap: float
+    linearization_level: int = 1
+    ignore_subsolvers: Tuple[str, ...] = ()
+
+    def apply(self, parameters, time_limit: Optional[float] = None, num_workers: Optional[int] = None):
+        """
+        Set CP-SAT `parameters`. A `time_limit` other than the profile's (a share for
+        one piece of a split solve) scales the deterministic budget along with it.
+        """
+        time_limit = self.time_limit if time_limit is None else time_limit
+        parameters.max_time_in_seconds = time_limit
+        parameters.max_deterministic_time = self.deterministic_time * time_limit / self.time_limit
+        parameters.relative_gap_limit = self.relative_gap
+        parameters.num_workers = num_workers or self.num_workers
+        parameters.linearization_level = self.linearization_level
+        for name in self.ignore_subsolvers:
+            parameters.ignore_subsolvers.append(name)
+
+
+PROFILES: Dict[str, SolveProfile] = {
+    # Quick drafts: a few workers, no LP-heavy portfolio members, stop within 2%
+    "fast": SolveProfile(
+        name="fast", num_workers=4, time_limit=3.0, deterministic_time=5.0, relative_gap=0.02,
+        linearization_level=0, ignore_subsolvers=("max_lp", "lb_tree_search"),
+    ),
+    "balanced": SolveProfile(
+        name="balanced", num_workers=8, time_limit=10.0, deterministic_time=30.0, relative_gap=0.0,
+    ),
+    # Final schedules: the full portfolio with a stronger LP relaxation, searched to optimality
+    "thorough": SolveProfile(
+        name="thorough", num_workers=16, time_limit=60.0, deterministic_time=240.0, relative_gap=0.0,
+        linearization_level=2,
+    ),
+}
+DEFAULT_PROFILE = "balanced"
+
+
+def get_profile(name: Optional[str]) -> SolveProfile:
+    return PROFILES[name or DEFAULT_PROFILE]
+
+
+class ThreadBudget:
+    """Counting semaphore over the CP-SAT search threads of this process."""
+
+    def __init__(self, total: int):
+        self.total = max(1, total)
+        self._in_use = 0
+        self._cond = threading.Condition()
+
+    def resize(self, total: int):
+        with self._cond:
+            self.total = max(1, total)
+            self._cond.notify_all()
+
+    def _grant(self, wanted: int) -> int:
+        return max(1, min(wanted, self.total))
+
+    @contextmanager
+    def acquire(self, wanted: int) -> Iterator[int]:
+        """Wait until `wanted` threads (at most the whole budget) are free; yields the grant."""
+        # The grant is re-read on every wake-up: a resize while waiting may shrink the budget below it
+        with self._cond:
+            self._cond.wait_for(lambda: self._in_use + self._grant(wanted) <= self.total)
+            granted = self._grant(wanted)
+            self._in_use += granted
+        try:
+            yield granted
+        finally:
+            with self._cond:
+                self._in_use -= granted
+                self._cond.notify_all()
+
+
+thread_budget = ThreadBudget(SOLVER_MAX_THREADS)
+
+
+def limit_solver_threads(total: int):
+    """Process pool initializer: this worker's share of `SOLVER_MAX_THREADS`."""
+    thread_budget.resize(total)
+
@@ -0,0 +1,87 @@
+"""
+Rolling-horizon slicing of a solver snapshot.
+
+A quarter solved as one model grows super-linearly in memory and search time. The
+rolling horizon instead solves consecutive windows of `window_days`. Each window
+commits only its first `commit_days` (the rest is lookahead, so the decisions near
+the cut still see what follows) and the next window starts right after the
+committed part. The last window commits everything it covers.
+
+Monthly budgets carry forward: a window starting mid-month counts the hours and
+shifts of the month scheduled before the range (`mtd_hours` / `mtd_shifts`) plus
+everything committed by earlier windows in that month. Lookahead days in the next
+month start that month from zero, like any later month (see `solver_objective`).
+"""
+import dataclasses
+from datetime import date
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Sequence, Tuple
+from uuid import UUID
+
+from .solver_input import SolverInput
+from .solver_objective import month_of
+
+ROLLING_WINDOW_DAYS = 14
+ROLLING_COMMIT_DAYS = 7
+
+
+def horizon_windows(
+    days: Sequence[date], window_days: int = ROLLING_WINDOW_DAYS, commit_days: int = ROLLING_COMMIT_DAYS
+) -> List[Tuple[Tuple[date, ...], Tuple[date, ...]]]:
+    """(window days, days committed from it); the committed parts partition `days`."""
+    if not 1 <= commit_days <= window_days:
+        raise ValueError("commit_days must be between 1 and window_days")
+    windows = []
+    i = 0
+    while i < len(days):
+        window = tuple(days[i:i + window_days])
+        commit = window if i + window_days >= len(days) else window[:commit_days]
+        windows.append((window, commit))
+        i += len(commit)
+    return windows
+
+
+class RollingHorizon:
+    """Per-day indexes of a snapshot (built once) and the budgets committed so far."""
+
+    def __init__(self, data: SolverInput):
+        self.data = data
+        self.durations = {s.id: s.duration_hours for s in data.shifts}
+        self.availability: Dict[date, list] = {}
+        for key, status in data.availability.items():
+            self.availability.setdefault(key[1], []).append((key, status))
+        self.requirements: Dict[date, list] = {}
+        for key, count in data.requirements.items():
+            self.requirements.setdefault(key[0], []).append((key, count))
+        self.existing: Dict[date, list] = {}
+        for key in data.existing:
+            self.existing.setdefault(key[1], []).append(key)
+
+        first_month = month_of(data.start_date)
+        self.hours: Dict[Tuple[UUID, Tuple[int, int]], float] = {
+            (e_id, first_month): hours for e_id, hours in data.mtd_hours.items()
+        }
+        self.shifts: Dict[Tuple[UUID, Tuple[int, int]], int] = {
+            (e_id, first_month): count for e_id, count in data.mtd_shifts.items()
+        }
+
+    def window_input(self, days: Tuple[date, ...]) -> SolverInput:
+        """The snapshot restricted to `days`, carrying what is committed in the first day's month."""
+        month = month_of(days[0])
+        return dataclasses.replace(
+            self.data,
+            start_date=days[0],
+            end_date=days[-1],
+            days=days,
+            availability=MappingProxyType({k: v for d in days for k, v in self.availability.get(d, ())}),
+            requirements=MappingProxyType({k: v for d in days for k, v in self.requirements.get(d, ())}),
+            existing=frozenset(k for d in days for k in self.existing.get(d, ())),
+            mtd_hours=MappingProxyType({e_id: h for (e_id, m), h in self.hours.items() if m == month}),
+            mtd_shifts=MappingProxyType({e_id: n for (e_id, m), n in self.shifts.items() if m == month}),
+        )
+
+    def commit(self, assignments: Iterable[Tuple]):
+        for e_id, d, s_id, _ in assignments:
+            key = (e_id, month_of(d))
+            self.hours[key] = self.hours.get(key, 0.0) + self.durations.get(s_id, 0.0)
+            self.shifts[key] = self.shifts.get(key, 0) + 1
@@ -0,0 +1,136 @@
+"""
+What-if scenarios on top of one loaded solver snapshot.
+
+A scenario is a named overlay on the base `SolverInput`:
+
+- `requirements`: set (`min_count`) or shift (`delta`) the staffing requirement of a
+  role/shift, either on one `date` or on every `day_of_week` in the range
+- `availability`: override the availability status of an employee for a shift
+- `remove_user_ids`: solve without these employees
+- `add_staff`: hypothetical hires, available for every shift in the range
+
+The base snapshot is loaded once; each scenario is applied and solved independently
+(`solve_scenario`), typically as one task per scenario on the solver process pool.
+Rows of the comparison table are produced by `scenario_metrics`.
+"""
+import dataclasses
+import logging
+from datetime import date
+from types import MappingProxyType
+from typing import List, Optional, Set, Tuple
+from uuid import UUID, uuid5
+
+from ortools.sat import cp_model_pb2
+
+from .solver import SOLVER_TIME_LIMIT_SECONDS, _solve_model, build_model
+from .solver_input import EmployeeInput, SolverInput, status_name
+from .solver_objective import HOURS_SCALE, evaluate, monthly_excess
+
+logger = logging.getLogger(__name__)
+
+BASE_SCENARIO = "base"
+
+# Hypothetical hires get stable ids so repeated runs compare like with like
+_HIRE_NAMESPACE = UUID("6f0d8b52-1c5e-4f38-9f0e-2b7f6d3c9a41")
+
+
+def _matching_days(data: SolverInput, patch: dict) -> List[date]:
+    if patch.get("date") is not None:
+        d = patch["date"]
+        return [d] if data.start_date <= d <= data.end_date else []
+    return [d for d in data.days if d.weekday() == patch["day_of_week"]]
+
+
+def apply_scenario(data: SolverInput, scenario: dict) -> SolverInput:
+    """The base snapshot with the scenario's overlays applied (the base is not modified)."""
+    requirements = dict(data.requirements)
+    for patch in scenario.get("requirements", ()):
+        for d in _matching_days(data, patch):
+            key = (d, patch["shift_def_id"], patch["role_id"])
+            if patch.get("min_count") is not None:
+                requirements[key] = patch["min_count"]
+            else:
+                requirements[key] = max(0, requirements.get(key, 0) + patch["delta"])
+
+    availability = dict(data.availability)
+    for patch in scenario.get("availability", ()):
+        availability[(patch["user_id"], patch["date"], patch["shift_def_id"])] = status_name(patch["status"])
+
+    removed = set(scenario.get("remove_user_ids", ()))
+    employees = [e for e in data.employees if e.id not in removed]
+    for i, hire in enumerate(scenario.get("add_staff", ())):
+        name = hire.get("name") or f"New hire {i + 1}"
+        e_id = uuid5(_HIRE_NAMESPACE, f"{scenario.get('name')}/{i}/{name}")
+        employees.append(EmployeeInput(
+            id=e_id,
+            full_name=name,
+            role_ids=frozenset(hire["role_ids"]),
+            target_hours_per_month=hire.get("target_hours_per_month"),
+            target_shifts_per_month=hire.get("target_shifts_per_month"),
+        ))
+        for d in data.days:
+            for s in data.shifts:
+                availability[(e_id, d, s.id)] = "AVAILABLE"
+
+    return dataclasses.replace(
+        data,
+        employees=tuple(employees),
+        availability=MappingProxyType({k: v for k, v in availability.items() if k[0] not in removed}),
+        requirements=MappingProxyType(requirements),
+        mtd_hours=MappingProxyType({k: v for k, v in data.mtd_hours.items() if k not in removed}),
+        existing=frozenset(k for k in data.existing if k[0] not in removed),
+    )
+
+
+def scenario_metrics(data: SolverInput, assignments: Set[Tuple]) -> dict:
+    """Fill rate, overtime and objective of a solved scenario."""
+    weekdays = {s.id: s.weekdays for s in data.shifts}
+    required = sum(
+        count for (d, s_id, _), count in data.requirements.items()
+        if count > 0 and d.weekday() in weekdays.get(s_id, ())
+    )
+    excess_shifts, excess_hours = monthly_excess(data, assignments)
+    overtime_hours = excess_hours / HOURS_SCALE
+
+    return {
+        "required": required,
+        "assigned": len(assignments),
+        "unfilled": max(0, required - len(assignments)),
+        "fill_rate": round(len(assignments) / required, 4) if required else 1.0,
+        "overtime_hours": round(overtime_hours, 2),
+        "excess_shifts": excess_shifts,
+        "objective": evaluate(data, assignments),
+        "employees": len(data.employees),
+    }
+
+
+def solve_scenario(
+    base: SolverInput,
+    scenario: Optional[dict] = None,
+    time_limit: float = SOLVER_TIME_LIMIT_SECONDS,
+    num_workers: int = 0,
+    stop_event=None,
+) -> dict:
+    """Apply `scenario` (None: the base itself), solve it and return its comparison row."""
+    data = apply_scenario(base, scenario) if scenario else base
+    model, work = build_model(data)
+    stats = {}
+    status, keys = _solve_model(model, work, time_limit, num_workers, stop_event=stop_event, stats=stats)
+    row = {"name": scenario["name"] if scenario else BASE_SCENARIO, "status": cp_model_pb2.CpSolverStatus.Name(status)}
+    row.update(scenario_metrics(data, keys))
+    row["gap"] = stats.get("gap")
+    row["wall_time"] = stats.get("wall_time")
+    logger.info(f"Scenario {row['name']}: {row['status']}, fill rate {row['fill_rate']}")
+    return row
+
+
+def comparison_table(rows: List[dict]) -> List[dict]:
+    """Rows in submission order with deltas against the base row (the first one)."""
+    base = rows[0]
+    table = []
+    for row in rows:
+        row = dict(row)
+        for metric in ("fill_rate", "overtime_hours", "objective"):
+            row[f"{metric}_delta"] = round(row[metric] - base[metric], 4)
+        table.append(row)
+    return table
@@ -0,0 +1,81 @@
+"""
+Solve telemetry: per-phase timings of `SolverService.solve` plus CP-SAT response
+statistics, persisted as one `SolveRun` row per solve so performance can be charted
+over time (GET /scheduler/telemetry).
+"""
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session
+
+from ..models import SolveRun
+
+logger = logging.getLogger(__name__)
+
+PHASES = ("load", "precheck", "build", "solve", "extract", "persist")
+
+
+class PhaseTimer:
+    """Accumulates wall-clock milliseconds per named phase."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    @property
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+
+def merge_stats(pieces: Iterable[dict]) -> dict:
+    """Combine the response stats of separately solved pieces (decomposed solves)."""
+    merged = {}
+    for stats in pieces:
+        for key in (
+            "num_branches", "num_conflicts", "num_variables", "num_constraints", "objective", "best_bound",
+            "deterministic_time",
+        ):
+            if stats.get(key) is not None:
+                merged[key] = merged.get(key, 0) + stats[key]
+        if stats.get("num_workers") is not None:
+            merged["num_workers"] = max(merged.get("num_workers", 0), stats["num_workers"])
+        merged["wall_time"] = max(merged.get("wall_time", 0.0), stats.get("wall_time", 0.0))
+    if merged.get("objective") is not None and merged.get("best_bound") is not None:
+        merged["gap"] = relative_gap(merged["objective"], merged["best_bound"])
+    return merged
+
+
+def relative_gap(objective: float, best_bound: float) -> float:
+    return abs(best_bound - objective) / max(1.0, abs(objective))
+
+
+def telemetry_fields(timer: PhaseTimer, stats: dict) -> dict:
+    fields = {f"{name}_ms": round(timer.phases[name], 3) for name in PHASES if name in timer.phases}
+    fields["total_ms"] = round(timer.total_ms, 3)
+    fields.update(stats)
+    return fields
+
+
+def record_solve_run(session: Session, **fields) -> Optional[SolveRun]:
+    """Store one SolveRun; telemetry must never fail a solve, so errors are only logged."""
+    run = SolveRun(**fields)
+    try:
+        session.add(run)
+        session.commit()
+    except SQLAlchemyError as e:
+        session.rollback()
+        logger.warning(f"Could not record solve telemetry: {e}")
+        return None
+    return run
@@ -0,0 +1,109 @@
+"""
+Availability deadline load test: N employees submit a month of availability at once.
+
+Every employee gets its own session on a worker thread and posts a full month (all
+shifts, every day) through `EmployeeService.update_availability`, then resubmits it
+with changed statuses, which exercises the ON CONFLICT update path. Reports wall
+time, throughput and per-submission latency for both rounds.
+
+Runs against a throwaway SQLite file by default; pass a PostgreSQL URL to measure
+the production setup (tables are created, and the benchmark rows are left behind).
+
+Usage (from backend/):
+    python -m benchmarks.bench_availability [--employees 200] [--workers 16] [--database-url URL]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, time as time_of_day, timedelta
+from uuid import uuid4
+
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.models import AvailabilityStatus, RoleSystem, ShiftDefinition, User
+from app.schemas import AvailabilityUpdate
+from app.services.employee_service import EmployeeService
+
+STATUSES = [AvailabilityStatus.AVAILABLE, AvailabilityStatus.UNAVAILABLE]
+
+
+def setup(engine, n_employees: int, n_shifts: int):
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        tag = uuid4().hex[:8]
+        users = [
+            User(username=f"bench_{tag}_{i}", password_hash="-", full_name=f"Bench {i}", role_system=RoleSystem.EMPLOYEE)
+            for i in range(n_employees)
+        ]
+        shifts = [
+            ShiftDefinition(name=f"Bench {tag} {i}", start_time=time_of_day(6 + 4 * i), end_time=time_of_day(10 + 4 * i))
+            for i in range(n_shifts)
+        ]
+        session.add_all(users + shifts)
+        session.commit()
+        return [u.id for u in users], [s.id for s in shifts]
+
+
+def submission(days, shift_ids, seed: int):
+    return [
+        AvailabilityUpdate(date=d, shift_def_id=s_id, status=STATUSES[(i + j + seed) % len(STATUSES)])
+        for i, d in enumerate(days) for j, s_id in enumerate(shift_ids)
+    ]
+
+
+def run_round(engine, user_ids, days, shift_ids, workers: int, seed: int) -> dict:
+    def submit(index_and_user):
+        index, user_id = index_and_user
+        updates = submission(days, shift_ids, index + seed)
+        started = time.perf_counter()
+        with Session(engine) as session:
+            EmployeeService(session).update_availability(user_id, updates)
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        latencies = sorted(pool.map(submit, enumerate(user_ids)))
+    wall = time.perf_counter() - started
+    return {
+        "wall_s": wall,
+        "per_s": len(user_ids) / wall,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--employees", type=int, default=200)
+    parser.add_argument("--shifts", type=int, default=4)
+    parser.add_argument("--days", type=int, default=31)
+    parser.add_argument("--workers", type=int, default=16, help="concurrent submissions")
+    parser.add_argument("--database-url", help="default: a temporary SQLite file")
+    args = parser.parse_args()
+
+    if args.database_url:
+        engine = create_engine(args.database_url, pool_size=args.workers, max_overflow=0)
+    else:
+        path = os.path.join(tempfile.mkdtemp(), "bench_availability.db")
+        # SQLite serialises writers; the timeout makes them queue instead of failing
+        engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False, "timeout": 60})
+
+    user_ids, shift_ids = setup(engine, args.employees, args.shifts)
+    days = [date(2025, 3, 1) + timedelta(days=i) for i in range(args.days)]
+    cells = len(days) * len(shift_ids)
+
+    print(f"{args.employees} employees x {cells} cells, {args.workers} workers, {engine.dialect.name}")
+    print(f"{'round':>10} {'wall':>8} {'subm/s':>8} {'p50':>9} {'p95':>9}")
+    for name, seed in (("submit", 0), ("resubmit", 1)):
+        row = run_round(engine, user_ids, days, shift_ids, args.workers, seed)
+        print(
+            f"{name:>10} {row['wall_s']:>7.2f}s {row['per_s']:>8.1f} "
+            f"{row['p50_ms']:>7.1f}ms {row['p95_ms']:>7.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
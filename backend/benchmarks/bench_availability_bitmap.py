@@ -0,0 +1,106 @@
+"""
+Availability read benchmark: per-cell rows vs. packed month bitmaps.
+
+Fills a throwaway SQLite database with a month of availability (every shift, every
+day, ~70% of cells answered) for N employees. It then reads the month back both
+ways: the column-only row query into a dict, as the solver used to do, and
+`load_availability_matrix`. Reports query time, peak memory while reading and the
+pickled size (what a solve job ships to its worker process).
+
+Usage (from backend/):
+    python -m benchmarks.bench_availability_bitmap [--employees 200] [--shifts 4] [--repeat 5]
+"""
+import argparse
+import os
+import pickle
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import date, time as time_of_day, timedelta
+
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.models import Availability, AvailabilityStatus, RoleSystem, ShiftDefinition, User
+from app.services.availability_bitmap import load_availability_matrix
+from app.services.availability_writer import upsert_availability
+
+START = date(2025, 3, 1)
+END = date(2025, 3, 31)
+
+
+def setup(engine, n_employees: int, n_shifts: int):
+    SQLModel.metadata.create_all(engine)
+    rng = random.Random(42)
+    days = [START + timedelta(days=i) for i in range((END - START).days + 1)]
+    statuses = [AvailabilityStatus.AVAILABLE, AvailabilityStatus.UNAVAILABLE]
+    with Session(engine) as session:
+        users = [
+            User(username=f"bench_{i}", password_hash="-", full_name=f"Bench {i}", role_system=RoleSystem.EMPLOYEE)
+            for i in range(n_employees)
+        ]
+        shifts = [
+            ShiftDefinition(name=f"Bench {i}", start_time=time_of_day(6 + 2 * i), end_time=time_of_day(10 + 2 * i))
+            for i in range(n_shifts)
+        ]
+        session.add_all(users + shifts)
+        session.commit()
+        for user in users:
+            upsert_availability(session, user.id, [
+                (d, s.id, rng.choice(statuses)) for d in days for s in shifts if rng.random() < 0.7
+            ])
+        session.commit()
+
+
+def read_rows(session):
+    return {
+        (user_id, d, shift_id): status.value
+        for user_id, d, shift_id, status in session.exec(
+            select(Availability.user_id, Availability.date, Availability.shift_def_id, Availability.status)
+            .where(Availability.date >= START, Availability.date <= END)
+        ).all()
+    }
+
+
+def read_bitmaps(session):
+    return load_availability_matrix(session, START, END)
+
+
+def measure(engine, read, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        with Session(engine) as session:
+            started = time.perf_counter()
+            result = read(session)
+            timings.append(time.perf_counter() - started)
+    with Session(engine) as session:
+        tracemalloc.start()
+        result = read(session)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {"ms": min(timings) * 1000, "peak_kb": peak / 1024, "pickled_kb": len(pickle.dumps(result)) / 1024,
+            "cells": len(result)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--employees", type=int, default=200)
+    parser.add_argument("--shifts", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench_availability_bitmap.db")
+    engine = create_engine(f"sqlite:///{path}")
+    setup(engine, args.employees, args.shifts)
+
+    print(f"{args.employees} employees, {args.shifts} shifts, {START:%Y-%m}")
+    print(f"{'read':>8} {'cells':>7} {'query':>9} {'peak mem':>10} {'pickled':>10}")
+    for name, read in (("rows", read_rows), ("bitmaps", read_bitmaps)):
+        row = measure(engine, read, args.repeat)
+        print(
+            f"{name:>8} {row['cells']:>7} {row['ms']:>7.1f}ms {row['peak_kb']:>8.0f}KB {row['pickled_kb']:>8.0f}KB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Decomposition benchmark: one monolithic model vs. role groups / weeks solved in parallel.
+
+Both schedules are scored with the monolithic objective, so the quality column
+compares like with like. Target overruns are summed over employees for the whole range.
+
+Usage (from backend/):
+    python -m benchmarks.bench_decomposition [--employees 150] [--days 31] [--time-limit 10] [--single-role]
+"""
+import argparse
+import time
+
+from ortools.sat import cp_model_pb2
+from ortools.sat.python import cp_model
+
+from app.services.solver import build_model, solve_decomposed, _solve_model
+from app.services.solver_decompose import decompose
+from .synthetic import generate_instance
+
+
+def score(instance, assigned) -> dict:
+    """Objective of `assigned` in the monolithic model, plus monthly target overruns."""
+    model, work = build_model(instance)
+    for key, var in work.items():
+        model.Add(var == int(key in assigned))
+    solver = cp_model.CpSolver()
+    solver.Solve(model)
+
+    durations = {s.id: s.duration_hours for s in instance.shifts}
+    hours, shifts = {}, {}
+    for e_id, _, s_id, _ in assigned:
+        hours[e_id] = hours.get(e_id, 0.0) + durations[s_id]
+        shifts[e_id] = shifts.get(e_id, 0) + 1
+    excess_hours = excess_shifts = 0.0
+    for e in instance.employees:
+        if e.target_hours_per_month is not None:
+            budget = max(0.0, e.target_hours_per_month - instance.mtd_hours.get(e.id, 0.0))
+            excess_hours += max(0.0, hours.get(e.id, 0.0) - budget)
+        if e.target_shifts_per_month is not None:
+            excess_shifts += max(0, shifts.get(e.id, 0) - e.target_shifts_per_month)
+    return {
+        "objective": solver.ObjectiveValue(),
+        "assigned": len(assigned),
+        "excess_hours": excess_hours,
+        "excess_shifts": excess_shifts,
+    }
+
+
+def run_monolithic(instance, time_limit: float) -> dict:
+    started = time.perf_counter()
+    model, work = build_model(instance)
+    status, assigned = _solve_model(model, work, time_limit)
+    row = {"mode": "monolithic", "pieces": 1, "wall_s": time.perf_counter() - started, "status": status}
+    row.update(score(instance, assigned))
+    return row
+
+
+def run_decomposed(instance, time_limit: float) -> dict:
+    started = time.perf_counter()
+    status, assigned = solve_decomposed(instance, time_limit=time_limit)
+    row = {
+        "mode": "decomposed",
+        "pieces": len(decompose(instance)),
+        "wall_s": time.perf_counter() - started,
+        "status": status,
+    }
+    row.update(score(instance, assigned))
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--employees", type=int, default=150)
+    parser.add_argument("--days", type=int, default=31)
+    parser.add_argument("--time-limit", type=float, default=10.0)
+    parser.add_argument("--single-role", action="store_true", help="every employee holds one role (role-disjoint)")
+    args = parser.parse_args()
+
+    instance = generate_instance(args.employees, args.days, max_roles=1 if args.single_role else 2)
+    print(f"{args.employees} employees x {args.days} days x {len(instance.shifts)} shifts x {len(instance.roles)} roles")
+
+    rows = [run_monolithic(instance, args.time_limit), run_decomposed(instance, args.time_limit)]
+    print(f"{'mode':>10} {'pieces':>6} {'wall':>7} {'status':>10} {'objective':>12} {'assigned':>8} {'+hours':>7} {'+shifts':>7}")
+    for row in rows:
+        print(
+            f"{row['mode']:>10} {row['pieces']:>6} {row['wall_s']:>6.2f}s "
+            f"{cp_model_pb2.CpSolverStatus.Name(row['status']):>10} {row['objective']:>12.0f} "
+            f"{row['assigned']:>8} {row['excess_hours']:>7.1f} {row['excess_shifts']:>7.0f}"
+        )
+
+    monolithic, decomposed = rows
+    gap = (monolithic["objective"] - decomposed["objective"]) / max(abs(monolithic["objective"]), 1)
+    print(
+        f"decomposition: {monolithic['wall_s'] / max(decomposed['wall_s'], 1e-9):.1f}x faster, "
+        f"objective {gap:+.2%} below monolithic"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Rolling-horizon benchmark: model size and solve time of one model vs. rolling windows as
+the range grows from a month to a quarter.
+
+Both schedules are scored with `evaluate`, so the objective columns compare like with like.
+The monolithic model gets the same total time budget as the rolling horizon.
+
+Usage (from backend/):
+    python -m benchmarks.bench_rolling [--employees 100] [--months 1 2 3] [--time-limit 10]
+"""
+import argparse
+import time
+
+from app.services.solver import build_model, solve_rolling, _solve_model
+from app.services.solver_objective import evaluate
+from .synthetic import generate_instance
+
+
+def run(instance, time_limit: float) -> dict:
+    budget = time_limit * len(instance.days) / 31
+
+    started = time.perf_counter()
+    model, work = build_model(instance)
+    stats = {}
+    _, monolithic = _solve_model(model, work, budget, stats=stats)
+    monolithic_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    rolling_stats = {}
+    _, rolling = solve_rolling(instance, time_limit=time_limit, stats=rolling_stats)
+    rolling_s = time.perf_counter() - started
+
+    return {
+        "days": len(instance.days),
+        "monolithic_vars": stats["num_variables"],
+        "monolithic_s": monolithic_s,
+        "monolithic_objective": evaluate(instance, monolithic),
+        "rolling_vars": rolling_stats["num_variables"],
+        "rolling_s": rolling_s,
+        "rolling_objective": evaluate(instance, rolling),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--employees", type=int, default=100)
+    parser.add_argument("--months", type=int, nargs="+", default=[1, 2, 3])
+    parser.add_argument("--time-limit", type=float, default=10.0, help="seconds per month of range")
+    args = parser.parse_args()
+
+    print(f"{'days':>5} {'mono vars':>10} {'mono':>8} {'mono obj':>12} {'roll vars':>10} {'rolling':>8} {'roll obj':>12}")
+    for months in args.months:
+        instance = generate_instance(args.employees, n_days=31 * months)
+        row = run(instance, args.time_limit)
+        print(
+            f"{row['days']:>5} {row['monolithic_vars']:>10} {row['monolithic_s']:>7.2f}s "
+            f"{row['monolithic_objective']:>12} {row['rolling_vars']:>10} {row['rolling_s']:>7.2f}s "
+            f"{row['rolling_objective']:>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Replay benchmark: solve exported production instances and synthetic ones, and compare
+against a stored baseline.
+
+Exported instances come from running the API with SOLVER_EXPORT_DIR set (see
+app.services.solver_instance). Each instance is built and solved once; the report has
+build/solve time, status, objective and model size. With --baseline, runs that got
+slower, worse or lost their status are flagged and the exit code is 1.
+
+Usage (from backend/):
+    python -m benchmarks.replay [DIR_OR_FILE ...] [--synthetic 50,200,1000] [--time-limit 10]
+                                [--baseline benchmarks/baseline.json] [--save-baseline]
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+from ortools.sat.python import cp_model
+
+from app.services.solver import build_model
+from app.services.solver_instance import load_instance
+from .synthetic import generate_instance
+
+# Statuses from best to worst, a move to the right is a regression
+STATUS_RANK = ["OPTIMAL", "FEASIBLE", "UNKNOWN", "INFEASIBLE", "MODEL_INVALID"]
+
+
+def collect_instances(paths, synthetic_sizes):
+    instances = []
+    for path in paths:
+        files = sorted(glob.glob(os.path.join(path, "*.json*"))) if os.path.isdir(path) else [path]
+        instances.extend((os.path.basename(f), lambda f=f: load_instance(f)) for f in files)
+    for size in synthetic_sizes:
+        instances.append((f"synthetic-{size}", lambda size=size: generate_instance(size)))
+    return instances
+
+
+def run(instance, time_limit: float) -> dict:
+    started = time.perf_counter()
+    model, work = build_model(instance)
+    build_seconds = time.perf_counter() - started
+    proto = model.Proto()
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = time_limit
+    status = solver.Solve(model)
+    return {
+        "employees": len(instance.employees),
+        "days": len(instance.days),
+        "build_s": round(build_seconds, 3),
+        "solve_s": round(solver.WallTime(), 3),
+        "status": solver.StatusName(status),
+        "objective": solver.ObjectiveValue(),
+        "work_vars": len(work),
+        "model_vars": len(proto.variables),
+        "constraints": len(proto.constraints),
+    }
+
+
+def regressions(row: dict, baseline: dict, tolerance: float) -> list:
+    """Ways `row` is worse than `baseline`: status, objective or time beyond `tolerance`."""
+    found = []
+    if STATUS_RANK.index(row["status"]) > STATUS_RANK.index(baseline["status"]):
+        found.append(f"status {baseline['status']} -> {row['status']}")
+    if row["objective"] < baseline["objective"] - abs(baseline["objective"]) * tolerance:
+        found.append(f"objective {baseline['objective']:.0f} -> {row['objective']:.0f}")
+    for key in ("build_s", "solve_s"):
+        # Ignore noise on runs that take a fraction of a second
+        if row[key] > baseline[key] * (1 + tolerance) + 0.1:
+            found.append(f"{key} {baseline[key]:.2f} -> {row[key]:.2f}")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", help="exported instance files or directories of them")
+    parser.add_argument("--synthetic", default="50,200,1000", help="comma-separated employee counts, '' for none")
+    parser.add_argument("--time-limit", type=float, default=10.0)
+    parser.add_argument("--baseline", help="JSON file with previous results to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="write the results to --baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown / objective loss")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.synthetic.split(",") if size.strip()]
+    baseline = {}
+    if args.baseline and os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    results, failed = {}, False
+    for name, load in collect_instances(args.paths, sizes):
+        row = results[name] = run(load(), args.time_limit)
+        line = (
+            f"{name}: {row['employees']} employees x {row['days']} days, build {row['build_s']:.2f}s, "
+            f"solve {row['solve_s']:.2f}s {row['status']} objective {row['objective']:.0f}, "
+            f"{row['work_vars']} work vars, {row['model_vars']} model vars, {row['constraints']} constraints"
+        )
+        if name in baseline:
+            found = regressions(row, baseline[name], args.tolerance)
+            if found:
+                failed = True
+                line += "\n  REGRESSION: " + "; ".join(found)
+        print(line)
+
+    if args.save_baseline:
+        if not args.baseline:
+            parser.error("--save-baseline needs --baseline")
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Deterministic synthetic restaurant used by the solver benchmarks.
+
+Instances are `SolverInput` snapshots built in memory, no database is needed.
+"""
+import dataclasses
+import random
+from datetime import date, time, timedelta
+from types import MappingProxyType
+from uuid import UUID
+
+from app.services.solver_input import (
+    SolverInput, EmployeeInput, ShiftInput, RoleInput, ALL_WEEKDAYS, date_range,
+)
+
+ROLE_NAMES = ["Kelner", "Kucharz", "Barman", "Zmywak", "Hostessa", "Manager zmiany"]
+
+# (name, start, end, weekdays or None for every day)
+SHIFTS = [
+    ("Rano", time(7, 0), time(15, 0), None),
+    ("Popołudnie", time(14, 30), time(22, 30), None),
+    ("Środek", time(11, 0), time(19, 0), [4, 5, 6]),
+    ("Noc", time(22, 0), time(6, 0), [4, 5]),
+]
+
+
+def generate_instance(
+    n_employees: int,
+    n_days: int = 31,
+    start: date = date(2025, 3, 1),
+    availability_rate: float = 0.3,
+    seed: int = 42,
+    max_roles: int = 2,
+    profiles: int = 0,
+) -> SolverInput:
+    """
+    `n_employees` staff with 1-2 roles each; each employee marks roughly
+    `availability_rate` of the (day, shift) cells as available. Requirements scale
+    with headcount so the instance stays about as tight as a real month.
+    `max_roles=1` gives role-disjoint staff (every employee holds a single role).
+    `profiles > 0` makes every employee a copy of one of that many profiles (roles,
+    targets, availability, hours so far), i.e. groups of interchangeable staff.
+    """
+    rng = random.Random(seed)
+    roles = tuple(RoleInput(id=i + 1, name=name) for i, name in enumerate(ROLE_NAMES))
+    shifts = tuple(
+        ShiftInput(
+            id=i + 1, name=name, start_time=start_time, end_time=end_time,
+            weekdays=frozenset(weekdays) if weekdays else ALL_WEEKDAYS,
+        )
+        for i, (name, start_time, end_time, weekdays) in enumerate(SHIFTS)
+    )
+
+    employees = tuple(
+        EmployeeInput(
+            id=UUID(int=rng.getrandbits(128)),
+            full_name=f"Pracownik {i}",
+            role_ids=frozenset(r.id for r in rng.sample(roles, min(rng.choice([1, 1, 2]), max_roles))),
+            target_hours_per_month=rng.choice([None, 80, 120, 160]),
+            target_shifts_per_month=rng.choice([None, 12, 20]),
+        )
+        for i in range(n_employees)
+    )
+
+    days = date_range(start, start + timedelta(days=n_days - 1))
+
+    availability = {}
+    for e in employees:
+        for d in days:
+            for s in shifts:
+                if rng.random() < availability_rate:
+                    status = "PREFERRED" if rng.random() < 0.2 else "AVAILABLE"
+                else:
+                    status = "UNAVAILABLE"
+                availability[(e.id, d, s.id)] = status
+
+    # Roughly one open slot per 25 employees for each (shift, role), more at weekends
+    base = max(1, n_employees // 25)
+    requirements = {
+        (d, s.id, r.id): base + (1 if d.weekday() >= 4 else 0)
+        for d in days for s in shifts if d.weekday() in s.weekdays for r in roles
+    }
+
+    mtd_hours = {e.id: float(rng.choice([0, 0, 8, 16])) for e in employees}
+
+    if profiles:
+        copies = []
+        for i, e in enumerate(employees):
+            template = employees[i % profiles]
+            copies.append(dataclasses.replace(
+                e,
+                role_ids=template.role_ids,
+                target_hours_per_month=template.target_hours_per_month,
+                target_shifts_per_month=template.target_shifts_per_month,
+            ))
+            for d in days:
+                for s in shifts:
+                    availability[(e.id, d, s.id)] = availability[(template.id, d, s.id)]
+            mtd_hours[e.id] = mtd_hours[template.id]
+        employees = tuple(copies)
+    return SolverInput(
+        start_date=days[0],
+        end_date=days[-1],
+        days=days,
+        employees=employees,
+        shifts=shifts,
+        roles=roles,
+        availability=MappingProxyType(availability),
+        requirements=MappingProxyType(requirements),
+        mtd_hours=MappingProxyType(mtd_hours),
+    )
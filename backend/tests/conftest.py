@@ -1,4 +1,5 @@
 import pytest
+from concurrent.futures import Executor, Future
 from httpx import AsyncClient, ASGITransport
 from sqlmodel import SQLModel, Session, create_engine
 from sqlmodel.pool import StaticPool
@@ -22,12 +23,25 @@ engine = create_engine(
 def session_fixture() -> Generator[Session, None, None]:
     SQLModel.metadata.drop_all(engine)
     SQLModel.metadata.create_all(engine)
+    # Change log cursors restart with every fresh database, so cached grids must not outlive it
+    from app.services.schedule_grid import schedule_grid
+    schedule_grid.clear()
     with Session(engine) as session:
         yield session
     SQLModel.metadata.drop_all(engine)
 
 import pytest_asyncio
 
+class InlineExecutor(Executor):
+    """Runs submitted work immediately in the calling thread (deterministic solver jobs)."""
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
 @pytest_asyncio.fixture(name="client")
 async def client_fixture(session: Session) -> AsyncGenerator[AsyncClient, None]:
     # Disable rate limiter for testing
@@ -39,6 +53,21 @@ async def client_fixture(session: Session) -> AsyncGenerator[AsyncClient, None]:
         return session
 
     app.dependency_overrides[get_session] = get_session_override
+
+    # Solver jobs run inline against the test session instead of a process pool
+    from app.services.solver import SolverService
+    from app.services.solver_cache import SolveCache
+    from app.services.solver_instance import instance_from_dict
+    from app.services.solver_jobs import SolverJobManager, get_solver_job_manager
+    solver_jobs = SolverJobManager(
+        executor=InlineExecutor(),
+        cache=SolveCache(),
+        runner=lambda start, end, progress, snapshot=None, **options: SolverService(session).solve(
+            start, end, save=False, on_solution=progress.emit, stop_event=progress.stop_event,
+            data=instance_from_dict(snapshot) if snapshot is not None else None, **options
+        ),
+    )
+    app.dependency_overrides[get_solver_job_manager] = lambda: solver_jobs
     
     # Use ASGITransport for testing FastAPI app
     transport = ASGITransport(app=app)
@@ -125,6 +154,67 @@ def job_role_fixture(session: Session):
     session.refresh(role)
     return role
 
+@pytest.fixture(name="shifts")
+def shifts_fixture(session: Session):
+    """Four back-to-back four-hour shifts, 06:00 to 22:00"""
+    from app.models import ShiftDefinition
+    from datetime import time
+
+    shifts = [
+        ShiftDefinition(name=f"Shift {i}", start_time=time(6 + 4 * i), end_time=time(10 + 4 * i))
+        for i in range(4)
+    ]
+    session.add_all(shifts)
+    session.commit()
+    return shifts
+
+@pytest.fixture(name="staffed_day")
+def staffed_day_fixture(session: Session, job_role, shift_definition):
+    """One available employee and one open slot today, so the solver finds a solution."""
+    from app.models import User, RoleSystem, UserJobRoleLink, StaffingRequirement, Availability, AvailabilityStatus
+    from app.auth_utils import get_password_hash
+    from datetime import date
+
+    user = User(
+        username="staffed",
+        password_hash=get_password_hash("test"),
+        full_name="Staffed Employee",
+        role_system=RoleSystem.EMPLOYEE
+    )
+    session.add(user)
+    session.commit()
+    session.add(UserJobRoleLink(user_id=user.id, role_id=job_role.id))
+    session.add(StaffingRequirement(
+        date=date.today(), shift_def_id=shift_definition.id, role_id=job_role.id, min_count=1
+    ))
+    session.add(Availability(
+        user_id=user.id, date=date.today(), shift_def_id=shift_definition.id,
+        status=AvailabilityStatus.AVAILABLE
+    ))
+    session.commit()
+    return user
+
+@pytest.fixture(name="count_statements")
+def count_statements_fixture(session: Session):
+    """Run `fn()` and count the SQL statements it sends; returns (result, count)."""
+    from sqlalchemy import event
+
+    def count(fn):
+        statements = []
+        bind = session.get_bind()
+
+        def before_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(bind, "before_cursor_execute", before_execute)
+        try:
+            result = fn()
+        finally:
+            event.remove(bind, "before_cursor_execute", before_execute)
+        return result, len(statements)
+
+    return count
+
 # --- Aliases for compatibility with other tests ---
 
 @pytest.fixture(name="manager_token_headers")
@@ -255,6 +255,9 @@ class TestSolverLogic:
             "end_date": str(tomorrow)
         })
 
+        assert res.status_code == 202
+        job_id = res.json()["job_id"]
+        res = await client.get(f"/scheduler/jobs/{job_id}/result", headers=auth_headers)
         assert res.status_code == 200
         data = res.json()
 
@@ -0,0 +1,184 @@
+"""
+Tests for the packed availability bitmaps and the AvailabilityMatrix read API.
+"""
+import pickle
+import random
+import pytest
+from datetime import date, time, timedelta
+from httpx import AsyncClient
+from uuid import uuid4
+from sqlmodel import Session, select
+
+from app.models import (
+    User, RoleSystem, Availability, AvailabilityBitmap, AvailabilityStatus, Schedule, ShiftDefinition,
+)
+from app.services.availability_bitmap import (
+    AvailabilityMatrix, load_availability_matrix, pack_codes, rebuild_availability_bitmaps, unpack_codes,
+)
+from app.services.availability_writer import upsert_availability
+
+MARCH = [date(2025, 3, 1) + timedelta(days=i) for i in range(31)]
+
+
+@pytest.fixture(name="staff")
+def staff_fixture(session: Session):
+    users = [
+        User(username=f"bitmap{i}", password_hash="-", full_name=f"Bitmap {i}", role_system=RoleSystem.EMPLOYEE)
+        for i in range(5)
+    ]
+    session.add_all(users)
+    session.commit()
+    return users
+
+
+def _rows(session):
+    return {
+        (a.user_id, a.date, a.shift_def_id): a.status.value
+        for a in session.exec(select(Availability)).all()
+    }
+
+
+def _seed(session, staff, shifts, days, seed=3):
+    rng = random.Random(seed)
+    statuses = [AvailabilityStatus.AVAILABLE, AvailabilityStatus.UNAVAILABLE]
+    for user in staff:
+        cells = [(d, s.id, rng.choice(statuses)) for d in days for s in shifts if rng.random() < 0.6]
+        upsert_availability(session, user.id, cells)
+    session.commit()
+
+
+class TestPacking:
+    @pytest.mark.parametrize("cells", [0, 1, 3, 4, 5, 124, 1001])
+    def test_round_trip(self, cells):
+        rng = random.Random(cells)
+        codes = bytes(rng.randrange(4) for _ in range(cells))
+        packed = pack_codes(codes)
+        assert len(packed) == -(-cells // 4)
+        assert unpack_codes(packed, cells) == codes
+
+    def test_month_of_four_shifts_is_31_bytes(self):
+        assert len(pack_codes(bytes(31 * 4))) == 31
+
+
+class TestAvailabilityMatrix:
+    def test_matches_rows(self, session, staff, shifts):
+        _seed(session, staff, shifts, MARCH)
+
+        matrix = load_availability_matrix(session, MARCH[0], MARCH[-1])
+        rows = _rows(session)
+        assert dict(matrix.items()) == rows
+        assert len(matrix) == len(rows)
+        assert len(session.exec(select(AvailabilityBitmap)).all()) == len(staff)
+
+    def test_slot_queries(self, session, staff, shifts):
+        d, shift_id = MARCH[9], shifts[2].id
+        upsert_availability(session, staff[0].id, [(d, shift_id, AvailabilityStatus.AVAILABLE)])
+        upsert_availability(session, staff[1].id, [(d, shift_id, AvailabilityStatus.UNAVAILABLE)])
+        upsert_availability(session, staff[2].id, [(d, shifts[1].id, AvailabilityStatus.AVAILABLE)])
+        session.commit()
+
+        matrix = load_availability_matrix(session, MARCH[0], MARCH[-1])
+        assert matrix.slot(d, shift_id) == {staff[0].id: "AVAILABLE", staff[1].id: "UNAVAILABLE"}
+        assert matrix.available(d, shift_id) == [staff[0].id]
+        assert matrix.status(staff[2].id, d, shift_id) is None
+        assert matrix.status(staff[2].id, d, shifts[1].id) == "AVAILABLE"
+        assert (staff[3].id, d, shift_id) not in matrix
+
+    def test_range_across_months_with_new_shift(self, session, staff, shifts):
+        upsert_availability(session, staff[0].id, [(MARCH[-1], shifts[0].id, AvailabilityStatus.AVAILABLE)])
+        session.commit()
+        late = ShiftDefinition(name="Late", start_time=time(22), end_time=time(6))
+        session.add(late)
+        session.commit()
+        april = date(2025, 4, 1)
+        upsert_availability(session, staff[0].id, [
+            (april, late.id, AvailabilityStatus.UNAVAILABLE), (april, shifts[3].id, AvailabilityStatus.AVAILABLE),
+        ])
+        session.commit()
+
+        matrix = load_availability_matrix(session, MARCH[-2], april + timedelta(days=1))
+        assert matrix.days == (MARCH[-2], MARCH[-1], april, april + timedelta(days=1))
+        assert dict(matrix.items()) == {
+            (staff[0].id, MARCH[-1], shifts[0].id): "AVAILABLE",
+            (staff[0].id, april, late.id): "UNAVAILABLE",
+            (staff[0].id, april, shifts[3].id): "AVAILABLE",
+        }
+
+    def test_orm_writes_keep_bitmaps_current(self, session, staff, shifts):
+        row = Availability(user_id=staff[0].id, date=MARCH[4], shift_def_id=shifts[0].id,
+                           status=AvailabilityStatus.AVAILABLE)
+        session.add(row)
+        session.commit()
+        matrix = load_availability_matrix(session, MARCH[0], MARCH[-1])
+        assert matrix.status(staff[0].id, MARCH[4], shifts[0].id) == "AVAILABLE"
+
+        row.user_id = staff[1].id
+        row.status = AvailabilityStatus.UNAVAILABLE
+        session.add(row)
+        session.commit()
+        matrix = load_availability_matrix(session, MARCH[0], MARCH[-1])
+        assert dict(matrix.items()) == {(staff[1].id, MARCH[4], shifts[0].id): "UNAVAILABLE"}
+
+        session.delete(row)
+        session.commit()
+        assert session.exec(select(AvailabilityBitmap)).all() == []
+
+    def test_rebuild_matches_incremental(self, session, staff, shifts):
+        _seed(session, staff, shifts, MARCH[20:] + [date(2025, 4, 1) + timedelta(days=i) for i in range(10)])
+        before = {(b.user_id, b.month): (b.shift_ids, b.bits) for b in session.exec(select(AvailabilityBitmap)).all()}
+
+        assert rebuild_availability_bitmaps(session) == 2
+        session.commit()
+        after = {(b.user_id, b.month): (b.shift_ids, b.bits) for b in session.exec(select(AvailabilityBitmap)).all()}
+        assert after == before
+
+    def test_is_a_compact_picklable_mapping(self):
+        users = [uuid4() for _ in range(200)]
+        matrix = AvailabilityMatrix(MARCH, [1, 2, 3, 4], {u: bytes([1, 2, 0, 3]) * 31 for u in users})
+        as_dict = dict(matrix.items())
+        assert len(matrix) == len(as_dict) == 200 * 31 * 3
+        assert pickle.loads(pickle.dumps(matrix)) == as_dict
+        assert len(pickle.dumps(matrix)) * 10 < len(pickle.dumps(as_dict))
+
+    @pytest.mark.asyncio
+    async def test_team_availability_endpoint(self, client: AsyncClient, auth_headers: dict, session, staff, shifts):
+        upsert_availability(session, staff[0].id, [
+            (MARCH[2], shifts[0].id, AvailabilityStatus.AVAILABLE), (MARCH[3], shifts[1].id, AvailabilityStatus.UNAVAILABLE),
+        ])
+        session.commit()
+
+        response = await client.get(
+            f"/manager/availability?week_start={MARCH[0]}&week_end={MARCH[6]}", headers=auth_headers
+        )
+        assert response.status_code == 200
+        assert response.json() == [{
+            "user_id": str(staff[0].id),
+            "user_name": "Bitmap 0",
+            "entries": [
+                {"date": str(MARCH[2]), "shift_def_id": shifts[0].id, "status": "AVAILABLE"},
+                {"date": str(MARCH[3]), "shift_def_id": shifts[1].id, "status": "UNAVAILABLE"},
+            ],
+        }]
+
+    @pytest.mark.asyncio
+    async def test_available_employees_endpoint(
+        self, client: AsyncClient, auth_headers: dict, session, staff, shifts, job_role
+    ):
+        day, shift_id = MARCH[4], shifts[0].id
+        upsert_availability(session, staff[0].id, [(day, shift_id, AvailabilityStatus.AVAILABLE)])
+        upsert_availability(session, staff[1].id, [(day, shift_id, AvailabilityStatus.UNAVAILABLE)])
+        session.add(Schedule(date=day, shift_def_id=shift_id, user_id=staff[2].id, role_id=job_role.id))
+        session.commit()
+
+        response = await client.get(
+            f"/manager/schedules/available-employees?date={day}&shift_def_id={shift_id}", headers=auth_headers
+        )
+        assert response.status_code == 200
+        statuses = {row["user_id"]: row["availability_status"] for row in response.json()}
+        assert statuses == {
+            str(staff[0].id): "AVAILABLE",
+            str(staff[1].id): "UNAVAILABLE",
+            str(staff[2].id): "ALREADY_SCHEDULED_THIS",
+            str(staff[3].id): "UNKNOWN",
+            str(staff[4].id): "UNKNOWN",
+        }
@@ -0,0 +1,126 @@
+"""
+Tests for the bulk availability upsert, including a month submitted by 200 employees.
+"""
+import pytest
+from datetime import date, timedelta
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from app.models import User, RoleSystem, Availability, AvailabilityStatus
+from app.schemas import AvailabilityUpdate
+from app.services.availability_writer import upsert_availability
+from app.services.employee_service import EmployeeService
+from app.services.solver_cache import SolveCache
+
+MONTH = [date(2025, 3, 1) + timedelta(days=i) for i in range(31)]
+STATUSES = [AvailabilityStatus.AVAILABLE, AvailabilityStatus.UNAVAILABLE]
+
+
+@pytest.fixture(name="employees")
+def employees_fixture(session: Session):
+    users = [
+        User(username=f"avail{i}", password_hash="-", full_name=f"Avail {i}", role_system=RoleSystem.EMPLOYEE)
+        for i in range(200)
+    ]
+    session.add_all(users)
+    session.commit()
+    return users
+
+
+def _month_cells(shifts, offset=0):
+    return [
+        (d, s.id, STATUSES[(i + j + offset) % len(STATUSES)])
+        for i, d in enumerate(MONTH) for j, s in enumerate(shifts)
+    ]
+
+
+def _stored(session, user):
+    return {
+        (a.date, a.shift_def_id): a
+        for a in session.exec(select(Availability).where(Availability.user_id == user.id)).all()
+    }
+
+
+class TestUpsertAvailability:
+    def test_month_in_one_statement(self, session, employees, shifts, count_statements):
+        cells = _month_cells(shifts)
+        # Read before counting: the id of a committed user expires and would reload
+        user_id = employees[0].id
+        written, statements = count_statements(lambda: upsert_availability(session, user_id, cells))
+        session.commit()
+
+        assert written == len(cells) == 124
+        # One upsert, plus the month's bitmap refresh (rows joined to the shifts, delete, insert)
+        assert statements <= 4
+        assert {key: a.status for key, a in _stored(session, employees[0]).items()} == {
+            (d, s_id): status for d, s_id, status in cells
+        }
+
+    def test_resubmission_updates_in_place(self, session, employees, shifts):
+        user = employees[0]
+        upsert_availability(session, user.id, _month_cells(shifts))
+        session.commit()
+        ids = {key: a.id for key, a in _stored(session, user).items()}
+
+        changed = _month_cells(shifts, offset=1)
+        upsert_availability(session, user.id, changed)
+        session.commit()
+        session.expire_all()
+
+        stored = _stored(session, user)
+        assert {key: a.id for key, a in stored.items()} == ids
+        assert {key: a.status for key, a in stored.items()} == {(d, s_id): status for d, s_id, status in changed}
+
+    def test_last_status_of_a_repeated_cell_wins(self, session, employees, shifts):
+        cell = (MONTH[0], shifts[0].id)
+        written = upsert_availability(session, employees[0].id, [
+            (*cell, AvailabilityStatus.AVAILABLE), (*cell, AvailabilityStatus.UNAVAILABLE),
+        ])
+        session.commit()
+
+        assert written == 1
+        assert _stored(session, employees[0])[cell].status == AvailabilityStatus.UNAVAILABLE
+
+    def test_portable_path(self, session, employees, shifts, monkeypatch):
+        monkeypatch.setattr("app.services.availability_writer._UPSERT_DIALECTS", ())
+        user = employees[0]
+        upsert_availability(session, user.id, _month_cells(shifts)[:60])
+        session.commit()
+
+        changed = _month_cells(shifts, offset=1)
+        upsert_availability(session, user.id, changed)
+        session.commit()
+        session.expire_all()
+
+        assert {key: a.status for key, a in _stored(session, user).items()} == {
+            (d, s_id): status for d, s_id, status in changed
+        }
+
+    def test_invalidates_solve_cache(self, session, employees, shifts, monkeypatch):
+        cache = SolveCache()
+        cache.put("march", MONTH[0], MONTH[-1], {"status": "success"})
+        cache.put("april", date(2025, 4, 1), date(2025, 4, 30), {"status": "success"})
+        monkeypatch.setattr("app.services.availability_writer.solve_cache", cache)
+
+        upsert_availability(session, employees[0].id, _month_cells(shifts)[:8])
+        assert len(cache) == 1
+
+    def test_two_hundred_employees_submit_a_month(self, session, employees, shifts, count_statements):
+        """Load test: everyone submits the whole month, then resubmits it with changes."""
+        service = EmployeeService(session)
+        user_ids = [user.id for user in employees]
+        for offset in (0, 1):
+            for i, user_id in enumerate(user_ids):
+                updates = [
+                    AvailabilityUpdate(date=d, shift_def_id=s_id, status=status)
+                    for d, s_id, status in _month_cells(shifts, offset=i + offset)
+                ]
+                # One upsert statement and the bitmap refresh, whatever the number of cells
+                _, statements = count_statements(lambda: service.update_availability(user_id, updates))
+                assert statements <= 4
+
+        assert session.exec(select(func.count()).select_from(Availability)).one() == 200 * 124
+        stored = _stored(session, employees[7])
+        assert {key: a.status for key, a in stored.items()} == {
+            (d, s_id): status for d, s_id, status in _month_cells(shifts, offset=8)
+        }
@@ -0,0 +1,148 @@
+"""
+Tests for the per-user monthly hours rollup and its write paths.
+"""
+import pytest
+from datetime import date, time, timedelta
+from httpx import AsyncClient
+from sqlmodel import Session, select
+
+from app.models import (
+    User, RoleSystem, Schedule, Attendance, AttendanceStatus, HoursRollup,
+)
+from app.schemas import ShiftDefCreate
+from app.services.hours_rollup import hours_for_month, rebuild_hours_rollup
+from app.services.manager_service import ManagerService
+from app.services.schedule_writer import save_schedule_range
+from app.services.scheduler_service import SchedulerService
+
+MARCH = date(2025, 3, 1)
+APRIL = date(2025, 4, 1)
+
+
+@pytest.fixture(name="staff")
+def staff_fixture(session: Session):
+    users = [
+        User(username=f"rollup{i}", password_hash="-", full_name=f"Rollup {i}", role_system=RoleSystem.EMPLOYEE)
+        for i in range(3)
+    ]
+    session.add_all(users)
+    session.commit()
+    return users
+
+
+def _row(session, user, month=MARCH):
+    return hours_for_month(session, month, [user.id]).get(user.id)
+
+
+def _snapshot(session):
+    return {
+        (r.user_id, r.month): (
+            round(r.planned_hours, 6), r.planned_shifts, round(r.published_hours, 6), r.published_shifts,
+            round(r.worked_hours, 6), r.worked_shifts,
+        )
+        for r in session.exec(select(HoursRollup)).all()
+    }
+
+
+class TestHoursRollup:
+    def test_orm_schedule_writes(self, session, staff, shift_definition, job_role):
+        first, second = staff[:2]
+        schedule = Schedule(date=date(2025, 3, 10), shift_def_id=shift_definition.id,
+                            user_id=first.id, role_id=job_role.id)
+        session.add(schedule)
+        session.commit()
+        row = _row(session, first)
+        assert (row.planned_hours, row.planned_shifts, row.published_hours) == (8.0, 1, 0.0)
+
+        SchedulerService(session).publish_schedule(MARCH, date(2025, 3, 31))
+        assert _row(session, first).published_hours == 8.0
+
+        # Reassigning across users and months moves the hours with the row
+        schedule.user_id = second.id
+        schedule.date = date(2025, 4, 2)
+        session.add(schedule)
+        session.commit()
+        assert _row(session, first) is None
+        assert _row(session, second) is None
+        assert _row(session, second, APRIL).published_shifts == 1
+
+        session.delete(schedule)
+        session.commit()
+        assert session.exec(select(HoursRollup)).all() == []
+
+    def test_bulk_save(self, session, staff, shift_definition, job_role):
+        keys = {
+            (u.id, date(2025, 3, 28) + timedelta(days=i), shift_definition.id, job_role.id)
+            for u in staff for i in range(7)
+        }
+        save_schedule_range(session, date(2025, 3, 28), date(2025, 4, 3), keys, published=True)
+        session.commit()
+
+        for user in staff:
+            assert _row(session, user).planned_shifts == 4
+            assert _row(session, user, APRIL).published_hours == 24.0
+
+        save_schedule_range(session, date(2025, 3, 28), date(2025, 4, 3), set(), published=True)
+        session.commit()
+        assert session.exec(select(HoursRollup)).all() == []
+
+    def test_confirmed_attendance_counts_as_worked(self, session, staff):
+        user = staff[0]
+        attendance = Attendance(user_id=user.id, date=date(2025, 3, 5), check_in=time(22), check_out=time(6),
+                                status=AttendanceStatus.PENDING)
+        session.add(attendance)
+        session.commit()
+        assert _row(session, user) is None
+
+        attendance.status = AttendanceStatus.CONFIRMED
+        session.add(attendance)
+        session.commit()
+        row = _row(session, user)
+        assert (row.worked_hours, row.worked_shifts, row.planned_shifts) == (8.0, 1, 0)
+
+    def test_rebuild_matches_incremental(self, session, staff, shift_definition, job_role):
+        for i, user in enumerate(staff):
+            session.add(Schedule(date=date(2025, 3, 3 + i), shift_def_id=shift_definition.id,
+                                 user_id=user.id, role_id=job_role.id, is_published=bool(i % 2)))
+            session.add(Attendance(user_id=user.id, date=date(2025, 4, 1 + i), check_in=time(9),
+                                   check_out=time(12 + i)))
+        session.commit()
+        incremental = _snapshot(session)
+        assert len(incremental) == 6
+
+        session.add(HoursRollup(user_id=staff[0].id, month=date(2024, 1, 1), planned_hours=99.0))
+        session.commit()
+        assert rebuild_hours_rollup(session) == 2
+        session.commit()
+        assert _snapshot(session) == incremental
+
+    def test_shift_time_change_rebuilds(self, session, staff, shift_definition, job_role):
+        session.add(Schedule(date=date(2025, 3, 3), shift_def_id=shift_definition.id,
+                             user_id=staff[0].id, role_id=job_role.id))
+        session.commit()
+
+        ManagerService(session).update_shift(
+            shift_definition.id,
+            ShiftDefCreate(name=shift_definition.name, start_time="08:00", end_time="12:00", applicable_days=[]),
+        )
+        assert _row(session, staff[0]).planned_hours == 4.0
+
+    @pytest.mark.asyncio
+    async def test_schedule_summary(self, client: AsyncClient, employee_headers: dict, session,
+                                    shift_definition, job_role):
+        employee = session.exec(select(User).where(User.username == "employee_test")).one()
+        for day in (3, 4, 20):
+            session.add(Schedule(date=date(2025, 3, day), shift_def_id=shift_definition.id,
+                                 user_id=employee.id, role_id=job_role.id, is_published=True))
+        session.add(Schedule(date=date(2025, 3, 25), shift_def_id=shift_definition.id,
+                             user_id=employee.id, role_id=job_role.id, is_published=False))
+        session.commit()
+
+        response = await client.get(
+            "/employee/schedule-summary?year=2025&month=3&week_start=2025-03-03&week_end=2025-03-09",
+            headers=employee_headers,
+        )
+        assert response.status_code == 200
+        assert response.json() == {
+            "week_hours": 16.0, "month_hours": 24.0, "last_scheduled_date": "2025-03-20", "month": 3, "year": 2025,
+        }
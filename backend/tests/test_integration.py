@@ -129,7 +129,9 @@ async def test_full_workflow(client, session: Session, manager_token_headers):
         "start_date": str(tomorrow),
         "end_date": str(tomorrow),
     })
-    assert r.status_code == 200, f"Generate schedule failed: {r.text}"
+    assert r.status_code == 202, f"Generate schedule failed: {r.text}"
+    r = await client.get(f"/scheduler/jobs/{r.json()['job_id']}/result", headers=mgr_headers)
+    assert r.status_code == 200, f"Fetching solver result failed: {r.text}"
     data = r.json()
     assert data["status"] == "success", f"Unexpected status: {data}"
     assert data["count"] >= 1, f"No assignments generated: {data}"
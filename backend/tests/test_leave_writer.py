@@ -0,0 +1,149 @@
+"""
+Tests for applying approved leave: bulk availability, removed assignments, background job.
+"""
+import pytest
+from datetime import date, timedelta
+from httpx import AsyncClient
+from sqlmodel import Session, select
+
+from app.models import (
+    User, RoleSystem, Availability, AvailabilityStatus, LeaveRequest, LeaveStatus, Schedule,
+    ScheduleChange, ScheduleChangeOp, ShiftGiveaway, GiveawayStatus,
+)
+from app.services.leave_writer import apply_leave, run_leave_job
+
+START = date(2025, 3, 3)
+END = START + timedelta(days=13)
+
+
+@pytest.fixture(name="pair")
+def pair_fixture(session: Session):
+    users = [
+        User(username=f"leave{i}", password_hash="-", full_name=f"Leave {i}", role_system=RoleSystem.EMPLOYEE)
+        for i in range(2)
+    ]
+    session.add_all(users)
+    session.commit()
+    return users
+
+
+def _statuses(session, user):
+    return {
+        (a.date, a.shift_def_id): a.status
+        for a in session.exec(select(Availability).where(Availability.user_id == user.id)).all()
+    }
+
+
+class TestApplyLeave:
+    def test_two_weeks_in_a_fixed_number_of_statements(self, session, pair, shifts, count_statements):
+        user = pair[0]
+        # Some cells already answered, so the upsert both inserts and updates
+        session.add_all([
+            Availability(user_id=user.id, date=START + timedelta(days=i), shift_def_id=shifts[0].id,
+                         status=AvailabilityStatus.AVAILABLE)
+            for i in range(3)
+        ])
+        session.commit()
+
+        user_id = user.id
+        applied, statements = count_statements(lambda: apply_leave(session, user_id, START, END))
+        session.commit()
+
+        assert applied.availability_cells == 14 * 4
+        assert applied.assignments.removed == []
+        # Shift ids, one upsert, the bitmap refresh and the schedule lookup: not one per cell
+        assert statements <= 6
+        statuses = _statuses(session, user)
+        assert len(statuses) == 56
+        assert set(statuses.values()) == {AvailabilityStatus.UNAVAILABLE}
+
+    def test_removes_only_the_users_assignments_in_range(self, session, pair, shifts, job_role):
+        user, other = pair
+        inside = Schedule(date=START + timedelta(days=2), shift_def_id=shifts[1].id, user_id=user.id,
+                          role_id=job_role.id, is_published=True)
+        after = Schedule(date=END + timedelta(days=1), shift_def_id=shifts[1].id, user_id=user.id,
+                         role_id=job_role.id, is_published=True)
+        colleague = Schedule(date=START + timedelta(days=2), shift_def_id=shifts[1].id, user_id=other.id,
+                             role_id=job_role.id, is_published=True)
+        session.add_all([inside, after, colleague])
+        session.commit()
+        inside_id = inside.id
+
+        applied = apply_leave(session, user.id, START, END)
+        session.commit()
+
+        assert applied.assignments.removed == [(inside_id, inside.date, shifts[1].id, True)]
+        assert applied.assignments.removed_published == applied.assignments.removed
+        remaining = {s.id for s in session.exec(select(Schedule)).all()}
+        assert remaining == {after.id, colleague.id}
+        last = session.exec(select(ScheduleChange).order_by(ScheduleChange.id.desc())).first()
+        assert (last.schedule_id, last.user_id, last.op) == (inside_id, user.id, ScheduleChangeOp.DELETE)
+        assert _statuses(session, other) == {}
+
+    def test_keeps_assignment_with_giveaway(self, session, pair, shifts, job_role):
+        user = pair[0]
+        offered = Schedule(date=START + timedelta(days=4), shift_def_id=shifts[0].id, user_id=user.id,
+                           role_id=job_role.id, is_published=True)
+        draft = Schedule(date=START + timedelta(days=5), shift_def_id=shifts[0].id, user_id=user.id,
+                         role_id=job_role.id)
+        session.add_all([offered, draft])
+        session.commit()
+        giveaway = ShiftGiveaway(schedule_id=offered.id, offered_by=user.id)
+        session.add(giveaway)
+        session.commit()
+        offered_id, draft_id, giveaway_id = offered.id, draft.id, giveaway.id
+
+        applied = apply_leave(session, user.id, START, END)
+        session.commit()
+
+        assert applied.assignments.on_giveaway == [(offered_id, START + timedelta(days=4), shifts[0].id)]
+        assert applied.assignments.removed == [(draft_id, START + timedelta(days=5), shifts[0].id, False)]
+        assert applied.assignments.removed_published == []
+        assert {s.id for s in session.exec(select(Schedule)).all()} == {offered_id}
+        assert session.get(ShiftGiveaway, giveaway_id).status == GiveawayStatus.OPEN
+
+
+class TestLeaveJob:
+    def _request(self, session, user, status):
+        req = LeaveRequest(user_id=user.id, start_date=START, end_date=START + timedelta(days=1),
+                           reason="test", status=status)
+        session.add(req)
+        session.commit()
+        return req
+
+    def test_applies_approved_request(self, session, pair, shifts):
+        req = self._request(session, pair[0], LeaveStatus.APPROVED)
+
+        applied = run_leave_job(req.id, session.get_bind())
+
+        assert applied.availability_cells == 2 * 4
+        assert len(_statuses(session, pair[0])) == 8
+
+    def test_skips_request_no_longer_approved(self, session, pair, shifts):
+        req = self._request(session, pair[0], LeaveStatus.CANCELLED)
+
+        assert run_leave_job(req.id, session.get_bind()) is None
+        assert _statuses(session, pair[0]) == {}
+
+
+@pytest.mark.asyncio
+async def test_approve_endpoint_applies_leave_in_background(
+    client: AsyncClient, employee_headers: dict, auth_headers: dict, session, shift_definition, job_role
+):
+    employee = session.exec(select(User).where(User.username == "employee_test")).one()
+    day = date.today() + timedelta(days=20)
+    session.add(Schedule(date=day, shift_def_id=shift_definition.id, user_id=employee.id, role_id=job_role.id))
+    session.commit()
+
+    req_id = (await client.post(
+        "/employee/leave-requests",
+        json={"start_date": day.isoformat(), "end_date": (day + timedelta(days=1)).isoformat(), "reason": "test"},
+        headers=employee_headers,
+    )).json()["id"]
+    resp = await client.post(f"/manager/leave-requests/{req_id}/approve", headers=auth_headers)
+    assert resp.status_code == 200
+
+    # Background tasks have run once the ASGI call returns
+    session.expire_all()
+    assert session.exec(select(Schedule).where(Schedule.user_id == employee.id)).all() == []
+    assert set(_statuses(session, employee).values()) == {AvailabilityStatus.UNAVAILABLE}
@@ -306,3 +306,32 @@ class TestConfigEdgeCases:
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
+
+
+class TestGiveawayEdgeCases:
+    """Edge cases for the open giveaway list"""
+
+    def test_open_giveaways_carry_their_shift(self, session, shifts, job_role):
+        """Test every giveaway gets the name and times of its own shift"""
+        from datetime import date
+        from app.models import User, RoleSystem, Schedule, ShiftGiveaway
+        from app.services.manager_service import ManagerService
+
+        user = User(username="giver", password_hash="-", full_name="Giver", role_system=RoleSystem.EMPLOYEE)
+        session.add(user)
+        session.commit()
+        schedules = [
+            Schedule(date=date(2025, 3, 3), shift_def_id=shift.id, user_id=user.id, role_id=job_role.id)
+            for shift in shifts[:2]
+        ]
+        session.add_all(schedules)
+        session.commit()
+        session.add_all([ShiftGiveaway(schedule_id=s.id, offered_by=user.id) for s in schedules])
+        session.commit()
+
+        giveaways = ManagerService(session).get_open_giveaways()
+
+        assert sorted((g["shift_name"], g["start_time"], g["end_time"]) for g in giveaways) == [
+            ("Shift 0", "06:00", "10:00"),
+            ("Shift 1", "10:00", "14:00"),
+        ]
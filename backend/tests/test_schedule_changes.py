@@ -0,0 +1,173 @@
+"""
+Tests for the schedule change log and the /employee/schedules/changes delta feed.
+"""
+import pytest
+from datetime import date, timedelta
+from httpx import AsyncClient
+from sqlmodel import Session, select
+
+from app.models import User, RoleSystem, Schedule, ScheduleChange, ScheduleChangeOp, ShiftGiveaway
+from app.services.employee_service import EmployeeService
+from app.services.schedule_changes import latest_cursor, prune_changes
+from app.services.schedule_writer import save_schedule_range
+from app.services.scheduler_service import SchedulerService
+
+DAY = date(2025, 3, 3)
+
+
+@pytest.fixture(name="pair")
+def pair_fixture(session: Session):
+    users = [
+        User(username=f"sync{i}", password_hash="-", full_name=f"Sync {i}", role_system=RoleSystem.EMPLOYEE)
+        for i in range(2)
+    ]
+    session.add_all(users)
+    session.commit()
+    return users
+
+
+def _feed(session, since, user_id=None):
+    return EmployeeService(session).get_schedule_changes(since, DAY, DAY + timedelta(days=6), user_id)
+
+
+def _ids(rows):
+    return {row["id"] for row in rows}
+
+
+class TestChangeLog:
+    def test_bulk_save_is_logged(self, session, pair, shift_definition, job_role):
+        keys = {(u.id, DAY, shift_definition.id, job_role.id) for u in pair}
+        diff = save_schedule_range(session, DAY, DAY, keys, published=True)
+        session.commit()
+
+        changes = session.exec(select(ScheduleChange)).all()
+        assert {c.schedule_id for c in changes} == set(diff.ids.values())
+        assert {c.op for c in changes} == {ScheduleChangeOp.INSERT}
+
+    def test_owner_change_logged_for_both_users(self, session, pair, shift_definition, job_role):
+        schedule = Schedule(date=DAY, shift_def_id=shift_definition.id, user_id=pair[0].id, role_id=job_role.id)
+        session.add(schedule)
+        session.commit()
+
+        schedule.user_id = pair[1].id
+        session.add(schedule)
+        session.commit()
+
+        ops = [(c.user_id, c.op) for c in session.exec(select(ScheduleChange).order_by(ScheduleChange.id)).all()]
+        assert ops == [
+            (pair[0].id, ScheduleChangeOp.INSERT),
+            (pair[0].id, ScheduleChangeOp.DELETE),
+            (pair[1].id, ScheduleChangeOp.INSERT),
+        ]
+
+    def test_giveaway_logs_update(self, session, pair, shift_definition, job_role):
+        schedule = Schedule(date=DAY, shift_def_id=shift_definition.id, user_id=pair[0].id, role_id=job_role.id)
+        session.add(schedule)
+        session.commit()
+
+        session.add(ShiftGiveaway(schedule_id=schedule.id, offered_by=pair[0].id))
+        session.commit()
+
+        last = session.exec(select(ScheduleChange).order_by(ScheduleChange.id.desc())).first()
+        assert (last.schedule_id, last.op) == (schedule.id, ScheduleChangeOp.UPDATE)
+
+
+class TestScheduleFeed:
+    def test_first_sync_is_a_reset(self, session, pair, shift_definition, job_role):
+        keys = {(u.id, DAY, shift_definition.id, job_role.id) for u in pair}
+        save_schedule_range(session, DAY, DAY, keys, published=True)
+        session.commit()
+
+        feed = _feed(session, None)
+        assert feed["reset"]
+        assert len(feed["inserted"]) == 2
+        assert feed["cursor"] > 0
+
+    def test_delta_after_cursor(self, session, pair, shift_definition, job_role):
+        first, second = pair
+        save_schedule_range(session, DAY, DAY, {(first.id, DAY, shift_definition.id, job_role.id)}, published=True)
+        session.commit()
+        cursor = _feed(session, None)["cursor"]
+
+        # Unchanged since the cursor
+        assert _feed(session, cursor) == {"cursor": cursor, "reset": False, "inserted": [], "updated": [], "deleted": []}
+
+        # A new unpublished row is invisible until the range is published
+        session.add(Schedule(date=DAY + timedelta(days=1), shift_def_id=shift_definition.id,
+                             user_id=second.id, role_id=job_role.id))
+        session.commit()
+        assert _feed(session, cursor)["deleted"] and not _feed(session, cursor)["inserted"]
+        SchedulerService(session).publish_schedule(DAY, DAY + timedelta(days=6))
+
+        feed = _feed(session, cursor)
+        assert [row["user_id"] for row in feed["inserted"]] == [second.id]
+        assert feed["updated"] == feed["deleted"] == []
+
+    def test_reassignment_moves_row_between_personal_feeds(self, session, pair, shift_definition, job_role):
+        first, second = pair
+        diff = save_schedule_range(
+            session, DAY, DAY, {(first.id, DAY, shift_definition.id, job_role.id)}, published=True
+        )
+        session.commit()
+        cursor = _feed(session, None)["cursor"]
+        (schedule_id,) = diff.ids.values()
+
+        schedule = session.get(Schedule, schedule_id)
+        schedule.user_id = second.id
+        session.add(schedule)
+        session.commit()
+
+        assert _feed(session, cursor, first.id)["deleted"] == [schedule_id]
+        assert _ids(_feed(session, cursor, second.id)["inserted"]) == {schedule_id}
+        assert _ids(_feed(session, cursor)["updated"]) == {schedule_id}
+
+    def test_deleted_and_unpublished_rows(self, session, pair, shift_definition, job_role):
+        keys = {(u.id, DAY, shift_definition.id, job_role.id) for u in pair}
+        diff = save_schedule_range(session, DAY, DAY, keys, published=True)
+        session.commit()
+        cursor = _feed(session, None)["cursor"]
+
+        first_key, second_key = sorted(keys, key=lambda k: str(k[0]))
+        save_schedule_range(session, DAY, DAY, {first_key}, published=False)
+        session.commit()
+
+        assert set(_feed(session, cursor)["deleted"]) == {diff.ids[first_key], diff.ids[second_key]}
+
+    def test_stale_cursor_reset_after_log_pruned(self, session, pair, shift_definition, job_role):
+        first, second = pair
+        save_schedule_range(session, DAY, DAY, {(first.id, DAY, shift_definition.id, job_role.id)}, published=True)
+        session.commit()
+        stale = _feed(session, None)["cursor"]
+        save_schedule_range(session, DAY + timedelta(days=1), DAY + timedelta(days=1),
+                            {(second.id, DAY + timedelta(days=1), shift_definition.id, job_role.id)}, published=True)
+        session.commit()
+
+        # Empty the log, then write again: new ids must not restart below the stale cursor
+        prune_changes(session, retention_days=-1)
+        session.commit()
+        assert latest_cursor(session) == 0
+        save_schedule_range(session, DAY + timedelta(days=2), DAY + timedelta(days=2),
+                            {(first.id, DAY + timedelta(days=2), shift_definition.id, job_role.id)}, published=True)
+        session.commit()
+
+        feed = _feed(session, stale)
+        assert feed["reset"] is True
+        assert feed["cursor"] > stale + 1
+        assert len(feed["inserted"]) == 3
+
+    @pytest.mark.asyncio
+    async def test_changes_endpoint(self, client: AsyncClient, employee_headers: dict, session, shift_definition, job_role):
+        employee = session.exec(select(User).where(User.username == "employee_test")).one()
+        save_schedule_range(
+            session, DAY, DAY, {(employee.id, DAY, shift_definition.id, job_role.id)}, published=True
+        )
+        session.commit()
+        url = f"/employee/schedules/changes?start_date={DAY}&end_date={DAY}&mine=true"
+
+        first = (await client.get(url, headers=employee_headers)).json()
+        assert first["reset"] is True
+        assert len(first["inserted"]) == 1
+
+        again = (await client.get(f"{url}&since={first['cursor']}", headers=employee_headers)).json()
+        assert again["reset"] is False
+        assert again["inserted"] == again["updated"] == again["deleted"] == []
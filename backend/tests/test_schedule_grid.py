@@ -0,0 +1,96 @@
+"""
+Tests for the shared published schedule grid behind my-schedule and the team view.
+"""
+import pytest
+from datetime import date, timedelta
+from sqlmodel import Session
+
+from app.models import User, RoleSystem, Schedule, ShiftGiveaway
+from app.services.employee_service import EmployeeService
+from app.services.schedule_grid import ScheduleGridCache
+from app.services.schedule_writer import save_schedule_range
+from app.services.scheduler_service import SchedulerService
+
+DAY = date(2025, 3, 3)
+END = DAY + timedelta(days=6)
+
+
+@pytest.fixture(name="crew")
+def crew_fixture(session: Session, shift_definition, job_role):
+    users = [
+        User(username=f"crew{i}", password_hash="-", full_name=f"Crew {i}", role_system=RoleSystem.EMPLOYEE)
+        for i in range(30)
+    ]
+    session.add_all(users)
+    session.commit()
+    save_schedule_range(
+        session, DAY, END,
+        {(u.id, DAY + timedelta(days=i), shift_definition.id, job_role.id) for u in users for i in range(7)},
+        published=True,
+    )
+    session.commit()
+    return users
+
+
+class TestScheduleGrid:
+    def test_coworkers_exclude_self(self, session, crew):
+        rows = EmployeeService(session).get_schedule(crew[0].id, DAY, DAY)
+        assert len(rows) == 1
+        names = {c["name"] for c in rows[0]["coworkers"]}
+        assert len(names) == 29 and "Crew 0" not in names
+
+    def test_grid_shared_between_employees(self, session, crew, count_statements):
+        service = EmployeeService(session)
+        # Read before counting: the ids of committed users expire and would reload
+        user_ids = [user.id for user in crew]
+        service.get_schedule(user_ids[0], DAY, END)
+
+        # Every further employee costs one cursor lookup, whatever the crew size
+        for user_id in user_ids[1:]:
+            rows, statements = count_statements(lambda: service.get_schedule(user_id, DAY, END))
+            assert len(rows) == 7
+            assert statements == 1
+        _, statements = count_statements(lambda: service.get_team_schedule(DAY, END))
+        assert statements == 1
+
+    def test_save_and_publish_invalidate(self, session, crew, shift_definition, job_role):
+        service = EmployeeService(session)
+        assert len(service.get_team_schedule(DAY, END)) == 210
+
+        keep = {(u.id, DAY, shift_definition.id, job_role.id) for u in crew[:10]}
+        save_schedule_range(session, DAY, END, keep, published=False)
+        session.commit()
+        assert service.get_team_schedule(DAY, END) == []
+
+        SchedulerService(session).publish_schedule(DAY, END)
+        assert len(service.get_team_schedule(DAY, END)) == 10
+
+    def test_giveaway_invalidates(self, session, crew):
+        service = EmployeeService(session)
+        (row,) = service.get_schedule(crew[0].id, DAY, DAY)
+        assert not row["is_on_giveaway"]
+
+        session.add(ShiftGiveaway(schedule_id=row["id"], offered_by=crew[0].id))
+        session.commit()
+        (row,) = service.get_schedule(crew[0].id, DAY, DAY)
+        assert row["is_on_giveaway"]
+
+    def test_manual_assignment_invalidates(self, session, crew, shift_definition, job_role):
+        extra = User(username="late", password_hash="-", full_name="Late Joiner", role_system=RoleSystem.EMPLOYEE)
+        session.add(extra)
+        session.commit()
+        service = EmployeeService(session)
+        assert service.get_schedule(extra.id, DAY, END) == []
+
+        session.add(Schedule(date=DAY, shift_def_id=shift_definition.id, user_id=extra.id,
+                             role_id=job_role.id, is_published=True))
+        session.commit()
+        (row,) = service.get_schedule(extra.id, DAY, END)
+        assert len(row["coworkers"]) == 30
+        assert any(c["name"] == "Late Joiner" for c in service.get_schedule(crew[0].id, DAY, DAY)[0]["coworkers"])
+
+    def test_lru_bound(self, session, crew):
+        cache = ScheduleGridCache(max_entries=2)
+        for offset in range(4):
+            cache.get(session, DAY + timedelta(days=offset), END)
+        assert len(cache) == 2
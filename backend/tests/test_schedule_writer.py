@@ -0,0 +1,110 @@
+"""
+Tests for diff-based bulk persistence of schedule ranges.
+"""
+import pytest
+from datetime import date, time, timedelta
+from sqlmodel import Session, select
+
+from app.models import User, RoleSystem, Schedule, Attendance, ShiftGiveaway
+from app.services.schedule_writer import save_schedule_range
+from app.services.solver_cache import SolveCache
+
+START = date(2025, 3, 3)
+END = START + timedelta(days=6)
+
+
+@pytest.fixture(name="staff")
+def staff_fixture(session: Session):
+    users = [
+        User(username=f"writer{i}", password_hash="-", full_name=f"Writer {i}", role_system=RoleSystem.EMPLOYEE)
+        for i in range(20)
+    ]
+    session.add_all(users)
+    session.commit()
+    return users
+
+
+def _week(staff, shift_definition, job_role):
+    return {(u.id, START + timedelta(days=i), shift_definition.id, job_role.id) for u in staff for i in range(7)}
+
+
+def _saved(session: Session):
+    return {
+        (s.user_id, s.date, s.shift_def_id, s.role_id): s
+        for s in session.exec(select(Schedule)).all()
+    }
+
+
+class TestSaveScheduleRange:
+    def test_bulk_insert_uses_few_statements(self, session, staff, shift_definition, job_role, count_statements):
+        week = _week(staff, shift_definition, job_role)
+        diff, statements = count_statements(
+            lambda: save_schedule_range(session, START, END, week, published=True)
+        )
+        session.commit()
+
+        assert diff.inserted == len(week) == 140
+        # Select, insert and change log, plus the one-month hours rollup refresh
+        assert statements <= 8
+        saved = _saved(session)
+        assert set(saved) == week
+        assert all(s.is_published for s in saved.values())
+        assert {diff.ids[key] for key in week} == {s.id for s in saved.values()}
+
+    def test_unchanged_rows_keep_ids_and_links(self, session, staff, shift_definition, job_role):
+        week = _week(staff, shift_definition, job_role)
+        save_schedule_range(session, START, END, week, published=True)
+        session.commit()
+        saved = _saved(session)
+        kept_key, dropped_key = sorted(week, key=lambda k: (k[1], str(k[0])))[:2]
+        for key in (kept_key, dropped_key):
+            session.add(Attendance(
+                user_id=key[0], date=key[1], check_in=time(9), check_out=time(17), schedule_id=saved[key].id
+            ))
+        session.add(ShiftGiveaway(schedule_id=saved[dropped_key].id, offered_by=dropped_key[0]))
+        session.commit()
+
+        diff = save_schedule_range(session, START, END, week - {dropped_key}, published=True)
+        session.commit()
+
+        assert (diff.inserted, diff.deleted, diff.updated) == (0, 1, 0)
+        assert _saved(session)[kept_key].id == saved[kept_key].id
+        links = {a.user_id: a.schedule_id for a in session.exec(select(Attendance)).all()}
+        assert links == {kept_key[0]: saved[kept_key].id, dropped_key[0]: None}
+        assert session.exec(select(ShiftGiveaway)).all() == []
+
+    def test_publish_flag_updated_in_bulk(self, session, staff, shift_definition, job_role, count_statements):
+        week = _week(staff, shift_definition, job_role)
+        save_schedule_range(session, START, END, week, published=False)
+        session.commit()
+
+        diff, statements = count_statements(
+            lambda: save_schedule_range(session, START, END, week, published=True)
+        )
+        session.commit()
+
+        assert diff.updated == len(week)
+        assert statements <= 8
+        assert all(s.is_published for s in _saved(session).values())
+
+    def test_repair_keeps_published_state(self, session, staff, shift_definition, job_role):
+        week = _week(staff, shift_definition, job_role)
+        added = (staff[0].id, START, shift_definition.id, job_role.id)
+        save_schedule_range(session, START, END, week - {added}, published=True)
+        session.commit()
+
+        diff = save_schedule_range(session, START, END, week)
+        session.commit()
+
+        assert (diff.inserted, diff.updated, diff.unchanged) == (1, 0, len(week) - 1)
+        saved = _saved(session)
+        assert not saved[added].is_published
+        assert sum(s.is_published for s in saved.values()) == len(week) - 1
+
+    def test_invalidates_solve_cache(self, session, staff, shift_definition, job_role, monkeypatch):
+        cache = SolveCache()
+        cache.put("march", START, END, {"status": "success"})
+        monkeypatch.setattr("app.services.schedule_writer.solve_cache", cache)
+
+        save_schedule_range(session, START, END, _week(staff, shift_definition, job_role))
+        assert len(cache) == 0
@@ -72,6 +72,63 @@ class TestScheduleList:
         assert response.status_code == 200
 
 
+    @pytest.mark.asyncio
+    async def test_list_answers_if_none_match(
+        self, client: AsyncClient, auth_headers: dict,
+        session, shift_definition, job_role
+    ):
+        """Unchanged range is answered with 304, any change gives a new ETag"""
+        from app.models import User
+        from sqlmodel import select
+
+        user = session.exec(select(User)).first()
+        today = date.today()
+        session.add(Schedule(date=today, shift_def_id=shift_definition.id, user_id=user.id, role_id=job_role.id))
+        session.commit()
+        url = f"/scheduler/list?start_date={today}&end_date={today}"
+
+        first = await client.get(url, headers=auth_headers)
+        etag = first.headers["etag"]
+        unchanged = await client.get(url, headers={**auth_headers, "If-None-Match": etag})
+        assert unchanged.status_code == 304
+        assert unchanged.content == b""
+
+        job_role.name = "Renamed"
+        session.add(job_role)
+        session.commit()
+        changed = await client.get(url, headers={**auth_headers, "If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.headers["etag"] != etag
+        assert changed.json()[0]["role_name"] == "Renamed"
+
+    def test_list_is_one_query(self, session, shift_definition, job_role):
+        """Listing runs a single joined query however many rows the range has"""
+        from sqlalchemy import event
+        from app.models import User, RoleSystem
+        from app.services.scheduler_service import SchedulerService
+
+        today = date.today()
+        for i in range(10):
+            user = User(username=f"listed{i}", password_hash="-", full_name=f"Listed {i}", role_system=RoleSystem.EMPLOYEE)
+            session.add(user)
+            session.flush()
+            session.add(Schedule(date=today, shift_def_id=shift_definition.id, user_id=user.id, role_id=job_role.id))
+        session.commit()
+
+        statements = []
+        engine = session.get_bind()
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            listed = SchedulerService(session).get_schedule_list(today, today)
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+
+        assert len(listed) == 10
+        assert {row["user_name"] for row in listed} == {f"Listed {i}" for i in range(10)}
+        assert len(statements) == 1
+
+
 class TestScheduleGeneration:
     """Tests for /scheduler/generate endpoint"""
     
@@ -90,6 +147,11 @@ class TestScheduleGeneration:
             }
         )
         
+        assert response.status_code == 202
+        job = response.json()
+        assert job["status"] == "SUCCEEDED"
+
+        response = await client.get(f"/scheduler/jobs/{job['job_id']}/result", headers=auth_headers)
         assert response.status_code == 200
         data = response.json()
         assert "status" in data
@@ -109,7 +171,7 @@ class TestScheduleGeneration:
             }
         )
         
-        assert response.status_code == 200
+        assert response.status_code == 202
     
     @pytest.mark.asyncio
     async def test_generate_requires_manager(self, client: AsyncClient, employee_headers: dict):
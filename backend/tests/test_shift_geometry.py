@@ -0,0 +1,59 @@
+"""
+Tests for the shared shift geometry index (durations, conflict matrix, caching).
+"""
+from datetime import time
+from types import SimpleNamespace
+
+from app.models import ShiftDefinition
+from app.services.shift_geometry import geometry_for, load_shift_geometry, minute_span
+
+
+def _shift(s_id, start, end):
+    return SimpleNamespace(id=s_id, start_time=start, end_time=end)
+
+
+MORNING = _shift(1, time(8, 0), time(16, 0))
+HANDOVER = _shift(2, time(15, 30), time(23, 0))
+LATE = _shift(3, time(15, 29), time(23, 0))
+BRIEFING = _shift(4, time(9, 0), time(9, 20))
+NIGHT = _shift(5, time(22, 0), time(6, 0))
+
+
+class TestShiftGeometry:
+    def test_overnight_span(self):
+        assert minute_span(NIGHT.start_time, NIGHT.end_time) == (22 * 60, 30 * 60)
+        assert geometry_for([NIGHT]).duration_hours(5) == 8.0
+
+    def test_conflict_rules(self):
+        geometry = geometry_for([MORNING, HANDOVER, LATE, BRIEFING, NIGHT])
+
+        assert geometry.conflict(1, 1)
+        # 30 minutes is a handover, 31 is an overlap
+        assert not geometry.conflict(1, 2)
+        assert geometry.conflict(1, 3)
+        # Short but enveloped
+        assert geometry.conflict(1, 4)
+        assert geometry.conflict(4, 1)
+        assert geometry.conflict(2, 5)
+        assert (1, 3) in geometry.conflict_pairs()
+        assert (1, 2) not in geometry.conflict_pairs()
+
+    def test_unknown_shift_never_conflicts(self):
+        assert not geometry_for([MORNING]).conflict(1, 99)
+        assert 99 not in geometry_for([MORNING])
+
+    def test_cached_per_version(self):
+        first = geometry_for([MORNING, HANDOVER])
+        assert geometry_for([HANDOVER, MORNING]) is first
+
+        moved = _shift(2, time(15, 0), time(23, 0))
+        changed = geometry_for([MORNING, moved])
+        assert changed is not first
+        assert changed.conflict(1, 2)
+
+    def test_load_from_session(self, session):
+        session.add(ShiftDefinition(name="Night", start_time=time(22, 0), end_time=time(6, 0)))
+        session.commit()
+
+        geometry = load_shift_geometry(session)
+        assert list(geometry.hours_by_shift().values()) == [8.0]
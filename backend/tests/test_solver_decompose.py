@@ -0,0 +1,90 @@
+"""
+Tests for splitting solver snapshots into role groups / weeks and solving them in parallel.
+"""
+import dataclasses
+from datetime import date
+
+from ortools.sat.python import cp_model
+
+from app.services.solver import solve_decomposed
+from app.services.solver_decompose import (
+    calendar_weeks, decompose, role_groups, split_into_weeks, _apportion_int,
+)
+from app.services.solver_input import EmployeeInput
+from benchmarks.synthetic import generate_instance
+
+
+class TestDecompose:
+    def test_weeks_run_monday_to_sunday(self):
+        instance = generate_instance(5, n_days=31)  # 2025-03-01 is a Saturday
+        weeks = calendar_weeks(instance.days)
+
+        assert weeks[0] == (date(2025, 3, 1), date(2025, 3, 2))
+        assert all(week[0].weekday() == 0 for week in weeks[1:])
+        assert sum(len(week) for week in weeks) == 31
+
+    def test_single_role_staff_split_into_role_groups(self):
+        instance = generate_instance(30, n_days=7, max_roles=1)
+        groups = role_groups(instance)
+
+        assert len(groups) == len(instance.roles)
+        for e in instance.employees:
+            assert sum(1 for g in groups if e.role_ids <= g) == 1
+
+    def test_employee_spanning_roles_joins_groups(self):
+        instance = generate_instance(30, n_days=7, max_roles=1)
+        bridge = EmployeeInput(id=instance.employees[0].id, full_name="Bridge", role_ids=frozenset({1, 2}))
+        instance = dataclasses.replace(instance, employees=(bridge,) + instance.employees[1:])
+
+        groups = role_groups(instance)
+        assert frozenset({1, 2}) <= next(g for g in groups if 1 in g)
+
+    def test_shift_budget_apportioned_exactly(self):
+        assert sum(_apportion_int(20, [3, 0, 7, 5, 1])) == 20
+        assert _apportion_int(3, [0, 0, 0]) == [1, 1, 1]
+
+    def test_week_budgets_add_up_to_monthly_targets(self):
+        instance = generate_instance(20, n_days=31)
+        pieces = split_into_weeks(instance)
+
+        for e in instance.employees:
+            weekly = [next(p_e for p_e in p.employees if p_e.id == e.id) for p in pieces]
+            if e.target_shifts_per_month is not None:
+                assert sum(p_e.target_shifts_per_month for p_e in weekly) == e.target_shifts_per_month
+            if e.target_hours_per_month is not None:
+                remaining = max(0.0, e.target_hours_per_month - instance.mtd_hours.get(e.id, 0.0))
+                budgets = [e.target_hours_per_month - p.mtd_hours[e.id] for p in pieces]
+                assert abs(sum(budgets) - remaining) < 1e-6
+
+    def test_pieces_cover_every_requirement(self):
+        instance = generate_instance(30, n_days=31, max_roles=1)
+        pieces = decompose(instance)
+
+        covered = {}
+        for piece in pieces:
+            covered.update(piece.requirements)
+        staffed_roles = {r_id for e in instance.employees for r_id in e.role_ids}
+        assert covered == {k: v for k, v in instance.requirements.items() if k[2] in staffed_roles}
+
+
+class TestSolveDecomposed:
+    def test_stitched_schedule_is_valid(self):
+        instance = generate_instance(12, n_days=14)
+        status, assigned = solve_decomposed(instance, time_limit=10.0)
+
+        assert status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+        assert assigned
+        slot_counts = {}
+        for e_id, d, s_id, r_id in assigned:
+            assert instance.availability[(e_id, d, s_id)] in ("AVAILABLE", "PREFERRED")
+            slot_counts[(d, s_id, r_id)] = slot_counts.get((d, s_id, r_id), 0) + 1
+        for slot, count in slot_counts.items():
+            assert count <= instance.requirements[slot]
+
+    def test_reports_each_piece(self):
+        instance = generate_instance(12, n_days=14)
+        events = []
+        solve_decomposed(instance, time_limit=10.0, on_piece=events.append)
+
+        assert len(events) == len(decompose(instance))
+        assert all(e["type"] == "piece" for e in events)
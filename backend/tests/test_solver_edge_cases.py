@@ -126,6 +126,8 @@ class TestSolverEdgeCases:
             "end_date": str(data["test_date"])
         })
         
+        assert res.status_code == 202
+        res = client.get(f"/scheduler/jobs/{res.json()['job_id']}/result", headers=auth_headers)
         assert res.status_code == 200
         result_json = res.json()
         
@@ -0,0 +1,99 @@
+"""
+Tests for the greedy/local-search draft engine and the shared objective evaluation.
+"""
+import time
+import pytest
+from datetime import date
+from httpx import AsyncClient
+from ortools.sat.python import cp_model
+
+from app.services.solver import SolverService, build_model
+from app.services.solver_heuristic import draft_schedule
+from app.services.shift_geometry import geometry_for
+from app.services.solver_objective import evaluate
+from benchmarks.synthetic import generate_instance
+
+
+def _optimum(instance):
+    model, work = build_model(instance)
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = 30.0
+    solver.parameters.num_workers = 8
+    assert solver.Solve(model) == cp_model.OPTIMAL
+    keys = {key for key, var in work.items() if solver.BooleanValue(var)}
+    return solver.ObjectiveValue(), keys
+
+
+class TestDraftSchedule:
+    def test_draft_is_feasible(self):
+        instance = generate_instance(30, n_days=14)
+        draft = draft_schedule(instance)
+        overlaps = geometry_for(instance.shifts).conflict_pairs()
+        qualified = {e.id: set(e.role_ids) for e in instance.employees}
+
+        assert draft
+        filled = {}
+        worked = {}
+        for e_id, d, s_id, r_id in draft:
+            assert instance.availability[(e_id, d, s_id)] in ("AVAILABLE", "PREFERRED")
+            assert r_id in qualified[e_id]
+            filled[(d, s_id, r_id)] = filled.get((d, s_id, r_id), 0) + 1
+            worked.setdefault((e_id, d), set()).add(s_id)
+        for slot, count in filled.items():
+            assert count <= instance.requirements[slot]
+        for shifts in worked.values():
+            for s1_id, s2_id in overlaps:
+                assert not {s1_id, s2_id} <= shifts
+
+    def test_draft_is_deterministic(self):
+        instance = generate_instance(20, n_days=7)
+        assert draft_schedule(instance, search_budget=None) == draft_schedule(instance, search_budget=None)
+
+    def test_draft_close_to_optimum(self):
+        instance = generate_instance(15, n_days=7)
+        optimum, _ = _optimum(instance)
+        draft_value = evaluate(instance, draft_schedule(instance, search_budget=None))
+
+        assert draft_value <= optimum
+        assert draft_value >= 0.9 * optimum
+
+    def test_draft_is_fast(self):
+        instance = generate_instance(200, n_days=31)
+        started = time.perf_counter()
+        draft_schedule(instance)
+        assert time.perf_counter() - started < 2.0
+
+
+class TestEvaluate:
+    def test_matches_cp_sat_objective(self):
+        instance = generate_instance(10, n_days=5)
+        optimum, keys = _optimum(instance)
+        assert evaluate(instance, keys) == optimum
+
+    def test_empty_schedule_scores_zero(self):
+        assert evaluate(generate_instance(5, n_days=3), set()) == 0
+
+
+class TestDraftEngine:
+    def test_heuristic_engine(self, session, staffed_day):
+        result = SolverService(session).solve(date.today(), date.today(), save=False, engine="heuristic")
+        assert result["status"] == "success"
+        assert result["count"] == 1
+        assert result["schedules"][0]["user_id"] == staffed_day.id
+
+    def test_heuristic_hint(self, session, staffed_day):
+        result = SolverService(session).solve(date.today(), date.today(), save=False, heuristic_hint=True)
+        assert result["count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_draft_endpoint(self, client: AsyncClient, auth_headers: dict, staffed_day):
+        today = date.today()
+        response = await client.post(
+            "/scheduler/draft",
+            headers=auth_headers,
+            json={"start_date": str(today), "end_date": str(today)}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["count"] == 1
+        assert data["telemetry"]["solve_ms"] is not None
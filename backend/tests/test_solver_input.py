@@ -0,0 +1,117 @@
+"""
+Tests for SolverInputLoader (bulk loading of solver inputs into an immutable snapshot).
+"""
+import dataclasses
+import pytest
+from datetime import date, time, timedelta
+from sqlmodel import Session
+
+from app.models import (
+    User, JobRole, ShiftDefinition, ShiftDefinitionDayLink, Availability,
+    StaffingRequirement, Schedule, RoleSystem, AvailabilityStatus, UserJobRoleLink
+)
+from app.services.solver_input import SolverInputLoader
+
+MONTH_START = date(2025, 3, 1)
+SOLVE_START = date(2025, 3, 15)  # a Saturday, mid-month
+
+
+def _add_staff(session: Session, roles, shifts, count: int, offset: int = 0):
+    users = []
+    for i in range(offset, offset + count):
+        user = User(
+            username=f"loader{i}",
+            password_hash="-",
+            full_name=f"Loader {i}",
+            role_system=RoleSystem.EMPLOYEE,
+            target_hours_per_month=160,
+        )
+        session.add(user)
+        session.flush()
+        for role in roles:
+            session.add(UserJobRoleLink(user_id=user.id, role_id=role.id))
+        for day in range(1, 15):
+            session.add(Schedule(
+                date=MONTH_START + timedelta(days=day - 1), shift_def_id=shifts[day % 2].id,
+                user_id=user.id, role_id=roles[0].id
+            ))
+        for day in range(7):
+            session.add(Availability(
+                user_id=user.id, date=SOLVE_START + timedelta(days=day), shift_def_id=shifts[0].id,
+                status=AvailabilityStatus.AVAILABLE
+            ))
+        users.append(user)
+    session.commit()
+    return users
+
+
+@pytest.fixture(name="setup")
+def setup_fixture(session: Session):
+    roles = [JobRole(name="Kelner", color_hex="#111111"), JobRole(name="Kucharz", color_hex="#222222")]
+    day_shift = ShiftDefinition(name="Dzień", start_time=time(8, 0), end_time=time(16, 0))
+    night_shift = ShiftDefinition(name="Noc", start_time=time(22, 0), end_time=time(4, 0))
+    session.add_all(roles + [day_shift, night_shift])
+    session.commit()
+    session.add(ShiftDefinitionDayLink(shift_def_id=night_shift.id, day_of_week=4))
+    session.add(ShiftDefinitionDayLink(shift_def_id=night_shift.id, day_of_week=5))
+    session.commit()
+    return roles, [day_shift, night_shift]
+
+
+class TestSolverInputLoader:
+    def test_query_count_independent_of_data_size(self, session: Session, setup, count_statements):
+        roles, shifts = setup
+        end = SOLVE_START + timedelta(days=6)
+        _add_staff(session, roles, shifts, 2)
+        _, small = count_statements(lambda: SolverInputLoader(session).load(SOLVE_START, end))
+
+        _add_staff(session, roles, shifts, 20, offset=2)
+        data, large = count_statements(lambda: SolverInputLoader(session).load(SOLVE_START, end))
+
+        assert len(data.employees) == 22
+        assert large == small
+
+    def test_month_to_date_hours(self, session: Session, setup):
+        roles, shifts = setup
+        user = _add_staff(session, roles, shifts, 1)[0]
+
+        data = SolverInputLoader(session).load(SOLVE_START, SOLVE_START)
+
+        # 7 day shifts (8h) and 7 overnight shifts (6h) between the 1st and the 14th
+        assert data.mtd_hours[user.id] == pytest.approx(7 * 8 + 7 * 6)
+        assert data.mtd_shifts[user.id] == 14
+
+    def test_snapshot_contents(self, session: Session, setup):
+        roles, shifts = setup
+        user = _add_staff(session, roles, shifts, 1)[0]
+
+        data = SolverInputLoader(session).load(SOLVE_START, SOLVE_START + timedelta(days=1))
+
+        assert data.days == (SOLVE_START, SOLVE_START + timedelta(days=1))
+        assert data.employees[0].role_ids == frozenset(r.id for r in roles)
+        night = next(s for s in data.shifts if s.id == shifts[1].id)
+        assert night.weekdays == frozenset({4, 5})
+        assert next(s for s in data.shifts if s.id == shifts[0].id).weekdays == frozenset(range(7))
+        assert data.availability[(user.id, SOLVE_START, shifts[0].id)] == "AVAILABLE"
+
+    def test_specific_requirement_overrides_weekly(self, session: Session, setup):
+        roles, shifts = setup
+        session.add(StaffingRequirement(shift_def_id=shifts[0].id, role_id=roles[0].id, min_count=2, day_of_week=5))
+        session.add(StaffingRequirement(shift_def_id=shifts[0].id, role_id=roles[0].id, min_count=4, date=SOLVE_START))
+        # Outside the range: ignored
+        session.add(StaffingRequirement(shift_def_id=shifts[0].id, role_id=roles[1].id, min_count=9, date=MONTH_START))
+        session.commit()
+
+        data = SolverInputLoader(session).load(SOLVE_START, SOLVE_START + timedelta(days=7))
+
+        assert data.requirements[(SOLVE_START, shifts[0].id, roles[0].id)] == 4
+        assert data.requirements[(SOLVE_START + timedelta(days=7), shifts[0].id, roles[0].id)] == 2
+        assert (MONTH_START, shifts[0].id, roles[1].id) not in data.requirements
+
+    def test_snapshot_is_immutable(self, session: Session, setup):
+        data = SolverInputLoader(session).load(SOLVE_START, SOLVE_START)
+
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            data.days = ()
+        with pytest.raises(TypeError):
+            data.requirements[(SOLVE_START, 1, 1)] = 1
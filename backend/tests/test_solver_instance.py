@@ -0,0 +1,62 @@
+"""
+Tests for the on-disk solver instance format and the replay benchmark helpers.
+"""
+import dataclasses
+import json
+import pytest
+from datetime import date
+
+from app.services import solver as solver_module
+from app.services.solver import SolverService
+from app.services.solver_instance import (
+    InstanceFormatError, instance_to_dict, instance_from_dict, load_instance, save_instance,
+)
+from benchmarks.replay import regressions
+from benchmarks.synthetic import generate_instance
+
+
+@pytest.fixture(name="instance")
+def instance_fixture():
+    instance = generate_instance(6, n_days=5)
+    e_id = instance.employees[0].id
+    d, s_id, r_id = next(iter(instance.requirements))
+    return dataclasses.replace(instance, existing=frozenset({(e_id, d, s_id, r_id)}))
+
+
+class TestInstanceFormat:
+    @pytest.mark.parametrize("name", ["instance.json", "instance.json.gz"])
+    def test_round_trip(self, tmp_path, instance, name):
+        path = save_instance(instance, str(tmp_path / name), anonymize=False)
+        assert load_instance(path) == instance
+
+    def test_names_anonymized_by_default(self, instance):
+        payload = instance_to_dict(instance)
+        assert [e["full_name"] for e in payload["employees"]][:2] == ["Employee 1", "Employee 2"]
+        assert instance_from_dict(payload).availability == instance.availability
+
+    def test_unknown_version_rejected(self, instance):
+        payload = instance_to_dict(instance)
+        payload["version"] = 999
+        with pytest.raises(InstanceFormatError):
+            instance_from_dict(json.loads(json.dumps(payload)))
+
+    def test_solve_exports_input(self, session, tmp_path, monkeypatch):
+        monkeypatch.setattr(solver_module, "SOLVER_EXPORT_DIR", str(tmp_path))
+        SolverService(session).solve(date.today(), date.today(), save=False)
+
+        files = list(tmp_path.iterdir())
+        assert len(files) == 1
+        assert load_instance(str(files[0])).start_date == date.today()
+
+
+class TestReplayRegressions:
+    BASELINE = {"status": "OPTIMAL", "objective": 1000.0, "build_s": 1.0, "solve_s": 2.0}
+
+    def test_within_tolerance(self):
+        row = {**self.BASELINE, "objective": 950.0, "solve_s": 2.3}
+        assert regressions(row, self.BASELINE, tolerance=0.2) == []
+
+    def test_flags_status_objective_and_time(self):
+        row = {**self.BASELINE, "status": "FEASIBLE", "objective": 500.0, "solve_s": 5.0}
+        found = regressions(row, self.BASELINE, tolerance=0.2)
+        assert len(found) == 3
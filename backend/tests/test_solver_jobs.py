@@ -0,0 +1,441 @@
+"""
+Tests for the asynchronous solver job queue (SolverJobManager + /scheduler/jobs endpoints).
+"""
+import threading
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from uuid import uuid4
+from fastapi import HTTPException
+from httpx import AsyncClient
+from sqlmodel import select
+
+from app.models import Availability, AvailabilityStatus, Schedule
+from app.services.solver import SolverService
+from app.services.solver_cache import SolveCache, input_fingerprint, solve_cache
+from app.services.solver_input import ChangeSet, SolverInputLoader
+from app.services.solver_jobs import SolverJobManager, SolverJobStatus
+
+
+@pytest.fixture(name="blocking_jobs")
+def blocking_jobs_fixture():
+    """A single-worker manager whose jobs block until `release` is set."""
+    release = threading.Event()
+    started = threading.Event()
+
+    def runner(start, end, progress):
+        started.set()
+        release.wait(timeout=5)
+        return {"status": "success", "count": 0, "schedules": [], "warnings": []}
+
+    manager = SolverJobManager(max_pending=2, executor=ThreadPoolExecutor(max_workers=1), runner=runner)
+    yield manager, started, release
+    release.set()
+    manager.shutdown()
+
+
+class TestSolverJobManager:
+    def test_job_lifecycle(self, blocking_jobs):
+        manager, started, release = blocking_jobs
+        job = manager.submit(date.today(), date.today())
+
+        assert started.wait(timeout=5)
+        assert job.status == SolverJobStatus.RUNNING
+        assert job.result is None
+
+        release.set()
+        job.future.result(timeout=5)
+        assert job.status == SolverJobStatus.SUCCEEDED
+        assert job.result["status"] == "success"
+        assert job.finished_at is not None
+
+    def test_second_job_waits_in_queue(self, blocking_jobs):
+        manager, started, release = blocking_jobs
+        first = manager.submit(date.today(), date.today())
+        assert started.wait(timeout=5)
+        second = manager.submit(date.today(), date.today())
+
+        assert second.status == SolverJobStatus.QUEUED
+        assert manager.queue_position(second) == 1
+        assert manager.queue_position(first) is None
+
+    def test_cancel_queued_job(self, blocking_jobs):
+        manager, started, release = blocking_jobs
+        manager.submit(date.today(), date.today())
+        assert started.wait(timeout=5)
+        queued = manager.submit(date.today(), date.today())
+
+        manager.cancel(queued.id)
+        assert queued.status == SolverJobStatus.CANCELLED
+        assert queued.finished_at is not None
+
+    def test_cancel_running_job_discards_result(self, blocking_jobs):
+        manager, started, release = blocking_jobs
+        job = manager.submit(date.today(), date.today())
+        assert started.wait(timeout=5)
+
+        manager.cancel(job.id)
+        release.set()
+        job.future.result(timeout=5)
+        assert job.status == SolverJobStatus.CANCELLED
+        assert job.result is None
+
+    def test_queue_full_rejected(self, blocking_jobs):
+        manager, started, release = blocking_jobs
+        manager.submit(date.today(), date.today())
+        manager.submit(date.today(), date.today())
+
+        with pytest.raises(HTTPException) as exc:
+            manager.submit(date.today(), date.today())
+        assert exc.value.status_code == 503
+
+    def test_stop_running_job(self, blocking_jobs):
+        manager, started, release = blocking_jobs
+        job = manager.submit(date.today(), date.today())
+        assert started.wait(timeout=5)
+
+        manager.stop(job.id)
+        assert job.stop_event.is_set()
+        release.set()
+        job.future.result(timeout=5)
+        # Stopping keeps the result, unlike cancelling
+        assert job.status == SolverJobStatus.SUCCEEDED
+
+    def test_stop_queued_job_conflicts(self, blocking_jobs):
+        manager, started, release = blocking_jobs
+        manager.submit(date.today(), date.today())
+        assert started.wait(timeout=5)
+        queued = manager.submit(date.today(), date.today())
+
+        with pytest.raises(HTTPException) as exc:
+            manager.stop(queued.id)
+        assert exc.value.status_code == 409
+
+    def test_progress_events_end_with_done(self):
+        def runner(start, end, progress):
+            progress.emit({"type": "solution", "solution": 1})
+            progress.emit({"type": "solution", "solution": 2})
+            return {"status": "success", "count": 0, "schedules": [], "warnings": []}
+
+        manager = SolverJobManager(executor=ThreadPoolExecutor(max_workers=1), runner=runner)
+        job = manager.submit(date.today(), date.today())
+        job.future.result(timeout=5)
+
+        events = job.wait_for_events(0, timeout=5)
+        assert [e["type"] for e in events] == ["solution", "solution", "done"]
+        assert events[-1]["status"] == "SUCCEEDED"
+        assert job.events_closed
+        assert manager.to_dict(job)["solutions_found"] == 2
+        manager.shutdown()
+
+    def test_failed_job_reports_error(self):
+        def runner(start, end, progress):
+            raise RuntimeError("boom")
+
+        manager = SolverJobManager(executor=ThreadPoolExecutor(max_workers=1), runner=runner)
+        job = manager.submit(date.today(), date.today())
+        job.future.exception(timeout=5)
+
+        assert job.status == SolverJobStatus.FAILED
+        assert "boom" in job.error
+        assert job.wait_for_events(0, timeout=5)[-1]["error"] == job.error
+        manager.shutdown()
+
+
+class TestSolutionStreaming:
+    def test_solver_reports_intermediate_solutions(self, session, staffed_day):
+        events = []
+        result = SolverService(session).solve(date.today(), date.today(), save=False, on_solution=events.append)
+
+        assert result["status"] == "success"
+        assert events
+        last = events[-1]
+        assert last["type"] == "solution"
+        assert last["count"] == result["count"] == 1
+        assert last["warnings"] == []
+        # Diffs replay to the final assignment set
+        assigned = set()
+        for event in events:
+            assigned |= {(a["user_id"], a["shift_def_id"]) for a in event["added"]}
+            assigned -= {(a["user_id"], a["shift_def_id"]) for a in event["removed"]}
+        assert assigned == {(str(staffed_day.id), result["schedules"][0]["shift_def_id"])}
+
+    def test_preset_stop_event_ends_search(self, session, staffed_day):
+        stop = threading.Event()
+        stop.set()
+        result = SolverService(session).solve(date.today(), date.today(), save=False, stop_event=stop)
+        assert result["status"] in ["success", "infeasible"]
+
+
+class TestIncrementalRepair:
+    def test_repair_drops_unavailable_assignment(self, session, staffed_day, job_role, shift_definition):
+        today = date.today()
+        session.add(Schedule(date=today, shift_def_id=shift_definition.id, user_id=staffed_day.id, role_id=job_role.id))
+        availability = session.exec(select(Availability).where(Availability.user_id == staffed_day.id)).one()
+        availability.status = AvailabilityStatus.UNAVAILABLE
+        session.add(availability)
+        session.commit()
+
+        change_set = ChangeSet(user_ids=frozenset([staffed_day.id]), dates=frozenset([today]))
+        result = SolverService(session).solve(today, today, save=True, change_set=change_set)
+
+        assert result["status"] == "success"
+        assert result["changes"] == {"added": 0, "removed": 1}
+        assert result["diff"]["removed"][0]["user_id"] == str(staffed_day.id)
+        assert session.exec(select(Schedule).where(Schedule.date == today)).all() == []
+
+    def test_assignments_outside_change_set_are_kept(self, session, staffed_day, job_role, shift_definition):
+        today = date.today()
+        session.add(Schedule(date=today, shift_def_id=shift_definition.id, user_id=staffed_day.id, role_id=job_role.id))
+        session.commit()
+
+        # Nobody else is affected, so the saved assignment stays even though it is outside the neighbourhood
+        change_set = ChangeSet(user_ids=frozenset([uuid4()]), dates=frozenset([today]))
+        result = SolverService(session).solve(today, today, save=False, change_set=change_set)
+
+        assert result["count"] == 1
+        assert result["diff"] == {"added": [], "removed": []}
+
+
+class TestSolveCache:
+    RESULT = {"status": "success", "count": 0, "schedules": [], "warnings": []}
+
+    def test_lru_eviction(self):
+        cache = SolveCache(max_entries=2)
+        cache.put("a", date(2025, 3, 1), date(2025, 3, 1), self.RESULT)
+        cache.put("b", date(2025, 3, 1), date(2025, 3, 1), self.RESULT)
+        cache.get("a")
+        cache.put("c", date(2025, 3, 1), date(2025, 3, 1), self.RESULT)
+
+        assert cache.get("a") is not None
+        assert cache.get("b") is None
+
+    def test_expired_entries_dropped(self):
+        cache = SolveCache(ttl_seconds=-1)
+        cache.put("a", date(2025, 3, 1), date(2025, 3, 1), self.RESULT)
+        assert cache.get("a") is None
+
+    def test_invalidate_overlapping_ranges(self):
+        cache = SolveCache()
+        cache.put("march", date(2025, 3, 1), date(2025, 3, 31), self.RESULT)
+        cache.put("april", date(2025, 4, 1), date(2025, 4, 30), self.RESULT)
+
+        assert cache.invalidate(date(2025, 3, 31), date(2025, 3, 31)) == 1
+        assert cache.get("march") is None
+        assert cache.get("april") is not None
+
+    def test_fingerprint_tracks_inputs(self, session, staffed_day):
+        today = date.today()
+        loader = SolverInputLoader(session)
+        first = input_fingerprint(loader.load(today, today), {"warm_start": False})
+
+        assert input_fingerprint(loader.load(today, today), {"warm_start": False}) == first
+        assert input_fingerprint(loader.load(today, today), {"warm_start": True}) != first
+
+        availability = session.exec(select(Availability).where(Availability.user_id == staffed_day.id)).one()
+        availability.status = AvailabilityStatus.UNAVAILABLE
+        session.add(availability)
+        session.commit()
+        assert input_fingerprint(loader.load(today, today), {"warm_start": False}) != first
+
+    def test_input_write_evicts_entries(self, session, staffed_day):
+        today = date.today()
+        solve_cache.put("today", today, today, self.RESULT)
+
+        availability = session.exec(select(Availability).where(Availability.user_id == staffed_day.id)).one()
+        availability.status = AvailabilityStatus.UNAVAILABLE
+        session.add(availability)
+        session.commit()
+
+        assert solve_cache.get("today") is None
+
+    def test_manager_serves_repeated_key_from_cache(self):
+        calls = []
+
+        def runner(start, end, progress):
+            calls.append(start)
+            return self.RESULT
+
+        manager = SolverJobManager(executor=ThreadPoolExecutor(max_workers=1), runner=runner, cache=SolveCache())
+        first = manager.submit(date.today(), date.today(), cache_key="key")
+        first.future.result(timeout=5)
+        second = manager.submit(date.today(), date.today(), cache_key="key")
+
+        assert len(calls) == 1
+        assert second.cached and second.status == SolverJobStatus.SUCCEEDED
+        assert second.result == self.RESULT
+        assert second.wait_for_events(0, timeout=1)[-1]["type"] == "done"
+        manager.shutdown()
+
+    def test_stopped_job_not_cached(self, blocking_jobs):
+        manager, started, release = blocking_jobs
+        manager.cache = SolveCache()
+        job = manager.submit(date.today(), date.today(), cache_key="key")
+        assert started.wait(timeout=5)
+
+        manager.stop(job.id)
+        release.set()
+        job.future.result(timeout=5)
+        assert manager.cache.get("key") is None
+
+
+class TestSolverJobEndpoints:
+    @pytest.mark.asyncio
+    async def test_generate_then_fetch_result(self, client: AsyncClient, auth_headers: dict):
+        today = date.today()
+        response = await client.post(
+            "/scheduler/generate",
+            headers=auth_headers,
+            json={"start_date": str(today), "end_date": str(today)}
+        )
+        assert response.status_code == 202
+        job = response.json()
+
+        response = await client.get(f"/scheduler/jobs/{job['job_id']}", headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json()["status"] == "SUCCEEDED"
+
+        response = await client.get(f"/scheduler/jobs/{job['job_id']}/result", headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json()["status"] in ["success", "infeasible"]
+
+    @pytest.mark.asyncio
+    async def test_repeated_generate_is_cached(self, client: AsyncClient, auth_headers: dict, staffed_day):
+        today = date.today()
+        request = {"start_date": str(today), "end_date": str(today)}
+        first = (await client.post("/scheduler/generate", headers=auth_headers, json=request)).json()
+        second = (await client.post("/scheduler/generate", headers=auth_headers, json=request)).json()
+
+        assert not first["cached"]
+        assert second["cached"] and second["status"] == "SUCCEEDED"
+        result = (await client.get(f"/scheduler/jobs/{second['job_id']}/result", headers=auth_headers)).json()
+        assert result["count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_generate_loads_input_once(self, client: AsyncClient, auth_headers: dict, staffed_day, monkeypatch):
+        loads = []
+        load = SolverInputLoader.load
+        monkeypatch.setattr(SolverInputLoader, "load", lambda self, *args: loads.append(args) or load(self, *args))
+        today = date.today()
+        job = (await client.post(
+            "/scheduler/generate", headers=auth_headers, json={"start_date": str(today), "end_date": str(today)}
+        )).json()
+
+        # The snapshot fingerprinted by the endpoint is the one the job solves
+        assert job["status"] == "SUCCEEDED" and not job["cached"]
+        assert loads == [(today, today)]
+        result = (await client.get(f"/scheduler/jobs/{job['job_id']}/result", headers=auth_headers)).json()
+        assert result["count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_cancel_finished_job_conflicts(self, client: AsyncClient, auth_headers: dict):
+        today = date.today()
+        response = await client.post(
+            "/scheduler/generate",
+            headers=auth_headers,
+            json={"start_date": str(today), "end_date": str(today)}
+        )
+        job_id = response.json()["job_id"]
+
+        response = await client.delete(f"/scheduler/jobs/{job_id}", headers=auth_headers)
+        assert response.status_code == 409
+
+    @pytest.mark.asyncio
+    async def test_events_stream(self, client: AsyncClient, auth_headers: dict, staffed_day):
+        today = date.today()
+        response = await client.post(
+            "/scheduler/generate",
+            headers=auth_headers,
+            json={"start_date": str(today), "end_date": str(today)}
+        )
+        job_id = response.json()["job_id"]
+
+        response = await client.get(f"/scheduler/jobs/{job_id}/events", headers=auth_headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        body = response.text
+        assert "event: solution" in body
+        assert body.rstrip().split("\n\n")[-1].split("\n")[1] == "event: done"
+
+        # Resuming after the last received id only replays what came later
+        last_id = body.rstrip().split("\n\n")[-1].split("\n")[0].split(": ")[1]
+        response = await client.get(
+            f"/scheduler/jobs/{job_id}/events",
+            headers={**auth_headers, "Last-Event-ID": str(int(last_id) - 1)}
+        )
+        assert response.text.count("event: ") == 1
+        assert "event: done" in response.text
+
+    @pytest.mark.asyncio
+    async def test_warm_start_reports_changes(self, client: AsyncClient, auth_headers: dict, staffed_day):
+        today = date.today()
+        response = await client.post(
+            "/scheduler/generate",
+            headers=auth_headers,
+            json={"start_date": str(today), "end_date": str(today), "warm_start": True, "deviation_penalty": 1000}
+        )
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+
+        result = (await client.get(f"/scheduler/jobs/{job_id}/result", headers=auth_headers)).json()
+        assert result["status"] == "success"
+        # Nothing saved for today yet, so the one assignment is new
+        assert result["changes"] == {"added": 1, "removed": 0}
+
+    @pytest.mark.asyncio
+    async def test_negative_deviation_penalty_rejected(self, client: AsyncClient, auth_headers: dict):
+        today = date.today()
+        response = await client.post(
+            "/scheduler/generate",
+            headers=auth_headers,
+            json={"start_date": str(today), "end_date": str(today), "deviation_penalty": -1}
+        )
+        assert response.status_code == 422
+
+    @pytest.mark.asyncio
+    async def test_repair_returns_diff(self, client: AsyncClient, auth_headers: dict, staffed_day):
+        today = date.today()
+        response = await client.post(
+            "/scheduler/repair",
+            headers=auth_headers,
+            json={"start_date": str(today), "end_date": str(today), "user_ids": [str(staffed_day.id)]}
+        )
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+
+        result = (await client.get(f"/scheduler/jobs/{job_id}/result", headers=auth_headers)).json()
+        assert result["status"] == "success"
+        assert [a["user_id"] for a in result["diff"]["added"]] == [str(staffed_day.id)]
+
+    @pytest.mark.asyncio
+    async def test_repair_requires_change_set(self, client: AsyncClient, auth_headers: dict):
+        today = date.today()
+        response = await client.post(
+            "/scheduler/repair",
+            headers=auth_headers,
+            json={"start_date": str(today), "end_date": str(today)}
+        )
+        assert response.status_code == 422
+
+    @pytest.mark.asyncio
+    async def test_stop_finished_job_conflicts(self, client: AsyncClient, auth_headers: dict):
+        today = date.today()
+        response = await client.post(
+            "/scheduler/generate",
+            headers=auth_headers,
+            json={"start_date": str(today), "end_date": str(today)}
+        )
+        job_id = response.json()["job_id"]
+
+        response = await client.post(f"/scheduler/jobs/{job_id}/stop", headers=auth_headers)
+        assert response.status_code == 409
+
+    @pytest.mark.asyncio
+    async def test_unknown_job_not_found(self, client: AsyncClient, auth_headers: dict):
+        response = await client.get(f"/scheduler/jobs/{uuid4()}", headers=auth_headers)
+        assert response.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_jobs_require_manager(self, client: AsyncClient, employee_headers: dict):
+        response = await client.get(f"/scheduler/jobs/{uuid4()}", headers=employee_headers)
+        assert response.status_code == 403
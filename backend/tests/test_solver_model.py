@@ -0,0 +1,167 @@
+"""
+Tests for the CP-SAT model builder (sparse variable creation, warm starts, change sets,
+symmetry breaking).
+"""
+import dataclasses
+from types import MappingProxyType
+
+from ortools.sat.python import cp_model
+
+from app.services.solver import build_model, interchangeable_employees
+from app.services.solver_input import ChangeSet
+from benchmarks.synthetic import generate_instance
+
+
+def _build(instance, prune):
+    return build_model(instance, prune=prune)
+
+
+def _solve(model):
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = 30.0
+    solver.parameters.num_workers = 8
+    status = solver.Solve(model)
+    assert status == cp_model.OPTIMAL
+    return solver.ObjectiveValue()
+
+
+class TestSparseModel:
+    def test_only_schedulable_slots_get_variables(self):
+        instance = generate_instance(12, n_days=7)
+        _, work = _build(instance, prune=True)
+
+        assert work
+        for e_id, d, s_id, r_id in work:
+            assert instance.availability[(e_id, d, s_id)] in ("AVAILABLE", "PREFERRED")
+            assert instance.requirements.get((d, s_id, r_id), 0) > 0
+
+    def test_pruned_model_is_smaller(self):
+        instance = generate_instance(12, n_days=7)
+        _, dense_work = _build(instance, prune=False)
+        _, pruned_work = _build(instance, prune=True)
+
+        assert set(pruned_work) < set(dense_work)
+
+    def test_pruning_keeps_optimum(self):
+        instance = generate_instance(8, n_days=4)
+        dense_model, _ = _build(instance, prune=False)
+        pruned_model, _ = _build(instance, prune=True)
+
+        assert _solve(pruned_model) == _solve(dense_model)
+
+    def test_shift_weekdays_respected(self):
+        instance = generate_instance(12, n_days=7)
+        _, work = _build(instance, prune=False)
+        weekdays = {s.id: s.weekdays for s in instance.shifts}
+
+        for _, d, s_id, _ in work:
+            assert d.weekday() in weekdays[s_id]
+
+
+class TestWarmStart:
+    def _solve_keys(self, model, work):
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = 30.0
+        solver.parameters.num_workers = 8
+        assert solver.Solve(model) == cp_model.OPTIMAL
+        return {key for key, var in work.items() if solver.Value(var)}
+
+    def test_unchanged_input_keeps_saved_schedule(self):
+        instance = generate_instance(8, n_days=4)
+        saved = self._solve_keys(*_build(instance, prune=True))
+        resolve = dataclasses.replace(instance, existing=frozenset(saved))
+
+        model, work = build_model(resolve, warm_start=True, deviation_penalty=1000)
+        assert self._solve_keys(model, work) == saved
+
+    def test_deviation_penalty_minimises_changes(self):
+        instance = generate_instance(8, n_days=4)
+        saved = self._solve_keys(*_build(instance, prune=True))
+
+        # Manager drops one slot of a staffed requirement
+        slot = next((d, s_id, r_id) for _, d, s_id, r_id in sorted(saved, key=str))
+        requirements = dict(instance.requirements)
+        requirements[slot] -= 1
+        tweaked = dataclasses.replace(
+            instance, requirements=MappingProxyType(requirements), existing=frozenset(saved)
+        )
+
+        cold = self._solve_keys(*build_model(tweaked))
+        warm = self._solve_keys(*build_model(tweaked, warm_start=True, deviation_penalty=1000))
+        assert len(warm ^ saved) <= len(cold ^ saved)
+
+
+class TestChangeSet:
+    def _saved_instance(self):
+        instance = generate_instance(8, n_days=4)
+        saved = TestWarmStart()._solve_keys(*_build(instance, prune=True))
+        return dataclasses.replace(instance, existing=frozenset(saved)), saved
+
+    def test_only_neighbourhood_gets_variables(self):
+        instance, saved = self._saved_instance()
+        e_id, d, _, _ = sorted(saved, key=str)[0]
+        change_set = ChangeSet(user_ids=frozenset([e_id]), dates=frozenset([d]))
+
+        _, work = build_model(instance, change_set=change_set)
+        _, full_work = build_model(instance)
+        assert work
+        assert len(work) < len(full_work)
+        assert all(change_set.contains(key) for key in work)
+
+    def test_repair_respects_fixed_assignments(self):
+        instance, saved = self._saved_instance()
+        e_id, d, s_id, r_id = sorted(saved, key=str)[0]
+        change_set = ChangeSet(user_ids=frozenset([e_id]), dates=frozenset([d]), shift_ids=frozenset([s_id]))
+
+        # The employee can no longer work that shift
+        availability = dict(instance.availability)
+        availability[(e_id, d, s_id)] = "UNAVAILABLE"
+        changed = dataclasses.replace(instance, availability=MappingProxyType(availability))
+
+        repaired = TestWarmStart()._solve_keys(*build_model(changed, change_set=change_set))
+        schedule = repaired | {key for key in saved if not change_set.contains(key)}
+
+        assert (e_id, d, s_id, r_id) not in schedule
+        slot_counts = {}
+        for _, day, shift, role in schedule:
+            slot_counts[(day, shift, role)] = slot_counts.get((day, shift, role), 0) + 1
+        for slot, count in slot_counts.items():
+            assert count <= instance.requirements[slot]
+        day_shifts = [(e, day, shift) for e, day, shift, _ in schedule]
+        assert len(day_shifts) == len(set(day_shifts))
+
+    def test_unchanged_input_repairs_to_saved_schedule(self):
+        instance, saved = self._saved_instance()
+        e_id, d, _, _ = sorted(saved, key=str)[0]
+        change_set = ChangeSet(user_ids=frozenset([e_id]), dates=frozenset([d]))
+
+        model, work = build_model(instance, change_set=change_set, deviation_penalty=1000)
+        repaired = TestWarmStart()._solve_keys(model, work)
+        assert repaired == {key for key in saved if change_set.contains(key)}
+
+
+class TestSymmetryBreaking:
+    def test_profiles_detected_as_groups(self):
+        instance = generate_instance(12, n_days=4, profiles=3)
+        groups = interchangeable_employees(instance)
+
+        assert sorted(len(g) for g in groups) == [4, 4, 4]
+
+    def test_distinct_employees_not_grouped(self):
+        assert interchangeable_employees(generate_instance(12, n_days=7)) == []
+
+    def test_saved_assignments_split_groups(self):
+        instance = generate_instance(4, n_days=4, profiles=1)
+        e_id = instance.employees[0].id
+        d, s_id, r_id = next((d, s_id, r_id) for (d, s_id, r_id) in instance.requirements)
+        instance = dataclasses.replace(instance, existing=frozenset({(e_id, d, s_id, r_id)}))
+
+        groups = interchangeable_employees(instance)
+        assert all(e_id not in g for g in groups)
+
+    def test_symmetry_breaking_keeps_optimum(self):
+        instance = generate_instance(12, n_days=4, profiles=4)
+        plain, _ = build_model(instance, break_symmetry=False)
+        broken, _ = build_model(instance)
+
+        assert _solve(broken) == _solve(plain)
@@ -0,0 +1,86 @@
+"""
+Tests for the capacity pre-check run before the CP-SAT model is built.
+"""
+import dataclasses
+import pytest
+from datetime import date
+from types import MappingProxyType
+from httpx import AsyncClient
+
+from app.models import StaffingRequirement
+from app.services.solver import SolverService
+from app.services.solver_precheck import capacity_shortages, nothing_fillable, slot_capacity
+from benchmarks.synthetic import generate_instance
+
+
+class TestSlotCapacity:
+    def test_capacity_counts_available_qualified_staff(self):
+        instance = generate_instance(12, n_days=3)
+        capacity = slot_capacity(instance)
+
+        for (d, s_id, r_id), count in capacity.items():
+            expected = sum(
+                1 for e in instance.employees
+                if r_id in e.role_ids and instance.availability[(e.id, d, s_id)] in ("AVAILABLE", "PREFERRED")
+            )
+            assert count == expected
+
+    def test_shortages_explain_unfillable_slots(self):
+        instance = generate_instance(12, n_days=3)
+        slot = next(iter(instance.requirements))
+        requirements = dict(instance.requirements)
+        requirements[slot] = 100
+        instance = dataclasses.replace(instance, requirements=MappingProxyType(requirements))
+
+        shortages = capacity_shortages(instance, slot_capacity(instance))
+        shortage = next(s for s in shortages if (s["date"], s["shift_def_id"], s["role_id"]) == (
+            slot[0].isoformat(), slot[1], slot[2]
+        ))
+        assert shortage["missing"] == 100 - shortage["available"]
+        assert shortage["reason"]
+
+    def test_nothing_fillable_without_availability(self):
+        instance = generate_instance(12, n_days=3)
+        unavailable = dataclasses.replace(
+            instance, availability=MappingProxyType({k: "UNAVAILABLE" for k in instance.availability})
+        )
+
+        assert not nothing_fillable(instance, slot_capacity(instance))
+        assert nothing_fillable(unavailable, slot_capacity(unavailable))
+        assert all(
+            s["reason"] == "No qualified employee is available"
+            for s in capacity_shortages(unavailable, slot_capacity(unavailable))
+        )
+
+
+@pytest.fixture(name="unstaffed_day")
+def unstaffed_day_fixture(session, job_role, shift_definition):
+    """A requirement for today that nobody holds the role for."""
+    session.add(StaffingRequirement(
+        date=date.today(), shift_def_id=shift_definition.id, role_id=job_role.id, min_count=2
+    ))
+    session.commit()
+
+
+class TestPrecheckInSolve:
+    def test_hopeless_range_skips_solver(self, session, unstaffed_day):
+        result = SolverService(session).solve(date.today(), date.today(), save=False)
+
+        assert result["status"] == "success"
+        assert result["count"] == 0
+        assert result["precheck"][0]["reason"] == "No active employee holds this role"
+        assert result["warnings"][0]["missing"] == 2
+
+    @pytest.mark.asyncio
+    async def test_precheck_endpoint(self, client: AsyncClient, auth_headers: dict, unstaffed_day):
+        today = date.today()
+        response = await client.post(
+            "/scheduler/precheck",
+            headers=auth_headers,
+            json={"start_date": str(today), "end_date": str(today)}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["required_slots"] == 1
+        assert data["fillable"] is False
+        assert data["shortages"][0]["missing"] == 2
@@ -0,0 +1,104 @@
+"""
+Tests for CP-SAT search profiles and the process-wide solver thread budget.
+"""
+import threading
+import time
+import pytest
+from datetime import date
+from httpx import AsyncClient
+from ortools.sat.python import cp_model
+from sqlmodel import select
+
+from app.models import SolveRun
+from app.services.solver import SolverService
+from app.services.solver_profiles import PROFILES, ThreadBudget, get_profile
+
+
+class TestSolveProfile:
+    def test_apply_sets_search_parameters(self):
+        solver = cp_model.CpSolver()
+        PROFILES["fast"].apply(solver.parameters)
+
+        assert solver.parameters.num_workers == 4
+        assert solver.parameters.max_time_in_seconds == 3.0
+        assert solver.parameters.max_deterministic_time == 5.0
+        assert solver.parameters.relative_gap_limit == pytest.approx(0.02)
+        assert "max_lp" in solver.parameters.ignore_subsolvers
+
+    def test_shorter_time_limit_scales_deterministic_budget(self):
+        solver = cp_model.CpSolver()
+        PROFILES["balanced"].apply(solver.parameters, time_limit=5.0, num_workers=2)
+
+        assert solver.parameters.max_deterministic_time == PROFILES["balanced"].deterministic_time / 2
+        assert solver.parameters.num_workers == 2
+
+    def test_default_profile(self):
+        assert get_profile(None) is PROFILES["balanced"]
+        with pytest.raises(KeyError):
+            get_profile("exhaustive")
+
+
+class TestThreadBudget:
+    def test_grant_capped_by_total(self):
+        budget = ThreadBudget(4)
+        with budget.acquire(16) as granted:
+            assert granted == 4
+
+    def test_concurrent_solves_never_exceed_budget(self):
+        budget = ThreadBudget(4)
+        in_use, peak, lock = [0], [0], threading.Lock()
+
+        def solve():
+            with budget.acquire(3) as granted:
+                with lock:
+                    in_use[0] += granted
+                    peak[0] = max(peak[0], in_use[0])
+                time.sleep(0.05)
+                with lock:
+                    in_use[0] -= granted
+
+        threads = [threading.Thread(target=solve) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert peak[0] <= 4
+
+    def test_waiter_regranted_after_shrink(self):
+        budget = ThreadBudget(4)
+        grants = []
+
+        def solve():
+            with budget.acquire(4) as granted:
+                grants.append(granted)
+
+        with budget.acquire(2):
+            waiter = threading.Thread(target=solve)
+            waiter.start()
+            time.sleep(0.05)
+            # 4 threads can no longer be granted; the waiter must settle for the new total
+            budget.resize(2)
+        waiter.join(timeout=2)
+        assert not waiter.is_alive()
+        assert grants == [2]
+
+
+class TestProfileSelection:
+    def test_profile_recorded(self, session, staffed_day):
+        result = SolverService(session).solve(date.today(), date.today(), save=False, profile="fast")
+
+        run = session.exec(select(SolveRun)).one()
+        assert result["count"] == 1
+        assert run.profile == "fast"
+        assert 1 <= run.num_workers <= PROFILES["fast"].num_workers
+        assert run.deterministic_time is not None
+
+    @pytest.mark.asyncio
+    async def test_unknown_profile_rejected(self, client: AsyncClient, auth_headers: dict):
+        today = date.today()
+        response = await client.post(
+            "/scheduler/generate",
+            headers=auth_headers,
+            json={"start_date": str(today), "end_date": str(today), "profile": "exhaustive"}
+        )
+        assert response.status_code == 422
@@ -0,0 +1,130 @@
+"""
+Tests for per-month target budgets and the rolling-horizon solve of long ranges.
+"""
+import dataclasses
+from datetime import date, timedelta
+from types import MappingProxyType
+
+import pytest
+from ortools.sat.python import cp_model
+
+from app.models import User, RoleSystem, UserJobRoleLink, StaffingRequirement, Availability, AvailabilityStatus
+from app.auth_utils import get_password_hash
+from app.services.solver import SolverService, build_model, solve_rolling, _solve_model
+from app.services.solver_objective import evaluate, monthly_excess
+from app.services.solver_rolling import RollingHorizon, horizon_windows
+from benchmarks.synthetic import generate_instance
+
+
+def _with_target(instance, shifts: int):
+    employees = tuple(dataclasses.replace(e, target_shifts_per_month=shifts) for e in instance.employees)
+    return dataclasses.replace(instance, employees=employees)
+
+
+class TestMonthlyBudgets:
+    def test_each_month_has_its_own_budget(self):
+        instance = _with_target(generate_instance(3, n_days=4, start=date(2025, 3, 30)), 1)
+        e_id = instance.employees[0].id
+        s_id = instance.shifts[0].id
+        one_each = {(e_id, date(2025, 3, 30), s_id, 1), (e_id, date(2025, 4, 1), s_id, 1)}
+        both_in_march = {(e_id, date(2025, 3, 30), s_id, 1), (e_id, date(2025, 3, 31), s_id, 1)}
+
+        assert monthly_excess(instance, one_each)[0] == 0
+        assert monthly_excess(instance, both_in_march)[0] == 1
+
+    def test_carried_shifts_only_count_in_first_month(self):
+        instance = _with_target(generate_instance(3, n_days=4, start=date(2025, 3, 30)), 1)
+        e_id = instance.employees[0].id
+        s_id = instance.shifts[0].id
+        instance = dataclasses.replace(instance, mtd_shifts=MappingProxyType({e_id: 1}))
+
+        assert monthly_excess(instance, {(e_id, date(2025, 3, 30), s_id, 1)})[0] == 1
+        assert monthly_excess(instance, {(e_id, date(2025, 4, 1), s_id, 1)})[0] == 0
+
+    def test_evaluate_matches_model_across_months(self):
+        instance = generate_instance(8, n_days=6, start=date(2025, 3, 28))
+        model, work = build_model(instance)
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = 30.0
+        assert solver.Solve(model) == cp_model.OPTIMAL
+        keys = {key for key, var in work.items() if solver.BooleanValue(var)}
+        assert evaluate(instance, keys) == solver.ObjectiveValue()
+
+
+class TestHorizonWindows:
+    def test_commits_partition_the_range(self):
+        days = [date(2025, 1, 1) + timedelta(days=i) for i in range(90)]
+        windows = horizon_windows(days, window_days=14, commit_days=7)
+
+        committed = [d for _, commit in windows for d in commit]
+        assert committed == days
+        assert all(len(window) <= 14 for window, _ in windows)
+        assert windows[-1][0][-1] == days[-1]
+
+    def test_commit_longer_than_window_rejected(self):
+        with pytest.raises(ValueError):
+            horizon_windows([date(2025, 1, 1)], window_days=7, commit_days=14)
+
+    def test_window_carries_committed_month(self):
+        instance = generate_instance(3, n_days=20, start=date(2025, 3, 10))
+        # The generator seeds month-to-date hours; start from none so only the commit counts
+        instance = dataclasses.replace(
+            instance, mtd_hours=MappingProxyType({e.id: 0.0 for e in instance.employees})
+        )
+        horizon = RollingHorizon(instance)
+        e_id = instance.employees[0].id
+        s_id = instance.shifts[0].id
+        horizon.commit({(e_id, date(2025, 3, 10), s_id, 1), (e_id, date(2025, 3, 11), s_id, 1)})
+
+        window = horizon.window_input(tuple(instance.days[7:14]))
+        assert window.start_date == date(2025, 3, 17)
+        assert window.mtd_shifts[e_id] == 2
+        assert window.mtd_hours[e_id] == pytest.approx(2 * instance.shifts[0].duration_hours)
+        assert all(k[1] in window.days for k in window.availability)
+
+
+class TestSolveRolling:
+    def test_schedule_is_valid_across_months(self):
+        instance = generate_instance(10, n_days=45, start=date(2025, 3, 10))
+        events = []
+        status, assigned = solve_rolling(instance, time_limit=10.0, on_window=events.append)
+
+        assert status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+        assert {d for _, d, _, _ in assigned} <= set(instance.days)
+        slot_counts = {}
+        for e_id, d, s_id, r_id in assigned:
+            assert instance.availability[(e_id, d, s_id)] in ("AVAILABLE", "PREFERRED")
+            slot_counts[(d, s_id, r_id)] = slot_counts.get((d, s_id, r_id), 0) + 1
+        for slot, count in slot_counts.items():
+            assert count <= instance.requirements[slot]
+        assert [e["window"] for e in events] == list(range(1, len(events) + 1))
+        assert events[-1]["committed_until"] == instance.days[-1].isoformat()
+
+    def test_close_to_monolithic(self):
+        instance = generate_instance(8, n_days=28)
+        model, work = build_model(instance)
+        _, monolithic = _solve_model(model, work, 30.0)
+        _, rolling = solve_rolling(instance, time_limit=10.0)
+
+        assert evaluate(instance, rolling) >= 0.95 * evaluate(instance, monolithic)
+
+    def test_rolling_mode(self, session, job_role, shift_definition):
+        user = User(
+            username="rolling",
+            password_hash=get_password_hash("test"),
+            full_name="Rolling Employee",
+            role_system=RoleSystem.EMPLOYEE
+        )
+        session.add(user)
+        session.commit()
+        session.add(UserJobRoleLink(user_id=user.id, role_id=job_role.id))
+        today = date.today()
+        session.add(StaffingRequirement(date=today, shift_def_id=shift_definition.id, role_id=job_role.id, min_count=1))
+        session.add(Availability(
+            user_id=user.id, date=today, shift_def_id=shift_definition.id, status=AvailabilityStatus.AVAILABLE
+        ))
+        session.commit()
+
+        result = SolverService(session).solve(today, today + timedelta(days=20), save=False, rolling=True)
+        assert result["status"] == "success"
+        assert result["count"] == 1
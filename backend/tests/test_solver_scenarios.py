@@ -0,0 +1,138 @@
+"""
+Tests for what-if scenario overlays, their comparison metrics and the /scheduler/scenarios job.
+"""
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from httpx import AsyncClient
+
+from app.models import User, RoleSystem, UserJobRoleLink, StaffingRequirement, Availability, AvailabilityStatus
+from app.auth_utils import get_password_hash
+from app.services.solver_cache import SolveCache
+from app.services.solver_jobs import SolverJobManager, SolverJobStatus
+from app.services.solver_scenarios import apply_scenario, scenario_metrics, solve_scenario
+from benchmarks.synthetic import generate_instance
+
+
+@pytest.fixture(name="instance")
+def instance_fixture():
+    return generate_instance(10, n_days=7, availability_rate=0.2)
+
+
+class TestApplyScenario:
+    def test_requirement_delta_on_weekday(self, instance):
+        d, s_id, r_id = next(iter(instance.requirements))
+        patched = apply_scenario(instance, {"name": "more", "requirements": [
+            {"day_of_week": d.weekday(), "shift_def_id": s_id, "role_id": r_id, "delta": 1}
+        ]})
+
+        assert patched.requirements[(d, s_id, r_id)] == instance.requirements[(d, s_id, r_id)] + 1
+        assert instance.requirements != patched.requirements
+
+    def test_requirement_set_on_date(self, instance):
+        d, s_id, r_id = next(iter(instance.requirements))
+        patched = apply_scenario(instance, {"name": "closed", "requirements": [
+            {"date": d, "shift_def_id": s_id, "role_id": r_id, "min_count": 0}
+        ]})
+        assert patched.requirements[(d, s_id, r_id)] == 0
+
+    def test_remove_and_hire(self, instance):
+        removed = instance.employees[0]
+        role_id = instance.roles[0].id
+        patched = apply_scenario(instance, {
+            "name": "swap",
+            "remove_user_ids": [removed.id],
+            "add_staff": [{"name": "Waiter", "role_ids": [role_id]}],
+        })
+
+        assert removed.id not in {e.id for e in patched.employees}
+        assert all(k[0] != removed.id for k in patched.availability)
+        hire = patched.employees[-1]
+        assert hire.full_name == "Waiter"
+        assert patched.availability[(hire.id, instance.days[0], instance.shifts[0].id)] == "AVAILABLE"
+
+    def test_availability_override(self, instance):
+        e_id = instance.employees[0].id
+        key = (e_id, instance.days[0], instance.shifts[0].id)
+        patched = apply_scenario(instance, {"name": "off", "availability": [
+            {"user_id": e_id, "date": key[1], "shift_def_id": key[2], "status": AvailabilityStatus.UNAVAILABLE}
+        ]})
+        assert patched.availability[key] == "UNAVAILABLE"
+
+
+class TestScenarioMetrics:
+    def test_empty_schedule(self, instance):
+        metrics = scenario_metrics(instance, set())
+        assert metrics["assigned"] == 0
+        assert metrics["unfilled"] == metrics["required"]
+        assert metrics["objective"] == 0
+
+    def test_hiring_raises_fill_rate(self, instance):
+        base = solve_scenario(instance, time_limit=10.0)
+        hires = [{"role_ids": [r.id]} for r in instance.roles for _ in range(3)]
+        hired = solve_scenario(instance, {"name": "hire", "add_staff": hires}, time_limit=10.0)
+
+        assert base["name"] == "base"
+        assert hired["fill_rate"] > base["fill_rate"]
+
+
+class TestScenarioJobs:
+    def test_comparison_table(self, instance):
+        manager = SolverJobManager(executor=ThreadPoolExecutor(max_workers=2), cache=SolveCache())
+        d, s_id, r_id = next(iter(instance.requirements))
+        job = manager.submit_scenarios(instance, [
+            {"name": "closed", "requirements": [{"date": d, "shift_def_id": s_id, "role_id": r_id, "min_count": 0}]},
+            {"name": "without", "remove_user_ids": [instance.employees[0].id]},
+        ])
+        job.future.result(timeout=60)
+
+        assert job.status == SolverJobStatus.SUCCEEDED
+        rows = job.result["scenarios"]
+        assert [row["name"] for row in rows] == ["base", "closed", "without"]
+        assert rows[0]["objective_delta"] == 0
+        assert rows[2]["employees"] == rows[0]["employees"] - 1
+        events = job.wait_for_events(0, timeout=5)
+        assert sum(1 for e in events if e["type"] == "scenario") == 3
+        manager.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_scenarios_endpoint(self, client: AsyncClient, auth_headers: dict, session, job_role, shift_definition):
+        today = date.today()
+        user = User(
+            username="scenario",
+            password_hash=get_password_hash("test"),
+            full_name="Scenario Employee",
+            role_system=RoleSystem.EMPLOYEE
+        )
+        session.add(user)
+        session.commit()
+        session.add(UserJobRoleLink(user_id=user.id, role_id=job_role.id))
+        session.add(StaffingRequirement(date=today, shift_def_id=shift_definition.id, role_id=job_role.id, min_count=1))
+        session.add(Availability(
+            user_id=user.id, date=today, shift_def_id=shift_definition.id, status=AvailabilityStatus.AVAILABLE
+        ))
+        session.commit()
+
+        response = await client.post("/scheduler/scenarios", headers=auth_headers, json={
+            "start_date": str(today),
+            "end_date": str(today),
+            "scenarios": [{"name": "without", "remove_user_ids": [str(user.id)]}],
+        })
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+
+        result = (await client.get(f"/scheduler/jobs/{job_id}/result", headers=auth_headers)).json()
+        base, without = result["scenarios"]
+        assert base["fill_rate"] == 1.0
+        assert without["fill_rate"] == 0.0
+        assert without["fill_rate_delta"] == -1.0
+
+    @pytest.mark.asyncio
+    async def test_invalid_patch_rejected(self, client: AsyncClient, auth_headers: dict):
+        today = date.today()
+        response = await client.post("/scheduler/scenarios", headers=auth_headers, json={
+            "start_date": str(today),
+            "end_date": str(today),
+            "scenarios": [{"name": "bad", "requirements": [{"shift_def_id": 1, "role_id": 1, "delta": 1}]}],
+        })
+        assert response.status_code == 422
@@ -0,0 +1,73 @@
+"""
+Tests for solve telemetry (phase timings, CP-SAT statistics and the SolveRun history).
+"""
+import pytest
+from datetime import date
+from httpx import AsyncClient
+from sqlmodel import select
+
+from app.models import SolveRun
+from app.services.solver import SolverService
+from app.services.solver_telemetry import PhaseTimer, merge_stats
+
+
+class TestTelemetryHelpers:
+    def test_phase_timer_accumulates(self):
+        timer = PhaseTimer()
+        with timer.phase("extract"):
+            pass
+        with timer.phase("extract"):
+            pass
+        assert list(timer.phases) == ["extract"]
+        assert timer.total_ms >= timer.phases["extract"]
+
+    def test_merge_stats_sums_pieces(self):
+        merged = merge_stats([
+            {"wall_time": 1.0, "num_branches": 10, "num_conflicts": 1, "objective": 100.0, "best_bound": 110.0},
+            {"wall_time": 2.0, "num_branches": 5, "num_conflicts": 0, "objective": 50.0, "best_bound": 50.0},
+        ])
+        assert merged["wall_time"] == 2.0
+        assert merged["num_branches"] == 15
+        assert merged["objective"] == 150.0
+        assert merged["gap"] == pytest.approx(10 / 150)
+
+
+class TestSolveRunHistory:
+    def test_solve_records_phases_and_stats(self, session, staffed_day):
+        result = SolverService(session).solve(date.today(), date.today(), save=True)
+
+        run = session.exec(select(SolveRun)).one()
+        assert run.mode == "full"
+        assert run.status == "OPTIMAL"
+        assert run.assignments == result["count"] == 1
+        for phase in ("load_ms", "precheck_ms", "build_ms", "solve_ms", "extract_ms", "persist_ms"):
+            assert getattr(run, phase) is not None
+        assert run.num_variables >= 1
+        assert run.gap == 0
+        assert result["telemetry"]["total_ms"] == run.total_ms
+
+    def test_precheck_shortcut_recorded(self, session):
+        SolverService(session).solve(date.today(), date.today(), save=False)
+
+        run = session.exec(select(SolveRun)).one()
+        assert run.mode == "precheck"
+        assert run.solve_ms is None
+
+    @pytest.mark.asyncio
+    async def test_telemetry_endpoint(self, client: AsyncClient, auth_headers: dict, staffed_day):
+        today = date.today()
+        await client.post(
+            "/scheduler/generate",
+            headers=auth_headers,
+            json={"start_date": str(today), "end_date": str(today)}
+        )
+
+        response = await client.get("/scheduler/telemetry", headers=auth_headers)
+        assert response.status_code == 200
+        runs = response.json()
+        assert len(runs) == 1
+        assert runs[0]["employees"] >= 1
+        assert runs[0]["solve_ms"] is not None
+
+        response = await client.get("/scheduler/telemetry?mode=repair", headers=auth_headers)
+        assert response.json() == []
@@ -177,7 +177,16 @@ class ApiService {
         'end_date': endDate.toIso8601String().split('T')[0],
       },
     );
-    return response.data;
+    // Generation runs as a background job on the server; poll until it finishes.
+    final String jobId = response.data['job_id'];
+    String status = response.data['status'];
+    while (status == 'QUEUED' || status == 'RUNNING') {
+      await Future.delayed(const Duration(seconds: 1));
+      final job = await _dio.get('/scheduler/jobs/$jobId');
+      status = job.data['status'];
+    }
+    final result = await _dio.get('/scheduler/jobs/$jobId/result');
+    return result.data;
   }
 
   // Requirements (Manager)